@@ -2,16 +2,18 @@
 Executes flask app procedures for rendering pages and generating predictions.
 """
 
+import functools
 import logging
 import logging.config
 
 import sqlite3
 import traceback
+import pandas as pd
 import sqlalchemy.exc
 from flask import Flask, render_template, request
 
 # For setting up the Flask-SQLAlchemy database session
-from src.models import scalerRanges
+from src.featurize import FeatureTransform
 from src.run_pred import PredManager
 
 # Initialize the Flask application
@@ -37,28 +39,19 @@ logger.debug(
 # Initialize the database session
 pred_manager = PredManager(app)
 
-# Load in scaling and model objects
-try:
-    scaler_range = pred_manager.session.query(scalerRanges).filter_by(valuename="TotalPopulation").first()
-    min_value = scaler_range.min_value
-    max_value = scaler_range.max_value
-    logger.info("Min-max scaling values loaded.")
-except sqlite3.OperationalError as e:
-    logger.error(
-        "Error page returned. Not able to query local sqlite database: %s."
-        " Error: %s ",
-        app.config["SQLALCHEMY_DATABASE_URI"], e)
-    render_template("error.html")
-except sqlalchemy.exc.OperationalError as e:
-    logger.error(
-        "Error page returned. Not able to query MySQL database: %s. "
-        "Error: %s ",
-        app.config["SQLALCHEMY_DATABASE_URI"], e)
-    render_template("error.html")
-except:
-    traceback.print_exc()
-    logger.error("Not able to display table results, error page returned")
-    render_template("error.html")
+
+@functools.lru_cache(maxsize=None)
+def load_transform() -> FeatureTransform:
+    """
+    Loads feature transform of the training data, applied to user input as in training.
+
+    Loaded on the first prediction and kept for later ones. A failed load is not
+    kept, so a transform saved while the app runs is picked up.
+
+    Returns:
+        FeatureTransform: transform saved by run.py featurize --transform
+    """
+    return FeatureTransform.load(app.config["TRANSFORM_PATH"])
 
 
 @app.route("/")
@@ -109,45 +102,29 @@ def add_entry() -> str:
         redirect to index page
     """
 
-    # parse region radio button
-    # west is used as omitted dummy variable
-    regions = {"midwest":0 ,
-               "northeast":0,
-               "south":0,
-               "southwest":0}
-    for k in regions.keys():
-        if k == request.form["region"]:
-            regions[k] = 1
+    try:
+        transform = load_transform()
+    except FileNotFoundError:
+        logger.error(
+            "Error page returned. Feature transform not found at %s. Save it with "
+            "`python3 run.py featurize --transform=%s`.",
+            app.config["TRANSFORM_PATH"], app.config["TRANSFORM_PATH"])
+        return render_template("error.html")
 
-    scaled_totalpopulation = (float(request.form["population"]) - min_value)/(max_value-min_value)
+    # Featurize user input as one row of PLACES data; form fields are lowercase measure names
+    form_fields = {"HIGHCHOL": "highcol", "TotalPopulation": app.config["SCALED_COL"]}
+    user_input = {col: float(request.form[form_fields.get(col, col.lower())])
+                  for col in transform.make_floats + list(transform.scale_ranges) if col != transform.make_logit}
+    user_input["region"] = next((region for region in transform.regions
+                                 if region.lower() == request.form["region"]), request.form["region"])
+    featurized, _ = transform.apply(pd.DataFrame([user_input]), response=False)
+    features = featurized.drop(columns=list(transform.scale_ranges) + ["region"]).iloc[0]
 
     # Retrieve measurements again for display
     hlth_outcomes, hlth_behaviors, hlth_prevention = pred_manager.get_metrics(app.config["MAX_ROWS_SHOW"])
 
     try:
-        prob = pred_manager.generate_pred(access2=float(request.form["access2"])/100,
-                                            arthritis=float(request.form["arthritis"])/100,
-                                            binge=float(request.form["binge"])/100,
-                                            bphigh=float(request.form["bphigh"])/100,
-                                            bpmed=float(request.form["bpmed"])/100,
-                                            cancer=float(request.form["cancer"])/100,
-                                            casthma=float(request.form["casthma"])/100,
-                                            chd=float(request.form["chd"])/100,
-                                            checkup=float(request.form["checkup"])/100,
-                                            cholscreen=float(request.form["cholscreen"])/100,
-                                            copd=float(request.form["copd"])/100,
-                                            csmoking=float(request.form["csmoking"])/100,
-                                            depression=float(request.form["depression"])/100,
-                                            diabetes=float(request.form["diabetes"])/100,
-                                            highchol=float(request.form["highcol"])/100,
-                                            kidney=float(request.form["kidney"])/100,
-                                            obesity=float(request.form["obesity"])/100,
-                                            stroke=float(request.form["stroke"])/100,
-                                            scaled_totalpopulation=scaled_totalpopulation,
-                                            midwest=int(regions["midwest"]),
-                                            northeast=int(regions["northeast"]),
-                                            south=int(regions["south"]),
-                                            southwest=int(regions["southwest"]))
+        prob = pred_manager.generate_pred(**{col.lower(): value for col, value in features.items()})
         prob = str(prob) + "%" # Cast to string percentage for display
         logger.info("New prediction recorded.")
         return render_template("index.html", 
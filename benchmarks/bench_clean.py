@@ -0,0 +1,90 @@
+"""
+Benchmarks the clean step's import and prep_data on a synthetic raw PLACES file.
+
+The "before" variant imports the entire file with inferred types and pivots every
+measure on the six descriptive columns, as the clean step did originally; the
+"after" variant streams typed, compacted chunks through prep_data with the clean
+settings of the model config. Each variant runs in a fresh process so that peak
+RSS is measured independently.
+
+Usage:
+    python -m benchmarks.bench_clean --rows 3000000
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import typing
+
+import pandas as pd
+import yaml
+
+from benchmarks.resources import peak_rss_mb
+from benchmarks.synthetic_places import make_places_frame, tracts_for_rows
+from src.clean import import_file_chunks, prep_data
+
+def prep_before(file_path : str, clean_config : typing.Dict) -> pd.DataFrame:
+    """Imports and cleans raw data as the clean step did before it was fused."""
+    places = pd.read_csv(file_path, usecols=clean_config["import_file"]["columns"])
+    places = places.drop(places.loc[places.Data_Value.isna()].index, axis=0)
+    places_pivot = pd.pivot(places,
+                            index = ["StateDesc", "CountyName", "CountyFIPS",
+                                     "LocationID", "TotalPopulation", "Geolocation"],
+                            columns = "MeasureId",
+                            values = "Data_Value").reset_index()
+    response = clean_config["prep_data"]["response"]
+    places_pivot.dropna(subset=[response], inplace=True, axis=0)
+    places_pivot.drop(places_pivot.loc[places_pivot[response].isnull()].index, axis=0, inplace=True)
+    places_pivot.drop(clean_config["prep_data"]["invalid_measures"], axis=1, inplace=True, errors="ignore")
+    return places_pivot.reset_index(drop=True)
+
+def prep_after(file_path : str, clean_config : typing.Dict) -> pd.DataFrame:
+    """Imports and cleans raw data as the clean step does, one chunk at a time."""
+    places_chunks = import_file_chunks(file_path,
+                                       dtypes=clean_config["validate_df"]["cols"],
+                                       **clean_config["import_file"])
+    return prep_data(places_chunks, **clean_config["prep_data"])
+
+VARIANTS = {"before": prep_before, "after": prep_after}
+
+def run_variant(variant : str, file_path : str, clean_config : typing.Dict) -> typing.Dict:
+    """Runs a variant and reports its wall time and the peak RSS of the process."""
+    start = time.perf_counter()
+    places_pivot = VARIANTS[variant](file_path, clean_config)
+    elapsed = time.perf_counter() - start
+    return {"variant": variant,
+            "locations": len(places_pivot),
+            "seconds": round(elapsed, 3),
+            "peak_rss_mb": peak_rss_mb()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the clean step before and after fusing.")
+    parser.add_argument("--rows", type=int, default=3000000, help="Approximate rows of raw data")
+    parser.add_argument("--config", default="config/model-config.yaml", help="Model config with clean section")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS),
+                        help="Variants to benchmark")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        clean_config = yaml.load(f, Loader=yaml.FullLoader)["clean"]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "raw_places.csv")
+        n_tracts = tracts_for_rows(args.rows)
+        raw = make_places_frame(n_counties=max(1, n_tracts // 34), tracts_per_county=34)
+        raw.to_csv(file_path)
+        n_rows = len(raw)
+        del raw
+
+        for variant in args.variants:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(run_variant, variant, file_path, clean_config).result()
+            result.update({"rows": n_rows, "rows_per_sec": round(n_rows / result["seconds"])})
+            results.append(result)
+    print(json.dumps(results, indent=2))
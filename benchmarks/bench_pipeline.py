@@ -0,0 +1,150 @@
+"""
+Benchmarks the model pipeline end to end on synthetic PLACES data.
+
+Synthetic raw data of counties x tracts per county x measures is generated for each
+release year (see benchmarks/synthetic_places.py) and passed through the run.py
+steps clean, featurize, train, score and evaluate in turn. Each step runs in its own
+process and records its wall time, peak RSS and input rows per second. Results are
+written as JSON named after the current commit, so that runs of different commits
+can be compared with --compare.
+
+Usage:
+    python -m benchmarks.bench_pipeline --counties 2000 --tracts-per-county 36
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline_<commit>.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+from benchmarks.resources import peak_rss_mb
+from benchmarks.synthetic_places import make_places_frame
+
+STEPS = ["clean", "featurize", "train", "score", "evaluate"]
+
+def step_arguments(step : str, work_dir : str, config : str) -> typing.List[str]:
+    """Returns run.py arguments of a step, chaining outputs to inputs as the Makefile does."""
+    path = lambda name: os.path.join(work_dir, name)
+    arguments = {"clean": ["--input", path("raw_places.csv"), "--output", path("clean.csv")],
+                 "featurize": ["--input", path("clean.csv"), "--output", path("featurized.csv")],
+                 "train": ["--input", path("featurized.csv"), "--output", path("train_test.csv"),
+                           "--model", path("model.sav")],
+                 "score": ["--input", path("train_test.csv"), "--output", path("score.csv"),
+                           "--model", path("model.sav")],
+                 "evaluate": ["--input", path("score.csv"), "--output", path("performance.png")]}
+    return [step, "--config", config] + arguments[step]
+
+def count_rows(file_path : str) -> int:
+    """Returns number of records of a csv file with a header."""
+    with open(file_path, "rb") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+def run_step(argv : typing.List[str], peak_file : str) -> None:
+    """
+    Runs run.py in this process and writes its peak RSS to peak_file.
+
+    Invoked by benchmark_step through --run-step, so that each step is measured
+    in a freshly started interpreter.
+    """
+    sys.argv = ["run.py"] + argv
+    returncode = 0
+    try:
+        runpy.run_path("run.py", run_name="__main__")
+    except SystemExit as exit_err:
+        returncode = exit_err.code if isinstance(exit_err.code, int) else 1
+    with open(peak_file, "w") as f:
+        json.dump({"peak_rss_mb": peak_rss_mb(), "returncode": returncode}, f)
+
+def benchmark_step(step : str, work_dir : str, config : str) -> typing.Dict:
+    """Runs a step in a new process and reports its wall time, peak RSS and throughput."""
+    argv = step_arguments(step, work_dir, config)
+    rows = count_rows(argv[argv.index("--input") + 1])
+    peak_file = os.path.join(work_dir, f"{step}.peak.json")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "benchmarks.bench_pipeline", "--run-step", peak_file, "--"] + argv,
+                   check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    with open(peak_file, "r") as f:
+        measured = json.load(f)
+    return {"step": step,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "peak_rss_mb": measured["peak_rss_mb"],
+            "rows_per_sec": round(rows / elapsed),
+            "returncode": measured["returncode"]}
+
+def current_commit() -> typing.Optional[str]:
+    """Returns the commit of the working tree, if it is a git repository."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+def compare_results(results : typing.Dict, baseline : typing.Dict) -> typing.List[typing.Dict]:
+    """Returns ratios of seconds and peak RSS of each step to those of a baseline run."""
+    baseline_steps = {(step["year"], step["step"]): step for step in baseline["steps"]}
+    comparison = []
+    for step in results["steps"]:
+        previous = baseline_steps.get((step["year"], step["step"]))
+        if previous is None:
+            continue
+        comparison.append({"year": step["year"],
+                           "step": step["step"],
+                           "seconds_ratio": round(step["seconds"] / previous["seconds"], 3),
+                           "peak_rss_ratio": round(step["peak_rss_mb"] / previous["peak_rss_mb"], 3)})
+    return comparison
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--run-step":
+        run_step(sys.argv[4:], sys.argv[2])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Benchmark the model pipeline end to end.")
+    parser.add_argument("--counties", type=int, default=200, help="Number of counties")
+    parser.add_argument("--tracts-per-county", type=int, default=20, help="Census tracts per county")
+    parser.add_argument("--years", nargs="+", default=["2019"], help="Release years, each run separately")
+    parser.add_argument("--steps", nargs="+", default=STEPS, choices=STEPS, help="Steps to benchmark")
+    parser.add_argument("--config", default="config/model-config.yaml", help="Model config of the steps")
+    parser.add_argument("--output", default=None,
+                        help="Where to save results; defaults to benchmarks/results/pipeline_<commit>.json")
+    parser.add_argument("--compare", default=None, help="Results of a previous run to compare against")
+    args = parser.parse_args()
+
+    commit = current_commit()
+    results = {"commit": commit,
+               "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+               "scale": {"counties": args.counties,
+                         "tracts_per_county": args.tracts_per_county,
+                         "years": args.years},
+               "steps": []}
+    places = make_places_frame(args.counties, args.tracts_per_county, args.years)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for year in args.years:
+            year_places = places.loc[places["Year"] == year].drop(columns="Year") \
+                if "Year" in places.columns else places
+            year_places.reset_index(drop=True).to_csv(os.path.join(work_dir, "raw_places.csv"))
+            del year_places
+            for step in args.steps:
+                result = dict(year=year, **benchmark_step(step, work_dir, args.config))
+                results["steps"].append(result)
+                if result["returncode"] != 0: # Later steps need this step's output
+                    break
+    del places
+
+    output = args.output or os.path.join("benchmarks", "results", f"pipeline_{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results["steps"], indent=2))
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print(json.dumps(compare_results(results, json.load(f)), indent=2))
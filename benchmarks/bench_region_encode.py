@@ -0,0 +1,86 @@
+"""
+Benchmarks region encoding of clean PLACES data at national census-tract scale.
+
+The "before" variant maps StateDesc strings through the state to region dict and
+joins pd.get_dummies of the result, as one_hot_encode did originally; the "after"
+variant encodes regions with RegionEncoder, as one_hot_encode does now. Both run
+on the same clean-shaped frame of --locations tracts for each of --years years,
+with StateDesc as strings and, as compacted by import_file, as categories.
+
+Usage:
+    python -m benchmarks.bench_region_encode --locations 72000 --years 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+import typing
+
+import numpy as np
+import pandas as pd
+
+from data.reference.state_region_mapping import states_region_mapping
+from src.featurize import one_hot_encode
+
+def encode_before(places_pivot : pd.DataFrame, states_to_regions : typing.Dict[str, str]) -> pd.DataFrame:
+    """Encodes regions as one_hot_encode did before RegionEncoder."""
+    places_pivot = places_pivot.copy()
+    places_pivot["region"] = places_pivot["StateDesc"].map(states_to_regions)
+    sum(places_pivot["region"].isna()) # Check of unmapped states, which only logged a warning
+    return places_pivot.join(pd.get_dummies(places_pivot["region"], dtype=int).drop("West", axis=1))
+
+def encode_after(places_pivot : pd.DataFrame, states_to_regions : typing.Dict[str, str]) -> pd.DataFrame:
+    """Encodes regions as one_hot_encode does."""
+    return one_hot_encode(places_pivot, states_to_regions)
+
+VARIANTS = {"before": encode_before, "after": encode_after}
+
+def make_clean_frame(n_locations : int, n_years : int, seed : int = 42) -> pd.DataFrame:
+    """Creates a frame shaped like clean data: one row per tract and year, states grouped as in PLACES."""
+    rng = np.random.default_rng(seed)
+    states = np.array(list(states_region_mapping))
+    tract_states = np.sort(rng.integers(0, len(states), n_locations))
+    return pd.DataFrame({"StateDesc": np.tile(states[tract_states], n_years),
+                         "LocationID": np.tile(np.arange(n_locations), n_years),
+                         "Year": np.repeat(np.arange(2019, 2019 + n_years), n_locations),
+                         "TotalPopulation": rng.integers(500, 9000, n_locations * n_years)})
+
+def run_variant(variant : str, places_pivot : pd.DataFrame, repeat : int) -> typing.Dict:
+    """Runs a variant repeat times and reports its median wall time and peak traced memory."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        VARIANTS[variant](places_pivot, states_region_mapping)
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    encoded = VARIANTS[variant](places_pivot, states_region_mapping)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    dummies = encoded[["Midwest", "Northeast", "South", "Southwest"]]
+    return {"variant": variant,
+            "seconds": round(statistics.median(seconds), 4),
+            "peak_mb": round(peak / 1e6, 1),
+            "dummies_mb": round(dummies.memory_usage(index=False).sum() / 1e6, 1)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark region encoding before and after RegionEncoder.")
+    parser.add_argument("--locations", type=int, default=72000, help="Census tracts per year")
+    parser.add_argument("--years", type=int, default=5, help="Years of data per tract")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each variant; medians are reported")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS),
+                        help="Variants to benchmark")
+    args = parser.parse_args()
+
+    places_pivot = make_clean_frame(args.locations, args.years)
+    results = []
+    for state_type in ["object", "category"]:
+        places_typed = places_pivot.astype({"StateDesc": state_type})
+        for variant in args.variants:
+            result = run_variant(variant, places_typed, args.repeat)
+            result.update({"StateDesc": state_type,
+                           "rows": len(places_typed),
+                           "rows_per_sec": round(len(places_typed) / result["seconds"])})
+            results.append(result)
+    print(json.dumps(results, indent=2))
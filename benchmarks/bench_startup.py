@@ -0,0 +1,152 @@
+"""
+Benchmarks the startup time of each run.py step.
+
+Each step is started in a new interpreter with `python -X importtime` and a copy
+of the model config whose sections are all empty, so the step imports what it
+needs and then exits before doing any work. The import times reported by the
+interpreter are summed into a report of the cost of starting each step, with the
+modules contributing most to it. Each stage of the pipeline step is also timed
+importing the modules it runs (see STAGE_MODULES of src/pipeline.py).
+
+Results are written as JSON named after the current commit. Passing --baseline
+exits with an error if any step's import time grew by more than --tolerance, or
+if a step imports a module in --forbid, so startup regressions fail CI.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --baseline benchmarks/results/startup_<commit>.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+import yaml
+
+from benchmarks.bench_pipeline import current_commit
+
+STEPS = ["--help", "create_db", "add_measures", "ingest", "clean", "featurize", "train", "score",
+         "evaluate", "pipeline", "sweep"]
+
+# Modules no step should import before it starts working
+FORBIDDEN = ["sklearn", "matplotlib", "scipy"]
+
+def parse_importtime(stderr : str) -> typing.List[typing.Dict]:
+    """
+    Parses the report of `python -X importtime` into one entry per imported module.
+
+    Args:
+        stderr (str) : Standard error of the interpreter.
+
+    Returns:
+        list[dict]: module, depth of nesting, self and cumulative microseconds, in import order
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append({"module": name.strip(),
+                        "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                        "self_us": int(self_us),
+                        "cumulative_us": int(cumulative_us)})
+    return modules
+
+def empty_config(config : str, output : str) -> None:
+    """Writes a copy of a model config with every section empty."""
+    with open(config, "r") as f:
+        sections = yaml.load(f, Loader=yaml.FullLoader)
+    with open(output, "w") as f:
+        yaml.dump({section: None for section in sections}, f)
+
+def time_imports(argv : typing.List[str]) -> typing.Tuple[float, typing.List[typing.Dict]]:
+    """Runs a new interpreter with -X importtime and returns its wall seconds and imported modules."""
+    env = {key: value for key, value in os.environ.items() if key != "SQLALCHEMY_DATABASE_URI"}
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime"] + argv, check=False, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return time.perf_counter() - start, parse_importtime(completed.stderr)
+
+def summarize(name : str,
+              runs : typing.List[typing.Tuple[float, typing.List[typing.Dict]]],
+              top : int) -> typing.Dict:
+    """Reports median wall and import time of runs of a step, and its costliest top-level imports."""
+    modules = runs[0][1]
+    top_level = sorted((module for module in modules if module["depth"] == 0),
+                       key=lambda module: module["cumulative_us"], reverse=True)
+    return {"step": name,
+            "wall_ms": round(statistics.median(wall for wall, _ in runs) * 1000, 1),
+            "import_ms": round(statistics.median(sum(module["self_us"] for module in run_modules)
+                                                 for _, run_modules in runs) / 1000, 1),
+            "modules": len(modules),
+            "forbidden": sorted({module["module"].split(".")[0] for module in modules} & set(FORBIDDEN)),
+            "top": [{"module": module["module"], "ms": round(module["cumulative_us"] / 1000, 1)}
+                    for module in top_level[:top]]}
+
+def check_regressions(results : typing.Dict,
+                      baseline : typing.Dict,
+                      tolerance : float,
+                      slack_ms : float = 10.0) -> typing.List[str]:
+    """Returns a message for each step that imports a forbidden module or slowed beyond tolerance."""
+    baseline_steps = {step["step"]: step for step in baseline["steps"]}
+    messages = []
+    for step in results["steps"]:
+        if step["forbidden"] and not step["step"].startswith("stage:"):
+            messages.append(f"{step['step']} imports {', '.join(step['forbidden'])}")
+        previous = baseline_steps.get(step["step"])
+        if previous is not None and step["import_ms"] > previous["import_ms"] * (1 + tolerance) + slack_ms:
+            messages.append(f"{step['step']} import time {step['import_ms']} ms exceeds "
+                            f"baseline {previous['import_ms']} ms")
+    return messages
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of each run.py step.")
+    parser.add_argument("--steps", nargs="+", default=STEPS, choices=STEPS, help="Steps to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each step; medians are reported")
+    parser.add_argument("--top", type=int, default=5, help="Costliest imports reported per step")
+    parser.add_argument("--config", default="config/model-config.yaml", help="Model config to empty")
+    parser.add_argument("--output", default=None,
+                        help="Where to save results; defaults to benchmarks/results/startup_<commit>.json")
+    parser.add_argument("--baseline", default=None, help="Results of a previous run to guard against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed growth of a step's import time over the baseline")
+    args = parser.parse_args()
+
+    from src.pipeline import STAGE_MODULES
+
+    commit = current_commit()
+    results = {"commit": commit,
+               "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+               "steps": []}
+    with tempfile.TemporaryDirectory() as work_dir:
+        config = os.path.join(work_dir, "empty-config.yaml")
+        empty_config(args.config, config)
+        for step in args.steps:
+            argv = ["run.py", step] if step == "--help" else ["run.py", step, "--config", config]
+            runs = [time_imports(argv) for _ in range(args.repeat)]
+            results["steps"].append(summarize(step, runs, args.top))
+        for stage, modules in STAGE_MODULES.items():
+            argv = ["-c", "; ".join(f"import {module}" for module in modules)]
+            runs = [time_imports(argv) for _ in range(args.repeat)]
+            results["steps"].append(summarize(f"stage:{stage}", runs, args.top))
+
+    output = args.output or os.path.join("benchmarks", "results", f"startup_{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps([{key: step[key] for key in ("step", "wall_ms", "import_ms", "modules")}
+                      for step in results["steps"]], indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = check_regressions(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"Startup regression: {message}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
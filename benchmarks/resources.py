@@ -0,0 +1,24 @@
+"""
+Measures resources used by benchmarked processes.
+"""
+
+import resource
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of this process in MB.
+
+    On Linux, ru_maxrss survives exec, so a spawned process would report the
+    peak of its parent; the high-water mark in /proc is used there instead.
+
+    Returns:
+        float: peak resident set size in MB
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except FileNotFoundError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
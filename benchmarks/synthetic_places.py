@@ -0,0 +1,118 @@
+"""
+Generates synthetic PLACES data shaped like the raw file written by the ingest step.
+
+Census tracts are spread over counties of every state in states_region_mapping and
+carry the measures in references/measure_lookup.csv. Each measure is reported for
+the same share of tracts as in the real data, and tracts reporting a measure also
+report every measure of higher coverage. Measure values share a latent health score
+per tract, so the response is related to the predictors as in PLACES.
+
+Usage:
+    python -m benchmarks.synthetic_places --counties 3000 --tracts-per-county 34 --output data/sample/raw.csv
+"""
+
+import argparse
+import typing
+
+import numpy as np
+import pandas as pd
+
+from data.reference.state_region_mapping import states_region_mapping
+
+MEASURE_LOOKUP_PATH = "references/measure_lookup.csv"
+
+def load_measures(measure_lookup_path : str = MEASURE_LOOKUP_PATH) -> pd.DataFrame:
+    """
+    Imports PLACES measures and the share of tracts reporting each.
+
+    Args:
+        measure_lookup_path (str) : Location of measure lookup csv.
+
+    Returns:
+        pandas dataframe: one row per MeasureId with columns Category, Measure,
+                          Short_Question_Text and coverage
+    """
+    measures = pd.read_csv(measure_lookup_path)
+    # StateAbbr of the lookup holds the number of tracts reporting the measure
+    measures["coverage"] = measures["StateAbbr"] / measures["StateAbbr"].max()
+    return measures.drop(columns="StateAbbr")
+
+def make_places_frame(n_counties : int = 100,
+                      tracts_per_county : int = 10,
+                      years : typing.Sequence[str] = ("2019",),
+                      seed : int = 42,
+                      measure_lookup_path : str = MEASURE_LOOKUP_PATH) -> pd.DataFrame:
+    """
+    Creates long-form PLACES data of n_counties x tracts_per_county tracts x measures x years.
+
+    Args:
+        n_counties (int) : Number of counties, spread evenly over states.
+        tracts_per_county (int) : Number of census tracts per county.
+        years (list[str]) : Release years. A Year column is added if more than one.
+        seed (int) : Seed of random values.
+        measure_lookup_path (str) : Location of measure lookup csv.
+
+    Returns:
+        pandas dataframe: PLACES data with one row per tract, measure and year
+    """
+    rng = np.random.default_rng(seed)
+    measures = load_measures(measure_lookup_path)
+    states = np.array(list(states_region_mapping))
+
+    # One entry per tract
+    county = np.repeat(np.arange(n_counties), tracts_per_county)
+    state = county % len(states)
+    county_fips = (state + 1) * 1000 + county // len(states) + 1
+    location_id = county_fips * 1000000 + np.tile(np.arange(tracts_per_county) + 100, n_counties)
+    population = rng.integers(500, 8000, len(county))
+    longitude = rng.uniform(-124, -67, len(county)).round(8)
+    latitude = rng.uniform(25, 49, len(county)).round(8)
+    geolocation = pd.Series(longitude).astype(str).radd("{'type': 'Point', 'coordinates': [") \
+        + ", " + pd.Series(latitude).astype(str) + "]}"
+    health = rng.standard_normal(len(county)) # Latent health score shared by measures
+    reporting = rng.random(len(county))
+
+    # Mean and sensitivity to health score of each measure
+    base = rng.uniform(5, 40, len(measures))
+    slope = rng.uniform(1, 6, len(measures)) * rng.choice([-1, 1], len(measures))
+
+    frames = []
+    for year_index, year in enumerate(years):
+        tract = np.repeat(np.arange(len(county)), len(measures))
+        measure = np.tile(np.arange(len(measures)), len(county))
+        # Measures of lower coverage are reported by a subset of the tracts reporting those of higher
+        reported = reporting[tract] < measures["coverage"].to_numpy()[measure]
+        tract, measure = tract[reported], measure[reported]
+        data_value = (base[measure] + slope[measure] * health[tract] + year_index * 0.2
+                      + rng.normal(0, 1, len(tract))).clip(0.1, 99.9).round(1)
+        frame = pd.DataFrame({"StateDesc": states[state[tract]],
+                              "CountyName": pd.Series(county[tract]).astype(str).radd("County ").to_numpy(),
+                              "CountyFIPS": county_fips[tract],
+                              "LocationID": location_id[tract],
+                              "TotalPopulation": population[tract],
+                              "Geolocation": geolocation.to_numpy()[tract],
+                              "MeasureId": measures["MeasureId"].to_numpy()[measure],
+                              "Data_Value": data_value,
+                              "Category": measures["Category"].to_numpy()[measure],
+                              "Short_Question_Text": measures["Short_Question_Text"].to_numpy()[measure],
+                              "Measure": measures["Measure"].to_numpy()[measure]})
+        if len(years) > 1:
+            frame["Year"] = year
+        frames.append(frame)
+
+    return pd.concat(frames, axis=0, ignore_index=True)
+
+def tracts_for_rows(n_rows : int, measure_lookup_path : str = MEASURE_LOOKUP_PATH) -> int:
+    """Returns the number of tracts expected to give n_rows rows per year."""
+    return max(1, round(n_rows / load_measures(measure_lookup_path)["coverage"].sum()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic raw PLACES data.")
+    parser.add_argument("--counties", type=int, default=100, help="Number of counties")
+    parser.add_argument("--tracts-per-county", type=int, default=10, help="Census tracts per county")
+    parser.add_argument("--years", nargs="+", default=["2019"], help="Release years")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of random values")
+    parser.add_argument("--output", default="data/sample/raw_places.csv", help="Where to save raw data")
+    args = parser.parse_args()
+
+    make_places_frame(args.counties, args.tracts_per_county, args.years, args.seed).to_csv(args.output)
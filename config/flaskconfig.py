@@ -12,4 +12,5 @@ SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI")
 if SQLALCHEMY_DATABASE_URI is None:
     SQLALCHEMY_DATABASE_URI = "sqlite:///data/places.db" 
 
-SCALED_COL = "population"
\ No newline at end of file
+SCALED_COL = "population"
+TRANSFORM_PATH = os.environ.get("TRANSFORM_PATH", "models/transform.json") # Saved by run.py featurize --transform
@@ -1,34 +1,24 @@
 """
 Configures the subparsers for receiving command line arguments for each
 stage in the model pipeline and orchestrates their execution.
+
+Modules are imported by the step that uses them, so that a step only pays for
+importing its own dependencies. See benchmarks/bench_startup.py.
 """
 
 import argparse
+import contextlib
 import logging
 import logging.config
 import sys
 
 import yaml
-import requests
-import botocore
-import sqlalchemy.exc
 
 # Configurations
 from config import config
 
-# Modules
-from src.models import create_db
-from src.add_definitions import add_references
-from src.retrieve_data import import_places_api, upload_file
-from src.clean import import_file, validate_df, prep_data
-from src.featurize import reformat_measures, scale_values, one_hot_encode
-from src.run_model import fit_model, add_params, dump_model
-from src.train_test_split import split_data
-from src.score import import_model, pred_responses
-from src.evaluate import visualize_performance
-
-# References
-from data.reference.state_region_mapping import states_region_mapping
+# Modules; stage dependencies are imported as stages run
+from src.pipeline import STAGES, STAGE_INPUTS, STAGE_OUTPUTS, STAGE_CONFIG_SECTIONS, run_pipeline, select_stages
 
 logging.config.fileConfig("config/logging/local.conf")
 logger = logging.getLogger("model_pipeline")
@@ -41,14 +31,33 @@ if __name__ == "__main__":
                      train model, score model, and/or evaluate model.")
 
     parser.add_argument("step", help="Which step to run", choices=["create_db", "add_measures", "ingest", "clean",
-                                                                   "featurize", "train", "score", "evaluate"])
+                                                                   "featurize", "train", "score", "evaluate",
+                                                                   "pipeline", "sweep"])
     parser.add_argument("--config", default="config/model-config.yaml", help="Path to configuration file")
     parser.add_argument("--input", "-i", default=None, help="Path to retrieve input file")
     parser.add_argument("--output", "-o", default=None, help="Path to save transaction output file")
     parser.add_argument("--model", "-m", default=None, help="Path to trained model object")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="Paths to trained model objects, or directories of them, scored by score in one pass")
+    parser.add_argument("--featurized", default=None,
+                        help="Path to featurized data, from which score takes test rows of a mask-only train_test")
+    parser.add_argument("--transform", "-t", default=None,
+                        help="Path to feature transform saved by featurize, or applied by score to clean data")
     parser.add_argument("--write", "-w", action='store_true', default=False,
                         help="Whether to record coefficients/scaling param\
                               values to SQLALCHEMY_DATABASE_URI database")
+    parser.add_argument("--resume", action="store_true", default=False,
+                        help="Whether ingest should reuse pages retrieved by a failed attempt")
+    parser.add_argument("--start", default=None, choices=STAGES,
+                        help="First stage run by the pipeline step; overrides config")
+    parser.add_argument("--end", default=None, choices=STAGES,
+                        help="Last stage run by the pipeline step; overrides config")
+    parser.add_argument("--cache", action="store_true", default=False,
+                        help="Whether to cache artifacts of stages and reuse them, even if not enabled in config")
+    parser.add_argument("--no-cache", action="store_true", default=False,
+                        help="Whether to run stages even if their artifacts are cached")
+    parser.add_argument("--profile", action="store_true", default=False,
+                        help="Whether to report time and memory of each stage; overrides config")
     args = parser.parse_args()
 
     # Load configuration file
@@ -59,8 +68,17 @@ if __name__ == "__main__":
         logger.error("Please provide a valid configuration file; exiting.")
         sys.exit(1)
 
+    # Storage format of artifacts from clean onward; None to infer from file extensions
+    file_format = mdl_config.get("file_format")
+
+    # Chunked scoring of the score step, also used to score several --models in one pass
+    score_config = mdl_config.get("score") or {}
+    batch_config = score_config.get("batch") or {}
+
     # Create database
     if args.step == "create_db":
+        import sqlalchemy.exc
+        from src.models import create_db
         if config.SQLALCHEMY_DATABASE_URI is None:
             logger.error("Specify SQLALCHEMY_DATABASE_URI environment variable.")
             sys.exit(1)
@@ -72,6 +90,8 @@ if __name__ == "__main__":
 
     # Population measurement definitions
     elif args.step == "add_measures":
+        import sqlalchemy.exc
+        from src.add_definitions import add_references
         if config.SQLALCHEMY_DATABASE_URI is None:
             logger.error("Specify SQLALCHEMY_DATABASE_URI environment variable.")
             sys.exit(1)
@@ -86,193 +106,179 @@ if __name__ == "__main__":
 
     # Get raw data from API
     elif args.step == "ingest":
+        import requests
+        import botocore.exceptions
+        from src.retrieve_data import import_places_api, stream_places_api, update_places_api, upload_file
         if not mdl_config["ingest"]:
             logger.error("Configuration file is missing section for selected step; exiting.")
             sys.exit(1)
+        ingest_params = mdl_config["ingest"]["import_places_api"]
+        # Pages are checkpointed next to --output until the file is complete
+        checkpoint_dir = None
+        if mdl_config["ingest"].get("checkpoint", False):
+            checkpoint_dir = args.output + ".checkpoint"
         try:
-            raw_data = import_places_api(**mdl_config["ingest"]["import_places_api"],
-                                        app_token=config.API_KEY,   # type: ignore
-                                        socrata_username=config.API_USERNAME,   # type: ignore
-                                        socrata_password=config.API_PASSWORD)  # type: ignore
+            if mdl_config["ingest"].get("incremental", False):
+                # Only rows added or revised since the last ingest are merged into --output
+                raw_data = None
+                update_places_api(args.output,
+                                  **ingest_params,
+                                  checkpoint_dir=checkpoint_dir,
+                                  resume=args.resume,
+                                  app_token=config.API_KEY,   # type: ignore
+                                  socrata_username=config.API_USERNAME,   # type: ignore
+                                  socrata_password=config.API_PASSWORD)  # type: ignore
+            elif mdl_config["ingest"].get("stream_to_file", False):
+                # Pages are written to --output as they arrive; nothing left to upload
+                raw_data = None
+                stream_places_api(args.output,
+                                  **ingest_params,
+                                  checkpoint_dir=checkpoint_dir,
+                                  resume=args.resume,
+                                  app_token=config.API_KEY,   # type: ignore
+                                  socrata_username=config.API_USERNAME,   # type: ignore
+                                  socrata_password=config.API_PASSWORD)  # type: ignore
+            else:
+                if args.resume:
+                    logger.warning("Resume requires stream_to_file or incremental; retrieving all data.")
+                raw_data = import_places_api(**ingest_params,
+                                            app_token=config.API_KEY,   # type: ignore
+                                            socrata_username=config.API_USERNAME,   # type: ignore
+                                            socrata_password=config.API_PASSWORD)  # type: ignore
         except requests.exceptions.ConnectionError:
             logger.error("A connection error has occurred; exiting.")
             sys.exit(1)
         except requests.exceptions.HTTPError:
             logger.error("An error has occurred with the socrata_dataset_identifier or query; exiting.")
             sys.exit(1)
-        except Exception as e:
-            logger.error("An error has occurred while trying to acquire data: %s", e)
-            logger.error("The application is exiting.")
-            sys.exit(1)
-        else:
-            try:
-                upload_file(raw_data, args.output)
-            except FileNotFoundError:
-                logger.error("An invalid file location has been provided; exiting.")
-                sys.exit(1)
-            except botocore.exceptions.NoCredentialsError:  # type: ignore
-                logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
-                sys.exit(1)
-            except Exception as e:
-                logger.error("An error has occurred while trying to upload file: %s.", e)
-                logger.error("The application is exiting.")
-                sys.exit(1)
-
-    # Clean raw data
-    elif args.step == "clean":
-        # Set config
-        if not mdl_config["clean"]:
-            logger.error("Configuration file is missing section for selected step; exiting.")
-            sys.exit(1)
-        clean_data = mdl_config["clean"]
-
-        # Import file
-        try:
-            places_df = import_file(args.input, **clean_data["import_file"])
-        except botocore.exceptions.NoCredentialsError:  # type: ignore
-            logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
-            sys.exit(1)
         except FileNotFoundError:
             logger.error("An invalid file location has been provided; exiting.")
             sys.exit(1)
-        except KeyError:
-            logger.error("A desired column is missing from the file; exiting.")
+        except botocore.exceptions.NoCredentialsError:  # type: ignore
+            logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
             sys.exit(1)
         except Exception as e:
-            logger.error("There was a problem importing the file: %s.", e)
+            logger.error("An error has occurred while trying to acquire data: %s", e)
             logger.error("The application is exiting.")
             sys.exit(1)
         else:
-            # Validate data
-            try:
-                validate_df(places_df, **clean_data["validate_df"])
-            except ValueError:
-                logger.error(
-                    "Dataframe has no records, duplicate records, or contains null values; exiting.")
-                sys.exit(1)
-            except KeyError:
-                logger.error("A desired column is missing from the file; exiting.")
-                sys.exit(1)
-            except TypeError:
-                logger.error("A column data type mismatch has occurred; exiting.")
-                sys.exit(1)
-            else:
-                # Clean and save
+            if raw_data is not None:
                 try:
-                    places_pivot = prep_data(places_df, **clean_data["prep_data"])
-                    upload_file(places_pivot, args.output)
-                except KeyError:
-                    logger.error("Required or provided column(s) are missing from the dataframe; exiting.")
-                    sys.exit(1)
-                except TypeError:
-                    logger.error("Data_Value column must be numeric and Column identifiers string; exiting.")
-                    sys.exit(1)
+                    upload_file(raw_data, args.output)
                 except FileNotFoundError:
                     logger.error("An invalid file location has been provided; exiting.")
                     sys.exit(1)
                 except botocore.exceptions.NoCredentialsError:  # type: ignore
                     logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
                     sys.exit(1)
-                except AttributeError:
-                    logger.error("First argument must be a dataframe; exiting.")
-                    sys.exit(1)
                 except Exception as e:
-                    logger.error("There was a problem saving to file: %s.", e)
+                    logger.error("An error has occurred while trying to upload file: %s.", e)
                     logger.error("The application is exiting.")
                     sys.exit(1)
 
-    # Featurize clean data
-    elif args.step == "featurize":
-        # Set config
-        if not mdl_config["featurize"]:
+    # Score a file chunk by chunk, with one or more models, streaming predictions to the output
+    elif args.step == "score" and (args.models or batch_config.get("enabled")):
+        if not mdl_config.get("train_model") or not batch_config:
             logger.error("Configuration file is missing section for selected step; exiting.")
             sys.exit(1)
-        featurize_data = mdl_config["featurize"]
-
-        # Import file
+        from src.score import import_model, load_models, score_batch
         try:
-            places_pivot = import_file(args.input, **featurize_data["import_file"])
-        except botocore.exceptions.NoCredentialsError:  # type: ignore
-            logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
-            sys.exit(1)
+            score_batch(args.input,
+                        args.output,
+                        load_models(args.models) if args.models else import_model(args.model),
+                        features = mdl_config["train_model"]["features"],
+                        keep = batch_config.get("keep"),
+                        chunksize = batch_config["chunksize"],
+                        logistic = batch_config.get("logistic", False),
+                        test_only = batch_config.get("test_only", True),
+                        n_jobs = batch_config.get("n_jobs"),
+                        file_format = file_format)
         except FileNotFoundError:
             logger.error("An invalid file location has been provided; exiting.")
             sys.exit(1)
         except KeyError:
-            logger.error("A desired column is missing from the file; exiting.")
+            logger.error("Required or provided column(s) are missing from the file or dataframe; exiting.")
+            sys.exit(1)
+        except (TypeError, ValueError):
+            logger.error("The model is not a linear model, or the input is missing columns or has no rows to score; exiting.")
             sys.exit(1)
         except Exception as e:
-            logger.error("There was a problem importing the file: %s.", e)
+            logger.error("There was a problem scoring the file: %s.", e)
             logger.error("The application is exiting.")
             sys.exit(1)
 
-        # Validate data
+    # Run model pipeline stages (clean -> model evaluation)
+    elif args.step in STAGES or args.step == "pipeline":
+        import botocore.exceptions
+        import sqlalchemy.exc
+        from src.stage_cache import StageCache
+        from src.profiling import Profiler
+        if args.step == "pipeline":
+            # Range of stages run in one process; artifacts between them stay in memory
+            pipeline_config = mdl_config.get("pipeline") or {}
+            start = args.start or pipeline_config.get("start", STAGES[0])
+            end = args.end or pipeline_config.get("end", STAGES[-1])
+            intermediates = {name: path for name, path in (pipeline_config.get("save") or {}).items() if path}
         else:
-            try:
-                validate_df(places_pivot, **featurize_data["validate_df"])
-            except ValueError:
-                logger.error(
-                    "Dataframe has no records, duplicate records, or contains null values; exiting.")
-                sys.exit(1)
-            except KeyError:
-                logger.error("A desired column is missing from the file; exiting.")
-                sys.exit(1)
-            except TypeError:
-                logger.error("A column data type mismatch has occurred; exiting.")
-                sys.exit(1)
-            else:
-                #  Featurize data
-                try:
-                    places_pivot = reformat_measures(places_pivot,  **featurize_data["reformat_measures"])
-                    if featurize_data["one_hot_encode"]["states_region"]:
-                        places_pivot = one_hot_encode(places_pivot,
-                                                    states_to_regions = states_region_mapping)
-                    if featurize_data["scale_values"]["columns"]:
-                        # Determine if records should be written to DB
-                        if args.write is False:
-                            SQLALCHEMY_DATABASE_URI = None # Null engine string to avoid writing to DB
-                        else:
-                            if config.SQLALCHEMY_DATABASE_URI is None:
-                                logger.error("Specify SQLALCHEMY_DATABASE_URI environment variable.")
-                                sys.exit(1)
-                            SQLALCHEMY_DATABASE_URI = config.SQLALCHEMY_DATABASE_URI
-                        places_pivot = scale_values(SQLALCHEMY_DATABASE_URI,
-                                                    places_pivot,
-                                                    **featurize_data["scale_values"])
-                except KeyError:
-                    logger.error("Please check your columns. Missing missing column(s) necessary\
-                                  for featurization are missing; exiting.")
-                    sys.exit(1)
-                except TypeError:
-                    logger.error("A non-numeric column has been passed for quantitative transformation; exiting.")
-                    sys.exit(1)
-                else:
-                    # Save to file
-                    try:
-                        upload_file(places_pivot, args.output)
-                    except FileNotFoundError:
-                        logger.error("An invalid file location has been provided; exiting.")
-                        sys.exit(1)
-                    except botocore.exceptions.NoCredentialsError:  # type: ignore
-                        logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
-                        sys.exit(1)
-                    except Exception as e:
-                        logger.error("There was a problem saving to file: %s.", e)
-                        logger.error("The application is exiting.")
-                        sys.exit(1)
+            start, end, intermediates = args.step, args.step, {}
+        try:
+            stages = select_stages(start, end)
+        except ValueError:
+            logger.error("Stages must be in pipeline order; exiting.")
+            sys.exit(1)
 
-    # Train model
-    elif args.step == "train":
-        # Set config
-        if not mdl_config["clean"]:
+        # Check config
+        if not all(mdl_config.get(section) for stage in stages for section in STAGE_CONFIG_SECTIONS[stage]):
             logger.error("Configuration file is missing section for selected step; exiting.")
             sys.exit(1)
-        train_model = mdl_config["train_model"]
 
-        # Import file
+        # Locations of artifacts read by the first stage and produced by the last
+        paths = dict(intermediates)
+        paths[STAGE_INPUTS[stages[0]][0]] = args.input
+        paths[STAGE_OUTPUTS[stages[-1]][0]] = args.output
+        if args.model:
+            paths["model"] = args.model
+        save = set(intermediates) | {STAGE_OUTPUTS[stages[-1]][0]}
+        if "train" in stages and args.model:
+            save.add("model")
+        if args.featurized and "featurized" not in paths:
+            paths["featurized"] = args.featurized
+        if args.transform:
+            paths["transform"] = args.transform
+            if "featurize" in stages:
+                save.add("transform")
+
+        # Determine if records should be written to DB
+        SQLALCHEMY_DATABASE_URI = None # Null engine string to avoid writing to DB
+        if args.write and ("featurize" in stages or "train" in stages):
+            if config.SQLALCHEMY_DATABASE_URI is None:
+                logger.error("Specify SQLALCHEMY_DATABASE_URI environment variable.")
+                sys.exit(1)
+            SQLALCHEMY_DATABASE_URI = config.SQLALCHEMY_DATABASE_URI
+
+        # Reuse artifacts of stages run before on the same input, config and code
+        cache_config = mdl_config.get("cache") or {}
+        cache = None
+        if (args.cache or cache_config.get("enabled")) and not args.no_cache:
+            cache = StageCache(cache_config["dir"])
+
+        # Measure time and memory of stages and the functions they call
+        profile_config = mdl_config.get("profile") or {}
+        profiler = None
+        if args.profile or profile_config.get("enabled"):
+            profiler = Profiler(trace_memory = profile_config.get("trace_memory", True),
+                                pstats_path = profile_config.get("pstats"))
+
         try:
-            places_df = import_file(args.input,
-                                    train_model["features"] + [train_model["response"]])
+            with profiler or contextlib.nullcontext():
+                run_pipeline(mdl_config,
+                             start = stages[0],
+                             end = stages[-1],
+                             paths = paths,
+                             save = save,
+                             engine_string = SQLALCHEMY_DATABASE_URI,
+                             file_format = file_format,
+                             cache = cache)
         except botocore.exceptions.NoCredentialsError:  # type: ignore
             logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
             sys.exit(1)
@@ -280,166 +286,57 @@ if __name__ == "__main__":
             logger.error("An invalid file location has been provided; exiting.")
             sys.exit(1)
         except KeyError:
-            logger.error("A desired column is missing from the file; exiting.")
+            logger.error("Required or provided column(s) are missing from the file or dataframe; exiting.")
             sys.exit(1)
-        except Exception as e:
-            logger.error("There was a problem importing the file: %s.", e)
-            logger.error("The application is exiting.")
+        except TypeError:
+            logger.error("A column data type mismatch or invalid parameter type has occurred; exiting.")
             sys.exit(1)
-        else:
-            # Validate data
-            try:
-                validate_df(places_df, **train_model["validate_df"])
-            except ValueError:
-                logger.error(
-                    "Dataframe has no records, duplicate records, or contains null values; exiting.")
-                sys.exit(1)
-            except KeyError:
-                logger.error("A desired column is missing from the file; exiting.")
-                sys.exit(1)
-            except TypeError:
-                logger.error("A column data type mismatch has occurred; exiting.")
-                sys.exit(1)
-            else:
-                try:
-                    # Split into train-test and save file
-                    combined_df = split_data(places_df, **mdl_config["train_test_split"])
-                    upload_file(combined_df, args.output) # Save train-test dataframe
-                except TypeError:
-                    logger.error("test_size must be a float and random_state an integer; exiting")
-                    sys.exit(1)
-                except ValueError:
-                    logger.error("Value of test_size must be between 0 and 1; exiting")
-                    sys.exit(1)
-                except FileNotFoundError:
-                    logger.error("An invalid file location has been provided; exiting.")
-                    sys.exit(1)
-                except botocore.exceptions.NoCredentialsError:  # type: ignore
-                    logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
-                    sys.exit(1)
-                except Exception as e:
-                    logger.error("There was a problem saving to file: %s.", e)
-                    logger.error("The application is exiting.")
-                    sys.exit(1)
-                else:
-                    # Train model, add params to DB, save trained model object
-                    try:
-                        training_set = combined_df.loc[combined_df.training == 1].copy()
-                        params, model = fit_model(training_set,
-                                                  features = train_model["features"],
-                                                  response = train_model["response"],
-                                                  method = train_model["method"],
-                                                  **train_model["params"])
-                        # Determine if records should be written to DB
-                        if args.write:
-                            # Capture correct RDS
-                            if config.SQLALCHEMY_DATABASE_URI is None:
-                                logger.error("Specify SQLALCHEMY_DATABASE_URI environment variable.")
-                                sys.exit(1)
-                            else:
-                                add_params(config.SQLALCHEMY_DATABASE_URI, params)
-                        else:
-                            logger.warning("Model coefficients not recorded in database.")
-                        dump_model(model,args.model)
-                    except TypeError:
-                        logger.error("Passed params and columns must be valid for \
-                                      sklearn.linear_model.LinearRegression; exiting.")
-                        sys.exit(1)
-                    except ValueError:
-                        logger.error("Features should be 2D and target 1D values; exiting.")
-                        sys.exit(1)
-                    except KeyError:
-                        logger.error("Required or entered columns are missing from dataframe; exiting.")
-                        sys.exit(1)
-                    except sqlalchemy.exc.OperationalError:
-                        logger.error("A connection error has occurred. Unable to update database.")
-                        sys.exit(1)
-                    except sqlalchemy.exc.IntegrityError:
-                        logger.error("A primary key violation has occurred. Please ensure table is empty.")
-                        sys.exit(1)
-                    except FileNotFoundError:
-                        logger.error("An invalid file location has been provided; exiting.")
-                        sys.exit(1)
-                    except Exception as e:
-                        logger.error("There was a problem during model training and capturing: %s.", e)
-                        logger.error("The application is exiting.")
-                        sys.exit(1)
-
-    # Score model
-    elif args.step == "score":
-        # Check config
-        if not mdl_config["score"] and mdl_config["train_model"]:
-            logger.error("Configuration file is missing section for selected step; exiting.")
-            sys.exit(1)
-
-        # Import model and data file
-        try:
-            model = import_model(args.model)
-            combined_df = import_file(args.input)
-        except botocore.exceptions.NoCredentialsError:  # type: ignore
-            logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
+        except ValueError:
+            logger.error("Data has no records, duplicate records, null values, or invalid values; exiting.")
             sys.exit(1)
-        except FileNotFoundError:
-            logger.error("An invalid file location has been provided; exiting.")
+        except sqlalchemy.exc.OperationalError:
+            logger.error("A connection error has occurred. Unable to update database.")
             sys.exit(1)
-        except KeyError:
-            logger.error("A desired column is missing from the file; exiting.")
+        except sqlalchemy.exc.IntegrityError:
+            logger.error("A primary key violation has occurred. Please ensure table is empty.")
             sys.exit(1)
         except Exception as e:
-            logger.error("There was a problem importing the file: %s.", e)
+            logger.error("There was a problem running the pipeline: %s.", e)
             logger.error("The application is exiting.")
             sys.exit(1)
-        else:
-            # Validate data
-            try:
-                validate_df(combined_df, **mdl_config["score"]["validate_df"])
-            except ValueError:
-                logger.error(
-                    "Dataframe has no records, duplicate records, or contains null values; exiting.")
-                sys.exit(1)
-            except KeyError:
-                logger.error("A desired column is missing from the file; exiting.")
-                sys.exit(1)
-            except TypeError:
-                logger.error("A column data type mismatch has occurred; exiting.")
-                sys.exit(1)
-            else:
-                # Generate predictions and save
-                try:
-                    test_df = combined_df.loc[combined_df.training == 0].copy()
-                    # Generate predictions
-                    test_df = pred_responses(model,
-                                            test_df,
-                                            mdl_config["train_model"]["features"])
-                    upload_file(test_df, args.output) # Save test predictions dataframe
-
-                except ValueError:
-                    logger.error("X_test should be 2D of feature values; exiting.")
-                    sys.exit(1)
-                except KeyError:
-                    logger.error("The provided columns could not be found in the dataframe; exiting.")
-                    sys.exit(1)
-                except FileNotFoundError:
-                    logger.error("An invalid file location has been provided; exiting.")
-                    sys.exit(1)
-                except botocore.exceptions.NoCredentialsError:  # type: ignore
-                    logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
-                    sys.exit(1)
-                except Exception as e:
-                    logger.error("There was a problem saving to file: %s.", e)
-                    logger.error("The application is exiting.")
-                    sys.exit(1)
+        finally:
+            if profiler is not None: # Also reported if a stage fails
+                profiler.write_report(profile_config.get("report") or "profile.json",
+                                      step = args.step, input = args.input)
 
-    # Evaluate performance
-    elif args.step == "evaluate":
-        # Check config
-        if not mdl_config["evaluate"]:
+    # Fit grid of models in parallel and rank them
+    elif args.step == "sweep":
+        if not mdl_config.get("sweep") or not mdl_config.get("train_model"):
             logger.error("Configuration file is missing section for selected step; exiting.")
             sys.exit(1)
-
-        # Import file
+        import botocore.exceptions
+        from src.clean import import_file, validate_df
+        from src.pipeline import model_metadata
+        from src.run_model import dump_model
+        from src.sweep import run_sweep
+        sweep_config = mdl_config["sweep"]
+        train_model = mdl_config["train_model"]
         try:
-            test_df = import_file(args.input)
+            places_df = import_file(args.input, train_model["features"] + [train_model["response"]],
+                                    file_format = file_format)
+            validate_df(places_df, **train_model["validate_df"])
+            leaderboard, best_model = run_sweep(places_df,
+                                                features = train_model["features"],
+                                                response = train_model["response"],
+                                                estimators = sweep_config["estimators"],
+                                                feature_subsets = sweep_config.get("feature_subsets"),
+                                                n_jobs = sweep_config.get("n_jobs"),
+                                                memory_per_job_mb = sweep_config.get("memory_per_job_mb"),
+                                                test_size = mdl_config["train_test_split"]["test_size"],
+                                                random_state = mdl_config["train_test_split"]["random_state"])
+            leaderboard.to_csv(args.output or sweep_config["leaderboard"], index=False)
+            logger.info("Leaderboard saved to %s.", args.output or sweep_config["leaderboard"])
+            dump_model(best_model, args.model or sweep_config["best_model"], metadata=model_metadata(mdl_config))
         except botocore.exceptions.NoCredentialsError:  # type: ignore
             logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
             sys.exit(1)
@@ -447,50 +344,18 @@ if __name__ == "__main__":
             logger.error("An invalid file location has been provided; exiting.")
             sys.exit(1)
         except KeyError:
-            logger.error("A desired column is missing from the file; exiting.")
+            logger.error("Required or provided column(s) are missing from the file or dataframe; exiting.")
+            sys.exit(1)
+        except TypeError:
+            logger.error("A column data type mismatch or invalid parameter type has occurred; exiting.")
+            sys.exit(1)
+        except ValueError:
+            logger.error("Data has no records, duplicate records, null values, or invalid values; exiting.")
             sys.exit(1)
         except Exception as e:
-            logger.error("There was a problem importing the file: %s.", e)
+            logger.error("There was a problem running the sweep: %s.", e)
             logger.error("The application is exiting.")
             sys.exit(1)
-        else:
-            # Validate data
-            try:
-                validate_df(test_df, **mdl_config["evaluate"]["validate_df"])
-            except ValueError:
-                logger.error(
-                    "Dataframe has no records, duplicate records, or contains null values; exiting.")
-                sys.exit(1)
-            except KeyError:
-                logger.error("A desired column is missing from the file; exiting.")
-                sys.exit(1)
-            except TypeError:
-                logger.error("A column data type mismatch has occurred; exiting.")
-                sys.exit(1)
-            else:
-                # Generate performance eval
-                try:
-                    visualize_performance(test_df,
-                                        save_file_path = args.output,
-                                        **mdl_config["evaluate"]["visualize_performance"])
-                except ValueError:
-                    logger.error("There was a datatype mismatch or null value found; exiting.")
-                    sys.exit(1)
-                except KeyError:
-                    logger.error("Test dataframe missing provided columns for prediction or true values; exiting.")
-                    sys.exit(1)
-                except TypeError:
-                    logger.error("A column data type mismatch has occurred; exiting.")
-                    sys.exit(1)
-                except FileNotFoundError:
-                    logger.error("An invalid file location has been provided; exiting.")
-                    sys.exit(1)
-                except botocore.exceptions.NoCredentialsError:  # type: ignore
-                    logger.error("Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials; exiting.")
-                    sys.exit(1)
-                except Exception as e:
-                    logger.error("There was a problem saving to file: %s.", e)
-                    logger.error("The application is exiting.")
-                    sys.exit(1)
+
     else:
         parser.print_help()
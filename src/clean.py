@@ -5,50 +5,147 @@ in preparation of featurization and modeling.
 
 import typing
 import logging
+import collections
+import itertools
+import time
 
+import fsspec
+import numpy as np
 import pandas as pd
-import botocore
-import boto3
+import botocore.exceptions
+
+from src.file_format import infer_file_format
+from src.profiling import profiled
 
 logger = logging.getLogger(__name__)
 
+@profiled
 def import_file(file_path : str,
                 columns : typing.Optional[typing.List[str]] = None,
                 sep : str = ",",
+                file_format : typing.Optional[str] = None,
+                dtypes : typing.Optional[typing.Dict[str, str]] = None,
+                categoricals : typing.Optional[typing.List[str]] = None,
+                downcast : bool = False,
+                chunksize : typing.Optional[int] = None,
                 **kwargs) -> pd.DataFrame:
     """
     Imports CDC PLACES data from provided location.
 
-    Function imports csv data and generates
-    pandas dataframe from entire csv.
-    Pandas dataframe has columns passed through columns parameter.
+    Function imports csv, Parquet or Arrow IPC data, as determined by the
+    file extension (see infer_file_format), and generates pandas dataframe
+    from entire file. Pandas dataframe has columns passed through columns
+    parameter; columnar formats only read those columns from storage.
+
+    To reduce memory, columns can be read with explicit data types, repeated
+    strings stored as categoricals and integer columns downcast to the smallest
+    sufficient type. If chunksize is provided, csv files are read chunksize
+    rows at a time and each chunk is compacted, and rows with null Data_Value
+    dropped, before the next chunk is read.
 
     Args:
         s3path (str) : Url of s3 bucket or location
         columns (list[str], Optional) : Columns of dataframe to include.
                                         Defaults to None.
-        sep (str) : Delimeter character.
+        sep (str) : Delimeter character of csv files.
                     Defaults to "," for csv.
-        kwargs (dict) : Additional parameters of pandas.read_csv.
+        file_format (str, Optional) : "csv", "parquet" or "arrow", regardless of extension.
+                                      Defaults to None.
+        dtypes (dict[str:str], Optional) : Data type of columns, such as validate_df cols.
+                                           Defaults to None, types are inferred.
+        categoricals (list[str], Optional) : Columns to store as categoricals.
+                                             Defaults to None.
+        downcast (bool) : Whether to downcast integer columns. Float columns are not downcast.
+                          Defaults to False.
+        chunksize (int, Optional) : Number of csv rows read at once.
+                                    Defaults to None, the entire file at once.
+        kwargs (dict) : Additional parameters of pandas.read_csv, pandas.read_parquet
+                        or pandas.read_feather.
 
     Returns:
         pandas dataframe: PLACES data
 
     """
 
-    places = pd.DataFrame()
+    places = concat_chunks(list(import_file_chunks(file_path,
+                                                   columns = columns,
+                                                   sep = sep,
+                                                   file_format = file_format,
+                                                   dtypes = dtypes,
+                                                   categoricals = categoricals,
+                                                   downcast = downcast,
+                                                   chunksize = chunksize,
+                                                   **kwargs)))
+    logger.info("Data file successfully imported from %s,\
+                 valid row count is %i.", file_path, places.shape[0])
+
+    return places
+
+def import_file_chunks(file_path : str,
+                       columns : typing.Optional[typing.List[str]] = None,
+                       sep : str = ",",
+                       file_format : typing.Optional[str] = None,
+                       dtypes : typing.Optional[typing.Dict[str, str]] = None,
+                       categoricals : typing.Optional[typing.List[str]] = None,
+                       downcast : bool = False,
+                       chunksize : typing.Optional[int] = None,
+                       **kwargs) -> typing.Iterator[pd.DataFrame]:
+    """
+    Imports CDC PLACES data from provided location one chunk at a time.
+
+    Csv files are read chunksize rows at a time and Parquet files chunksize
+    rows per batch; Arrow IPC files, or any file without a chunksize, are
+    read as a single chunk. Each chunk is compacted (see compact_chunk)
+    before it is yielded, so that the entire file never has to be held
+    in memory when chunks are consumed as they are read.
+
+    Args:
+        See import_file args.
+
+    Yields:
+        pandas dataframe: chunk of PLACES data
+
+    """
+    read_dtypes = dict(dtypes or {})
+    if columns is not None: # Only type columns that are read
+        read_dtypes = {col: dtype for col, dtype in read_dtypes.items() if col in columns}
+    read_dtypes.update({col: "category" for col in categoricals or []
+                        if columns is None or col in columns})
     try:
         logger.info("Importing %s...", file_path)
-        places : pd.DataFrame = pd.read_csv(file_path,
+        file_format = infer_file_format(file_path, file_format)
+        if file_format == "parquet" and chunksize:
+            import pyarrow.parquet as pq # Only required for columnar formats
+            with fsspec.open(file_path, "rb") as file_handle:
+                for batch in pq.ParquetFile(file_handle).iter_batches(batch_size = chunksize,
+                                                                      columns = columns):
+                    yield compact_chunk(batch.to_pandas(), read_dtypes, downcast)
+        elif file_format == "parquet":
+            yield compact_chunk(pd.read_parquet(file_path, columns = columns, **kwargs),
+                                read_dtypes, downcast)
+        elif file_format == "arrow":
+            yield compact_chunk(pd.read_feather(file_path, columns = columns, **kwargs),
+                                read_dtypes, downcast)
+        elif chunksize:
+            for chunk in pd.read_csv(file_path,
+                                     usecols = columns, #type:ignore
+                                     sep = sep,
+                                     dtype = read_dtypes or None,
+                                     chunksize = chunksize,
+                                     **kwargs):
+                yield compact_chunk(chunk, {}, downcast)
+        else:
+            yield compact_chunk(pd.read_csv(file_path,
                                             usecols = columns, #type:ignore
                                             sep = sep,
-                                            **kwargs)
-    except boto3.exceptions.NoCredentialsError as c_err:  # type: ignore
+                                            dtype = read_dtypes or None,
+                                            **kwargs),
+                                {}, downcast)
+    except botocore.exceptions.NoCredentialsError:  # type: ignore
         logger.error(
             "Please provide credentials AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY env variables."
             )
-        raise boto3.exceptions.NoCredentialsError(  # type: ignore
-            "Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials.") from c_err
+        raise
     except FileNotFoundError as f_err:
         logger.error("Please provide a valid file location to import data: %s.", file_path)
         raise FileNotFoundError("Please provide a valid file location\
@@ -62,58 +159,307 @@ def import_file(file_path : str,
     except Exception as e:
         logger.error("Error occurred while trying to import data from file: %s", e)
         raise Exception from e
-    else:
-        if "Data_Value" in places.columns: # Only used for raw data cleaning
-            # Drop row with null data_value
-            places = places.drop(places.loc[places.Data_Value.isna()].index, axis=0)
-        logger.info("Data file successfully imported from %s,\
-                     valid row count is %i.", file_path, places.shape[0])
 
-    return places
+def compact_chunk(chunk : pd.DataFrame,
+                  dtypes : typing.Dict[str, str],
+                  downcast : bool = False) -> pd.DataFrame:
+    """
+    Drops rows with null Data_Value and reduces memory of an imported chunk.
+
+    Args:
+        chunk (pandas dataframe) : Rows imported from file.
+        dtypes (dict[str:str]) : Data types, including "category", to convert columns to.
+        downcast (bool) : Whether to downcast integer columns. Float columns are not downcast.
+                          Defaults to False.
+
+    Returns:
+        pandas dataframe: compacted chunk
+
+    """
+    if "Data_Value" in chunk.columns: # Only used for raw data cleaning
+        # Drop row with null data_value
+        chunk = chunk.loc[chunk["Data_Value"].notna()]
+    chunk = chunk.astype({col: dtype for col, dtype in dtypes.items()
+                          if col in chunk.columns and chunk[col].dtype != dtype})
+    if downcast: # Floats such as Data_Value keep their precision; float32 would change measure values
+        for col in chunk.select_dtypes(include="integer").columns:
+            chunk[col] = pd.to_numeric(chunk[col], downcast="integer")
+    return chunk
+
+def concat_chunks(chunks : typing.List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates imported chunks, keeping categorical columns categorical.
+
+    Chunks may hold different categories for the same column; these are
+    unioned so the concatenated column remains categorical.
+
+    Args:
+        chunks (list[pandas dataframe]) : Chunks imported from file. See compact_chunk.
+
+    Returns:
+        pandas dataframe: concatenated chunks
 
+    """
+    if len(chunks) == 0:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    for col in chunks[0].select_dtypes(include="category").columns:
+        categories = pd.api.types.union_categoricals([chunk[col] for chunk in chunks],
+                                                     sort_categories=True).categories
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, axis=0)
+
+@profiled
 def validate_df(df : pd.DataFrame,
-                cols : typing.Dict[str,str]) -> None:
+                cols : typing.Dict[str,str],
+                keys : typing.Optional[typing.List[str]] = None,
+                sample_size : typing.Optional[int] = None,
+                random_state : typing.Optional[int] = None) -> typing.Dict[str, float]:
     """
     Valides that dataframe has required columns and that columns are of
     the provided data types.
 
-    Function will also ensure passed dataframe has length greater than 0.
+    Function will also ensure passed dataframe has length greater than 0,
+    that the provided columns have no null values and that there are no
+    duplicate records. Duplicates are identified by the keys columns, or by
+    every column if no keys are provided. Each check is a single vectorized
+    pass over the dataframe, and all violations are logged before an error
+    is raised.
+
+    For fast pre-flight checks of large dataframes, sample_size rows can be
+    drawn at random and validated instead; a clean sample does not guarantee
+    the entire dataframe is free of nulls or duplicates.
 
     Args:
         df (pandas dataframe) : Dataframe to validate.
         cols (dict[str:str]) : Dictionary with key of column name and
                                value of column type.
+        keys (list[str], Optional) : Columns identifying a unique record.
+                                     Defaults to None, every column.
+        sample_size (int, Optional) : Number of rows to validate.
+                                      Defaults to None, every row.
+        random_state (int, Optional) : Seed of sampled rows. Defaults to None.
+
+    Returns:
+        dict[str:float]: seconds taken by each check
+
+    """
+    timings : typing.Dict[str, float] = {}
+    violations : typing.Dict[typing.Type[Exception], typing.List[str]] = {KeyError: [],
+                                                                          TypeError: [],
+                                                                          ValueError: []}
+
+    if sample_size is not None and len(df) > sample_size:
+        logger.info("Validating a sample of %i of %i records.", sample_size, len(df))
+        df = df.sample(n=sample_size, random_state=random_state)
+
+    # Schema check only inspects column metadata
+    start = time.perf_counter()
+    missing_cols = [col for col in list(cols) + list(keys or []) if col not in df.columns]
+    for col in missing_cols: # Missing column
+        violations[KeyError].append(f"Required column {col} not present in dataframe.")
+    present_cols = [col for col in cols if col in df.columns]
+    for col in present_cols:
+        if not matches_dtype(df[col], cols[col]): # Column doesn't match provided data types
+            violations[TypeError].append(f"Column {col} does not match data type {cols[col]}.")
+    timings["schema"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if len(df) == 0: # Cannot be 0 length
+        violations[ValueError].append("The dataframe has no records.")
+    null_counts = df[present_cols].isna().sum()
+    for col, null_count in null_counts[null_counts > 0].items():
+        violations[ValueError].append(f"Column {col} contains {null_count} null values.")
+    timings["nulls"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if not set(keys or []) & set(missing_cols):
+        duplicate_count = int(df.duplicated(subset=keys).sum())
+        if duplicate_count > 0: # Cannot have duplicate records
+            violations[ValueError].append(f"The dataframe has {duplicate_count} duplicate records.")
+    timings["duplicates"] = time.perf_counter() - start
+
+    for message in itertools.chain.from_iterable(violations.values()):
+        logger.error(message)
+    for error_type, messages in violations.items(): # Raise most fundamental violation type
+        if messages:
+            raise error_type(" ".join(messages))
+    logger.debug("Dataframe validated in %s seconds.", timings)
+
+    return timings
+
+def validate_chunks(chunks : typing.Iterable[pd.DataFrame],
+                    **kwargs) -> typing.Iterator[pd.DataFrame]:
+    """
+    Validates chunks of a dataframe as they are read.
+
+    Each chunk is validated by validate_df before it is yielded. Duplicate
+    keys spanning chunks are not detected here; pivot_measures rejects them.
+
+    Args:
+        chunks (iterable[dataframe]) : Chunks to validate. See import_file_chunks yield.
+        kwargs (dict) : Parameters of validate_df, such as cols and keys.
+
+    Yields:
+        pandas dataframe: validated chunk
+
+    """
+    timings : typing.Dict[str, float] = collections.Counter()
+    chunk_count = 0
+    for chunk in chunks:
+        timings.update(validate_df(chunk, **kwargs))
+        chunk_count += 1
+        yield chunk
+    if chunk_count == 0: # Cannot be 0 length
+        logger.error("The dataframe has no records.")
+        raise ValueError("The dataframe has no records.")
+    logger.debug("%i chunks validated in %s seconds.", chunk_count, dict(timings))
+
+def matches_dtype(column : pd.Series, dtype : str) -> bool:
+    """
+    Checks whether a column holds values of the provided data type.
+
+    Columns compacted by import_file still match their declared type: integer
+    and float columns of any width match "int" and "float", and categorical
+    columns match the type of their categories.
+
+    Args:
+        column (pandas series) : Column to check.
+        dtype (str) : Data type such as "object", "int" or "float".
 
     Returns:
-        None
+        bool: whether column matches data type
+
+    """
+    col_dtype = column.dtype
+    if isinstance(col_dtype, pd.CategoricalDtype):
+        col_dtype = col_dtype.categories.dtype
+    if col_dtype == dtype:
+        return True
+    expected_kind = np.dtype(dtype).kind
+    if expected_kind in "iu": # Any width of signed or unsigned integer
+        return col_dtype.kind in "iu"
+    return col_dtype.kind == expected_kind
+
+# Descriptive columns of a location, kept once per LocationID by the pivot
+LOCATION_COLUMNS = ["StateDesc", "CountyName", "CountyFIPS",
+                    "LocationID", "TotalPopulation", "Geolocation"]
+
+def lexical_order(col : pd.Series) -> pd.Series:
+    """Returns categorical column with categories in order of their values, so it sorts as its values would."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col.cat.reorder_categories(sorted(col.cat.categories), ordered=True)
+    return col
+
+class MeasurePivot:
     """
+    Transposes PLACES data from row-wise measures to column-wise, one chunk at a time.
 
-    if len(df) == 0 or sum(df.duplicated())>0: # Cannot be 0 length or have duplicate rows
-        logger.error("The dataframe has no records or duplicate records.")
-        raise ValueError("The dataframe has no records or duplicate records.")
+    Each location is assigned a row by its integer LocationID and each measure a
+    column by its MeasureId, and Data_Value is scattered into a preallocated
+    float array that grows as new locations and measures are added. Descriptive
+    columns are kept once per location and joined back to the measures when the
+    pivot is built, so the long-form data never has to be held in memory.
 
-    for col, dtype in cols.items():
-        try:
-            if not df[col].dtype == dtype: # Column doesn't match provided data types
-                logger.error("Column %s does not match data type %s.",col, dtype)
-                raise TypeError("A column data type mismatch has occurred.")
-            if sum(df[col].isna())>0:
-                logger.error("Column %s contains null values.", col)
-                raise ValueError("A column has null values.")
-        except KeyError as missing_col: # Missing column
-            logger.error("Required column %s type not present in dataframe.", col)
-            raise KeyError ("Please ensure provided columns are present.") from missing_col
+    Args:
+        capacity (int) : Number of locations to preallocate rows for.
+                         Defaults to 4096.
+    """
 
-def pivot_measures (places_df : pd.DataFrame) -> pd.DataFrame:
+    def __init__(self, capacity : int = 4096):
+        self.locations = pd.Index([], dtype="int64")
+        self.measures = pd.Index([], dtype="object")
+        self.values = np.full((capacity, 0), np.nan, dtype=np.float32)
+        self.filled = np.zeros((capacity, 0), dtype=bool)
+        self.descriptions : typing.List[pd.DataFrame] = []
+
+    def _reserve(self, n_rows : int, n_cols : int) -> None:
+        """Grows the value arrays to hold at least n_rows locations and n_cols measures."""
+        rows, cols = self.values.shape
+        if n_rows <= rows and n_cols <= cols:
+            return
+        if n_rows > rows: # Double rows to amortize copies
+            rows = max(n_rows, 2 * rows)
+        values = np.full((rows, max(n_cols, cols)), np.nan, dtype=self.values.dtype)
+        filled = np.zeros(values.shape, dtype=bool)
+        values[:self.values.shape[0], :self.values.shape[1]] = self.values
+        filled[:self.filled.shape[0], :self.filled.shape[1]] = self.filled
+        self.values, self.filled = values, filled
+
+    def add(self, places_df : pd.DataFrame) -> "MeasurePivot":
+        """
+        Scatters measure values of a chunk of PLACES data into the pivot.
+
+        Args:
+            places_df (dataframe) : Chunk of PLACES data. See import_file_chunks yield.
+
+        Returns:
+            MeasurePivot: pivot with chunk added
+        """
+        if not pd.api.types.is_numeric_dtype(places_df["Data_Value"]):
+            raise TypeError("Column Data_Value must be numeric.")
+        data_values = places_df["Data_Value"].to_numpy()
+        if self.values.dtype != np.result_type(self.values.dtype, data_values.dtype):
+            # Keep precision of values, e.g. float64 of any chunk
+            self.values = self.values.astype(np.result_type(self.values.dtype, data_values.dtype))
+        location_ids = places_df["LocationID"].to_numpy(dtype="int64")
+        measure_codes, measure_ids = pd.factorize(places_df["MeasureId"])
+
+        # Keep descriptive columns of first occurence of new locations
+        rows = self.locations.get_indexer(location_ids)
+        new_locations = (rows == -1) & ~pd.Index(location_ids).duplicated()
+        if new_locations.any():
+            self.descriptions.append(places_df.loc[new_locations, LOCATION_COLUMNS])
+            self.locations = self.locations.append(pd.Index(location_ids[new_locations]))
+            rows = self.locations.get_indexer(location_ids)
+        measure_ids = pd.Index(np.asarray(measure_ids, dtype=object))
+        new_measures = measure_ids[self.measures.get_indexer(measure_ids) == -1]
+        self.measures = self.measures.append(new_measures)
+        cols = self.measures.get_indexer(measure_ids)[measure_codes]
+
+        self._reserve(len(self.locations), len(self.measures))
+        filled_count = np.count_nonzero(self.filled)
+        self.filled[rows, cols] = True
+        if np.count_nonzero(self.filled) - filled_count != len(rows): # Cell already or repeatedly filled
+            raise ValueError("Index contains duplicate entries, cannot reshape")
+        self.values[rows, cols] = data_values
+
+        return self
+
+    def build(self) -> pd.DataFrame:
+        """
+        Joins descriptive columns to measure values of every location added.
+
+        Rows are ordered by descriptive columns and measures by name, as pandas.pivot does.
+
+        Returns:
+            pandas dataframe: PLACES dataframe pivoted to one row per county
+        """
+        locations = concat_chunks(self.descriptions).reset_index(drop=True)
+        measure_order = np.argsort(self.measures.to_numpy())
+        measures = pd.DataFrame(self.values[:len(self.locations), measure_order],
+                                columns = self.measures[measure_order])
+        # Categories sort in order of their categories, so are sorted by their values as strings would be
+        places_pivot = pd.concat([locations, measures], axis=1) \
+            .sort_values(LOCATION_COLUMNS[:4], kind="stable", key=lexical_order) \
+            .reset_index(drop=True)
+
+        return places_pivot
+
+def pivot_measures (places_df : typing.Union[pd.DataFrame, typing.Iterable[pd.DataFrame]]) -> pd.DataFrame:
     """
     Transposes dataframe of PLACES data from row-wise measures to column-wise.
 
     Function produces a dataframe of one row per county with columns containing
-    the value of measures.
+    the value of measures. PLACES data can be passed as chunks, such as those
+    yielded by import_file_chunks, which are pivoted as they are read.
 
     Args:
-        places_df (dataframe) : Dataframe from PLACES csv import.
-                                See import_places return.
+        places_df (dataframe or iterable[dataframe]) : Dataframe from PLACES csv import,
+                                                       or chunks of it.
+                                                       See import_file return.
 
     Returns:
         pandas dataframe: PLACES dataframe pivoted to one row per county
@@ -121,12 +467,12 @@ def pivot_measures (places_df : pd.DataFrame) -> pd.DataFrame:
     """
 
     places_pivot = pd.DataFrame()
+    chunks = [places_df] if isinstance(places_df, pd.DataFrame) else places_df
     try:
-        places_pivot = pd.pivot(places_df,
-                                index = ["StateDesc", "CountyName", "CountyFIPS",
-                                        "LocationID", "TotalPopulation", "Geolocation"],
-                                columns = "MeasureId",
-                                values = "Data_Value").reset_index()
+        pivot = MeasurePivot()
+        for chunk in chunks:
+            pivot.add(chunk)
+        places_pivot = pivot.build()
     except TypeError as t_err:
         logger.error("Column Data_Value must be numeric.")
         raise TypeError("Column Data_Value must be numeric.") from t_err
@@ -138,10 +484,8 @@ def pivot_measures (places_df : pd.DataFrame) -> pd.DataFrame:
         logger.error("Please confirm columns StateDesc, CountyName, CountyFIPS, LocationID,\
                         TotalPopulation, Geolocation, MeasureId, Data_Value are present.")
         raise KeyError("Provided column not found in dataframe.") from k_err
-    else:
-        places_pivot = places_pivot.rename_axis(None, axis=1)
 
-    return places_pivot  # type: ignore
+    return places_pivot
 
 def drop_null_responses(places_pivot : pd.DataFrame,
                         response : str) -> pd.DataFrame:
@@ -161,12 +505,8 @@ def drop_null_responses(places_pivot : pd.DataFrame,
 
     initial_count = places_pivot.shape[0]
     try:
-        places_pivot.dropna(subset = [response],
-                            inplace=True,
-                            axis=0)
+        places_pivot = places_pivot.loc[places_pivot[response].notna()]
         new_count = places_pivot.shape[0]
-
-        places_pivot.drop(places_pivot.loc[places_pivot[response].isnull()].index, axis=0, inplace=True)
     except KeyError as k_err:
         logger.error("Column passed as response could not be found.")
         raise KeyError("Provided column not found in dataframe.") from k_err
@@ -178,7 +518,6 @@ def drop_null_responses(places_pivot : pd.DataFrame,
 
     return places_pivot
 
-
 def drop_invalid_measures(places_pivot : pd.DataFrame,
                           invalid_measures : typing.List[str]) -> pd.DataFrame:
 
@@ -213,18 +552,21 @@ def drop_invalid_measures(places_pivot : pd.DataFrame,
 
     return places_pivot
 
-def prep_data(places_df : pd.DataFrame,
+@profiled
+def prep_data(places_df : typing.Union[pd.DataFrame, typing.Iterable[pd.DataFrame]],
               response : str,
               invalid_measures : typing.List[str]) -> pd.DataFrame:
     """
     Helper function that conducts data cleaning of PLACES data.
 
-    Function pivots to create one row per
-    county, and removes null resopnses and invalid measures.
+    Function removes rows of invalid measures, pivots to create one row per
+    county, and removes null responses. Invalid measures are removed before
+    the pivot so that they are never pivoted.
 
     Args:
-        places_df (dataframe) : Dataframe from PLACES csv import.
-                                See import_file return.
+        places_df (dataframe or iterable[dataframe]) : Dataframe from PLACES csv import,
+                                                       or chunks of it.
+                                                       See import_file return.
         response (str) : Column to be used as response variable.
                          Rows with null values in this column will be removed.
         invalid_measures (list[str]) : Measure column names to be dropped.
@@ -234,10 +576,11 @@ def prep_data(places_df : pd.DataFrame,
 
     """
     places_pivot = pd.DataFrame()
+    chunks = [places_df] if isinstance(places_df, pd.DataFrame) else places_df
     try:
-        places_pivot = pivot_measures(places_df) # Make one county per row
-        places_pivot = drop_null_responses(places_pivot, response)
-        places_pivot = drop_invalid_measures(places_pivot, invalid_measures)
+        valid_chunks = (chunk.loc[~chunk["MeasureId"].isin(invalid_measures)] for chunk in chunks)
+        places_pivot = pivot_measures(valid_chunks) # Make one county per row
+        places_pivot = drop_null_responses(places_pivot, response).reset_index(drop=True)
     except KeyError as k_err:
         logger.error("Columns passed for transformation could not be found.")
         raise KeyError("Columns passed for transformation could not be found.") from k_err
@@ -11,6 +11,8 @@ import matplotlib.pyplot as plt
 import pandas as pd
 from sklearn.metrics import mean_squared_error
 
+from src.profiling import profiled
+
 logger = logging.getLogger(__name__)
 
 def capture_rmse(test_df : pd.DataFrame,
@@ -60,6 +62,7 @@ def capture_rmse(test_df : pd.DataFrame,
         return rmse
 
 
+@profiled
 def visualize_performance(test_df : pd.DataFrame,
                           save_file_path : str,
                           rmse : bool = True,
@@ -4,48 +4,58 @@ Module uses clean data, and conducts minor featurization in preparation of model
 
 import typing
 import logging
+import itertools
+import json
+import uuid
 
+import fsspec
 import pandas as pd
 import numpy as np
-import sqlalchemy as sql
+import botocore.exceptions
 import sqlalchemy.exc
-import sqlalchemy.orm
-from sqlalchemy.ext.declarative import declarative_base
 
-from src.models import scalerRanges
+from src.models import scalerRanges, get_engine, upgrade_db
+from src.profiling import profiled
 
 logger = logging.getLogger(__name__)
 
-def create_range(engine : sql.engine.base.Engine,
-                 valuename : str,
-                 max_val : float,
-                 min_val : float) -> None:
+def add_ranges(engine_string : str,
+               ranges : typing.Dict[str, typing.Tuple[float, float]],
+               run_id : typing.Optional[str] = None) -> str:
     """
-    Adds min-max values of features for scaling.
+    Populates scaler_ranges table with the min and max values of every field scaled
+    by a featurize run, in one transaction.
+
+    Rows are keyed on field name and run id; rows already recorded for the run are
+    replaced, so re-recording a run does not duplicate it. A database created
+    without the run_id column is upgraded first. See upgrade_db.
 
     Args:
-        engine (sql.engine.base.Engine) : SQL Alchemy engine object.
-        valuename (str) : Field name being scaled.
-        max (float) : Maximum value of field.
-        min (float) : Minimum value of field.
+        engine_string (str) : SQL Alchemy database URI path.
+        ranges (dict[str:tuple]) : (min, max) value of each field being scaled, by field name.
+        run_id (str, Optional) : Identifier of featurize run. Defaults to None, a new
+                                 identifier is generated.
 
     Returns:
-        None
+        str: run id the ranges were recorded under
 
     """
-
-    Base = declarative_base()
-
-    # create a db session
-    Session : sqlalchemy.orm.session.sessionmaker = sqlalchemy.orm.sessionmaker(bind=engine)
-    session : sqlalchemy.orm.session.Session = Session()
-
-    sc_range = scalerRanges(valuename = valuename,
-                            max_value = max_val,
-                            min_value = min_val)
-    session.add(sc_range)
-    session.commit()
-    logger.info("Scaling range added to database.")
+    run_id = run_id or uuid.uuid4().hex
+    rows = [{"valuename": valuename, "min_value": float(min_val), "max_value": float(max_val),
+             "run_id": run_id} for valuename, (min_val, max_val) in ranges.items()]
+    table = scalerRanges.__table__
+    try:
+        upgrade_db(engine_string) # Databases created before run_id was recorded lack its column
+        with get_engine(engine_string).begin() as connection: # Commits once, or rolls back
+            connection.execute(table.delete().where(table.c.run_id == run_id)
+                                             .where(table.c.valuename.in_(list(ranges))))
+            if rows:
+                connection.execute(table.insert(), rows) # Bulk insert of all rows
+    except sqlalchemy.exc.OperationalError as e:
+        logger.error("Could not connect to database!")
+        raise e
+    logger.info("%d scaling ranges added to database for run %s.", len(rows), run_id)
+    return run_id
 
 def add_range(engine_string : str,
               valuename : str,
@@ -53,7 +63,7 @@ def add_range(engine_string : str,
               min_val : float) -> None:
     """
     Populates rangeScaler table with field
-    min and max value(s).
+    min and max value(s). See add_ranges to record several fields at once.
 
     Args:
         engine_string (str) : SQL Alchemy database URI path.
@@ -65,30 +75,18 @@ def add_range(engine_string : str,
         None
 
     """
-    engine : sql.engine.base.Engine = sql.create_engine(engine_string)
-
-    # test database connection
-    try:
-        engine.connect()
-    except sqlalchemy.exc.OperationalError as e:
-        logger.error("Could not connect to database!")
-        logger.debug("Database URI: %s", )
-        raise e
-
-    # add range row to table
-    create_range(engine,
-                 valuename,
-                 max_val,
-                 min_val)
+    add_ranges(engine_string, {valuename: (min_val, max_val)})
 
+@profiled
 def scale_values(engine_string : typing.Union[str, None],
                  places_pivot : pd.DataFrame,
-                 columns : typing.Union[str, typing.List[str]]) -> pd.DataFrame:
+                 columns : typing.Union[str, typing.List[str]],
+                 run_id : typing.Optional[str] = None) -> pd.DataFrame:
     """
     Scales columns using min-max scaling.
 
     Min-max scales columns to a range of [0,1]. Min and max values are added, with
-    column name as reference, to scaler_ranges table.
+    column name and run id as reference, to scaler_ranges table in one transaction.
 
     Args:
         engine_string (str, Optional) : SQL Alchemy database URI path.
@@ -97,6 +95,8 @@ def scale_values(engine_string : typing.Union[str, None],
         places_pivot (dataframe) : Pivoted dataframe of PLACES data.
                                    See pivot_places return.
         min_max_scale (str) : Field name(s) to scale to [0,1] using min-max scaling.
+        run_id (str, Optional) : Identifier of featurize run to record ranges under.
+                                 Defaults to None, a new identifier is generated.
 
     Returns:
         pandas dataframe: PLACES dataframe with reformatted column measures
@@ -106,17 +106,16 @@ def scale_values(engine_string : typing.Union[str, None],
     if isinstance(columns, str): # Create iterable of columns if only one passed
         columns = [columns]
     try:
+        ranges = {}
         for col in columns:
             min_value = places_pivot[col].min()
             max_value = places_pivot[col].max()
             places_pivot["scaled_" + col] = (places_pivot[col]-min_value) / (max_value - min_value)
-            if engine_string is not None: # Don't write to DB is no engine string passed
-                add_range(engine_string,
-                          col,
-                          min_value,
-                          max_value)
-            else:
-                logger.warning("Scaling params not recorded in database.")
+            ranges[col] = (min_value, max_value)
+        if engine_string is not None: # Don't write to DB is no engine string passed
+            add_ranges(engine_string, ranges, run_id)
+        else:
+            logger.warning("Scaling params not recorded in database.")
     except KeyError as k_err:
         logger.error("Columns passed for transformation could not be found.")
         raise KeyError("Columns passed for transformation could not be found.") from k_err
@@ -125,6 +124,7 @@ def scale_values(engine_string : typing.Union[str, None],
         raise TypeError("Columns passed for transformation must be numeric.") from v_err
     return places_pivot
 
+@profiled
 def reformat_measures(places_pivot : pd.DataFrame,
                       make_floats : typing.List[str],
                       make_logit : typing.Optional[str]
@@ -161,13 +161,94 @@ def reformat_measures(places_pivot : pd.DataFrame,
 
     return places_pivot
 
+class RegionEncoder:
+    """
+    Encodes states as integer region codes and 1/0 region dummy columns.
+
+    The region of every state is looked up once, as an integer, when the encoder
+    is created. States are then encoded by their category codes, taken from a
+    categorical column or factorized once, so no string is compared per row, and
+    dummies are written as int8 into a preallocated block.
+
+    Args:
+        states_to_regions (dict[str,str]) : Key[str] is state name. Value[str] is region name.
+        regions (list[str], Optional) : Regions in order of their codes. Defaults to None,
+                                        the sorted regions of states_to_regions.
+        dropped_region (str) : Region omitted from dummies to avoid perfect multicollinearity.
+    """
+
+    def __init__(self,
+                 states_to_regions : typing.Dict[str, str],
+                 regions : typing.Optional[typing.List[str]] = None,
+                 dropped_region : str = "West"):
+        self.regions = pd.Index(sorted(set(states_to_regions.values())) if regions is None else regions)
+        if dropped_region not in self.regions:
+            logger.error("No state of region %s exists to drop.", dropped_region)
+            raise KeyError(f"No state of region {dropped_region} exists to drop.")
+        self.dummy_regions = self.regions.drop(dropped_region)
+        self.states = pd.Index(list(states_to_regions))
+        # Region code of each state, and dummy column of each region code; -1 if none
+        self._state_codes = self.regions.get_indexer(list(states_to_regions.values())).astype(np.int8)
+        self._dummy_columns = np.append(self.dummy_regions.get_indexer(self.regions), -1).astype(np.int8)
+
+    def encode(self, states : pd.Series) -> np.ndarray:
+        """
+        Returns region code of each state, or -1 for states of no known region.
+
+        Args:
+            states (series) : State names, as strings or categories.
+
+        Returns:
+            numpy array: int8 region codes, indexing regions
+        """
+        if isinstance(states.dtype, pd.CategoricalDtype):
+            category_codes, categories = states.cat.codes.to_numpy(), states.cat.categories
+        else:
+            category_codes, categories = pd.factorize(states)
+        positions = self.states.get_indexer(categories)
+        # Region code of each category, followed by -1 for missing states (category code -1)
+        lookup = np.append(np.where(positions >= 0, self._state_codes[positions], -1), -1).astype(np.int8)
+        return lookup[category_codes]
+
+    def encode_regions(self, regions : pd.Series) -> np.ndarray:
+        """Returns code of each region name, or -1 for unknown regions. See encode."""
+        return self.regions.get_indexer(regions).astype(np.int8)
+
+    def dummies(self, codes : np.ndarray, out : typing.Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Writes 1/0 dummy columns of region codes.
+
+        Args:
+            codes (numpy array) : Region codes. See encode.
+            out (numpy array, Optional) : Zeroed block of len(codes) rows and one column per
+                                          dummy region to write to. Defaults to None, a new
+                                          column-major int8 block.
+
+        Returns:
+            numpy array: dummy block, with columns in order of dummy_regions
+        """
+        if out is None:
+            out = np.zeros((len(codes), len(self.dummy_regions)), dtype=np.int8, order="F")
+        columns = self._dummy_columns[codes]
+        rows = np.flatnonzero(columns >= 0)
+        out[rows, columns[rows]] = 1
+        return out
+
+    def frame(self, codes : np.ndarray, index : pd.Index) -> pd.DataFrame:
+        """Returns region column and dummy columns of region codes as a dataframe. See dummies."""
+        return pd.concat([pd.DataFrame({"region": pd.Categorical.from_codes(codes, self.regions)}, index=index),
+                          pd.DataFrame(self.dummies(codes), index=index, columns=self.dummy_regions, copy=False)],
+                         axis=1, copy=False)
+
+@profiled
 def one_hot_encode(places_pivot : pd.DataFrame,
                    states_to_regions : typing.Dict[str, str]) -> pd.DataFrame:
     """
     Adds 1/0 dummy columns corresponding to each state"s region.
 
-    Adds "Northwest", "Southwest", "Northeast", "Midwest" binary
+    Adds "Northwest", "Southwest", "Northeast", "Midwest" int8 binary
     columns to dataframe. "West" is omitted to avoid perfect multicollinearity.
+    See RegionEncoder.
 
     Args:
         places_pivot (dataframe) : Pivoted dataframe of PLACES data.
@@ -180,14 +261,312 @@ def one_hot_encode(places_pivot : pd.DataFrame,
 
     """
 
+    encoder = RegionEncoder(states_to_regions)
     try:
-        places_pivot["region"] = places_pivot["StateDesc"].map(states_to_regions)
-        if sum(places_pivot["region"].isna()) > 0:
+        codes = encoder.encode(places_pivot["StateDesc"])
+        if (codes == -1).any():
             logger.warning("Unmapped state names exist.")
     except KeyError as k_err:
         logger.error("Column(s) region or StateDesc are missing from dataframe.")
         raise KeyError("Column(s) region or StateDesc are missing from dataframe.") from k_err
-    else:
     # Create 1/0 encoded categorical variables for regions, dropping West
-        places_pivot = places_pivot.join(pd.get_dummies(places_pivot["region"], dtype=int).drop("West", axis=1))
-    return places_pivot
+    return places_pivot.drop(columns="region", errors="ignore").join(encoder.frame(codes, places_pivot.index))
+
+class FeatureTransform:
+    """
+    Parameters of the transforms that turn clean PLACES data into model features.
+
+    Fitted once on the data a model is trained on, then applied, in the same way,
+    to that data, to new data scored in batch, and to input of the web app, so
+    features are never computed differently between training and serving. Saved
+    as a small json file.
+
+    Args:
+        make_floats (list[str]) : PLACES measure names to reformat to [0,1] proportions.
+        make_logit (str, Optional) : Field name to transform into log-odds.
+        scale_ranges (dict[str:tuple], Optional) : (min, max) of each field to min-max scale.
+        regions (list[str], Optional) : Regions in order of their dummy columns, including
+                                        dropped_region. Defaults to None, no dummies.
+        states_to_regions (dict[str,str], Optional) : Key[str] is state name. Value[str] is region name.
+        dropped_region (str) : Region omitted from dummies to avoid perfect multicollinearity.
+    """
+
+    def __init__(self,
+                 make_floats : typing.List[str],
+                 make_logit : typing.Optional[str] = None,
+                 scale_ranges : typing.Optional[typing.Dict[str, typing.Tuple[float, float]]] = None,
+                 regions : typing.Optional[typing.List[str]] = None,
+                 states_to_regions : typing.Optional[typing.Dict[str, str]] = None,
+                 dropped_region : str = "West"):
+        self.make_floats = list(make_floats)
+        self.make_logit = make_logit
+        self.scale_ranges = {col: (float(min_val), float(max_val))
+                             for col, (min_val, max_val) in (scale_ranges or {}).items()}
+        self.regions = list(regions) if regions is not None else None
+        self.states_to_regions = dict(states_to_regions or {})
+        self.dropped_region = dropped_region
+
+    @classmethod
+    def fit(cls,
+            places_pivot : pd.DataFrame,
+            make_floats : typing.List[str],
+            make_logit : typing.Optional[str],
+            states_to_regions : typing.Optional[typing.Dict[str, str]] = None,
+            scale_columns : typing.Union[str, typing.List[str], None] = None) -> "FeatureTransform":
+        """
+        Captures the scaling ranges of clean PLACES data and the regions of states_to_regions.
+
+        Every region of states_to_regions is given a dummy column, whether or not
+        any state of it is in places_pivot, as one_hot_encode does.
+
+        Args:
+            places_pivot (dataframe) : Pivoted dataframe of PLACES data.
+                                       See pivot_places return.
+            make_floats (list[str]) : PLACES measure names to reformat to [0,1] proportions.
+            make_logit (str) : Field name to transform into log-odds.
+            states_to_regions (dict[str,str], Optional) : Key[str] is state name. Value[str] is
+                                                          region name. Defaults to None, no dummies.
+            scale_columns (str, Optional) : Field name(s) to scale to [0,1] using min-max scaling.
+                                            Defaults to None, no scaling.
+
+        Returns:
+            FeatureTransform: fitted transform
+        """
+        if isinstance(scale_columns, str): # Create iterable of columns if only one passed
+            scale_columns = [scale_columns]
+        try:
+            scale_ranges = {col: (places_pivot[col].min(), places_pivot[col].max()) for col in scale_columns or []}
+            regions = None
+            if states_to_regions is not None:
+                if "StateDesc" not in places_pivot.columns:
+                    raise KeyError("StateDesc")
+                # Every region of the mapping, as RegionEncoder, so dummies do not depend on states in the data
+                regions = sorted(set(states_to_regions.values()))
+        except KeyError as k_err:
+            logger.error("Columns passed for transformation could not be found.")
+            raise KeyError("Columns passed for transformation could not be found.") from k_err
+        except TypeError as v_err:
+            logger.error("Columns passed for transformation must be numeric.")
+            raise TypeError("Columns passed for transformation must be numeric.") from v_err
+        if regions is not None and "West" not in regions:
+            logger.error("No state of region West exists to drop.")
+            raise KeyError("No state of region West exists to drop.")
+        return cls(make_floats, make_logit, scale_ranges, regions, states_to_regions)
+
+    @profiled
+    def apply(self,
+              places_pivot : pd.DataFrame,
+              dtype : typing.Optional[str] = None,
+              response : bool = True) -> typing.Tuple[pd.DataFrame, typing.Dict[str, int]]:
+        """
+        Conducts the transforms of reformat_measures, one_hot_encode and scale_values in one pass.
+
+        Measures are copied once into a column-major NumPy block, which is then
+        rescaled and logit transformed in place; region dummies and scaled columns
+        are built as arrays and joined to the block without further copies. The
+        result has the same columns as the functions applied in turn, with measures
+        and scaled columns after the other columns of places_pivot, and places_pivot
+        is left unchanged.
+
+        Regions are taken from a region column if places_pivot has one and no
+        StateDesc, as for input of the web app.
+
+        Args:
+            places_pivot (dataframe) : Pivoted dataframe of PLACES data.
+                                       See pivot_places return.
+            dtype (str, Optional) : Float type of transformed columns, e.g. float32 to halve
+                                    their memory. Defaults to None, float64.
+            response (bool) : Whether places_pivot has the log-odds field, as opposed to new
+                              data without a response. Defaults to True.
+
+        Returns:
+            pandas dataframe: PLACES dataframe with reformatted measures, regions one-hot encoded,
+                              and scaled columns
+            dict[str:int]: bytes allocated by each transform, and in total
+
+        """
+        make_logit = self.make_logit if response else None
+        make_floats = [col for col in self.make_floats if response or col != self.make_logit]
+        scale_columns = list(self.scale_ranges)
+        block_columns = make_floats + ([make_logit] if make_logit and make_logit not in make_floats else [])
+        allocated : typing.Dict[str, int] = {}
+        try:
+            measures = [places_pivot[col] for col in block_columns]
+            scaled_inputs = [places_pivot[col] for col in scale_columns]
+            if not all(pd.api.types.is_numeric_dtype(col) for col in measures + scaled_inputs):
+                raise TypeError("Non-numeric column.")
+        except KeyError as k_err:
+            logger.error("Columns passed for transformation could not be found.")
+            raise KeyError("Columns passed for transformation could not be found.") from k_err
+        except TypeError as v_err:
+            logger.error("Columns passed for transformation must be numeric.")
+            raise TypeError("Columns passed for transformation must be numeric.") from v_err
+        float_type = np.dtype(dtype or np.float64) # float32 only if requested; measures may be narrower
+        scaled_type = float_type
+        n_rows = len(places_pivot)
+
+        # One block of measures, also holding scaled columns of the same type; pandas copies
+        # blocks of the same type into one when joining them, so they are allocated together
+        scaled_names = ["scaled_" + col for col in scale_columns]
+        scaled_in_block = scaled_type == float_type
+        block = np.empty((n_rows, len(block_columns) + (len(scale_columns) if scaled_in_block else 0)),
+                         dtype=float_type, order="F")
+        frames = [pd.DataFrame(block, index=places_pivot.index, copy=False,
+                               columns=block_columns + (scaled_names if scaled_in_block else []))]
+
+        # Reformat measures to [0,1] in place, then take log-odds of the response in place
+        for position, col in enumerate(measures):
+            block[:, position] = col.to_numpy()
+        np.divide(block[:, :len(make_floats)], 100, out=block[:, :len(make_floats)])
+        allocated["reformat_measures"] = block[:, :len(block_columns)].nbytes
+        if make_logit:
+            response_values = block[:, block_columns.index(make_logit)]
+            odds = np.subtract(1, response_values)
+            np.divide(response_values, odds, out=odds)
+            np.log(odds, out=response_values)
+            allocated["logit"] = odds.nbytes
+            del odds
+
+        # Encode regions, dropping dropped_region
+        if self.regions is not None:
+            encoder = RegionEncoder(self.states_to_regions, self.regions, self.dropped_region)
+            try:
+                if "region" in places_pivot.columns and "StateDesc" not in places_pivot.columns:
+                    region_codes = encoder.encode_regions(places_pivot["region"])
+                else:
+                    region_codes = encoder.encode(places_pivot["StateDesc"])
+            except KeyError as k_err:
+                logger.error("Column(s) region or StateDesc are missing from dataframe.")
+                raise KeyError("Column(s) region or StateDesc are missing from dataframe.") from k_err
+            if (region_codes == -1).any():
+                logger.warning("Unmapped state names exist.")
+            region_frame = encoder.frame(region_codes, places_pivot.index)
+            allocated["one_hot_encode"] = region_codes.nbytes * 2 + len(region_codes) * len(encoder.dummy_regions)
+            frames.append(region_frame)
+
+        # Scale columns to [0,1] by their fitted ranges
+        if scale_columns:
+            if scaled_in_block:
+                scaled = block[:, len(block_columns):]
+            else:
+                scaled = np.empty((n_rows, len(scale_columns)), dtype=scaled_type, order="F")
+                frames.append(pd.DataFrame(scaled, index=places_pivot.index, columns=scaled_names, copy=False))
+            for position, col in enumerate(scaled_inputs):
+                min_value, max_value = self.scale_ranges[col.name]
+                np.subtract(col.to_numpy(), min_value, out=scaled[:, position], casting="unsafe")
+                scaled[:, position] /= (max_value - min_value)
+            allocated["scale_values"] = scaled.nbytes
+
+        # Columns of places_pivot not transformed, nor replaced by a column created above
+        created = set(itertools.chain.from_iterable(frame.columns for frame in frames))
+        others = places_pivot.drop(columns=[col for col in places_pivot.columns
+                                            if col in created or col in block_columns])
+        allocated["total"] = sum(allocated.values())
+        places_featurized = pd.concat([others] + frames, axis=1, copy=False)
+        logger.info("Featurized %d rows, allocating %.1f MB.", n_rows, allocated["total"] / 1e6)
+        return places_featurized, allocated
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """Returns parameters of transform. See FeatureTransform."""
+        return {"make_floats": self.make_floats,
+                "make_logit": self.make_logit,
+                "scale_ranges": {col: list(value_range) for col, value_range in self.scale_ranges.items()},
+                "regions": self.regions,
+                "states_to_regions": self.states_to_regions,
+                "dropped_region": self.dropped_region}
+
+    def save(self, file_path : str) -> None:
+        """
+        Saves transform as json.
+
+        Args:
+            file_path (str) : Url of s3 bucket or location to save transform.
+
+        Returns:
+            None
+        """
+        try:
+            with fsspec.open(file_path, "w") as transform_file:
+                json.dump(self.to_dict(), transform_file)
+        except botocore.exceptions.NoCredentialsError as c_err:  # type: ignore
+            logger.error("Please provide credentials AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY env variables.")
+            raise c_err
+        except FileNotFoundError as f_err:
+            logger.error("A valid file path and name must be provided.")
+            raise FileNotFoundError("A valid file path and name must be provided.") from f_err
+        logger.info("Feature transform saved to %s.", file_path)
+
+    @classmethod
+    def load(cls, file_path : str) -> "FeatureTransform":
+        """
+        Imports transform saved as json. See save.
+
+        Args:
+            file_path (str) : Url of s3 bucket or location of transform.
+
+        Returns:
+            FeatureTransform: saved transform
+        """
+        try:
+            with fsspec.open(file_path, "r") as transform_file:
+                params = json.load(transform_file)
+        except botocore.exceptions.NoCredentialsError as c_err:  # type: ignore
+            logger.error("Please provide credentials AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY env variables.")
+            raise c_err
+        except FileNotFoundError as f_err:
+            logger.error("A valid file path and name must be provided.")
+            raise FileNotFoundError("A valid file path and name must be provided.") from f_err
+        logger.info("Feature transform imported into memory.")
+        return cls(**params)
+
+@profiled
+def featurize_places(places_pivot : pd.DataFrame,
+                     make_floats : typing.List[str],
+                     make_logit : typing.Optional[str],
+                     states_to_regions : typing.Optional[typing.Dict[str, str]] = None,
+                     scale_columns : typing.Union[str, typing.List[str], None] = None,
+                     engine_string : typing.Optional[str] = None,
+                     run_id : typing.Optional[str] = None,
+                     dtype : typing.Optional[str] = None
+                     ) -> typing.Tuple[pd.DataFrame, typing.Dict[str, int]]:
+    """
+    Conducts the transforms of reformat_measures, one_hot_encode and scale_values in one pass.
+
+    Fits a FeatureTransform to places_pivot and applies it. See FeatureTransform.apply.
+
+    Args:
+        places_pivot (dataframe) : Pivoted dataframe of PLACES data.
+                                   See pivot_places return.
+        make_floats (list[str]) : List of PLACES measure names to
+                                  reformat to [0,1] proportions.
+        make_logit (str) : Field name to transform into log-odds.
+        states_to_regions (dict[str,str], Optional) : Key[str] is state name. Value[str] is
+                                                      region name. Defaults to None, no dummies.
+        scale_columns (str, Optional) : Field name(s) to scale to [0,1] using min-max scaling.
+                                        Defaults to None, no scaling.
+        engine_string (str, Optional) : SQL Alchemy database URI path to record scaling ranges in.
+                                        Defaults to None, nothing captured in database.
+        run_id (str, Optional) : Identifier of featurize run to record ranges under.
+        dtype (str, Optional) : Float type of transformed columns, e.g. float32 to halve
+                                their memory. Defaults to None, float64.
+
+    Returns:
+        pandas dataframe: PLACES dataframe with reformatted measures, regions one-hot encoded,
+                          and scaled columns
+        dict[str:int]: bytes allocated by each transform, and in total
+
+    """
+    transform = FeatureTransform.fit(places_pivot, make_floats, make_logit, states_to_regions, scale_columns)
+    places_featurized, allocated = transform.apply(places_pivot, dtype)
+    if transform.scale_ranges:
+        record_ranges(engine_string, transform, run_id)
+    return places_featurized, allocated
+
+def record_ranges(engine_string : typing.Optional[str],
+                  transform : FeatureTransform,
+                  run_id : typing.Optional[str] = None) -> None:
+    """Records scaling ranges of a transform in scaler_ranges table, if an engine string is passed. See add_ranges."""
+    if engine_string is not None: # Don't write to DB is no engine string passed
+        add_ranges(engine_string, transform.scale_ranges, run_id)
+    else:
+        logger.warning("Scaling params not recorded in database.")
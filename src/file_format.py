@@ -0,0 +1,44 @@
+"""
+Module determines the storage format of pipeline artifacts from their location.
+"""
+
+import typing
+import logging
+
+logger = logging.getLogger(__name__)
+
+# File extensions of supported storage formats
+FILE_FORMATS : typing.Dict[str, str] = {".csv": "csv",
+                                        ".txt": "csv",
+                                        ".parquet": "parquet",
+                                        ".pq": "parquet",
+                                        ".arrow": "arrow",
+                                        ".feather": "arrow",
+                                        ".ipc": "arrow"}
+
+def infer_file_format(file_path : str,
+                      file_format : typing.Optional[str] = None) -> str:
+    """
+    Determines storage format of a file from its extension.
+
+    Supported formats are "csv", "parquet" and "arrow" (Arrow IPC/Feather).
+    Paths without a recognized extension are treated as csv.
+
+    Args:
+        file_path (str) : Url of s3 bucket or location of file.
+        file_format (str, Optional) : Format to use regardless of extension.
+                                      Defaults to None.
+
+    Returns:
+        str: storage format
+
+    """
+    if file_format is not None:
+        if file_format not in set(FILE_FORMATS.values()):
+            logger.error("File format %s is not supported.", file_format)
+            raise ValueError(f"File format {file_format} is not supported.")
+        return file_format
+    for extension, extension_format in FILE_FORMATS.items():
+        if str(file_path).lower().endswith(extension):
+            return extension_format
+    return "csv"
@@ -0,0 +1,145 @@
+"""
+Module saves and imports linear models in a compact format read with NumPy alone.
+
+A model file holds a fixed preamble, a json header and the coefficients as raw
+float64 values. The preamble is the MAGIC bytes, the format version and the
+length of the header. The header records feature names, intercept, metadata
+such as the estimator and response transform, the offset of the coefficients
+and their SHA-256 checksum. Coefficients start on a 64-byte boundary, so that
+they can be memory-mapped, and shared, by any number of processes.
+"""
+
+import typing
+import logging
+import datetime
+import hashlib
+import json
+import struct
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PLACESLM"
+VERSION = 1
+# Magic bytes, format version (uint16) and header length (uint32), little-endian
+PREAMBLE = struct.Struct("<8sHI")
+ALIGNMENT = 64
+
+class LinearModel:
+    """
+    Fitted linear model of coefficients, intercept and feature names.
+
+    Predicts as sklearn linear models do, from a dataframe with the features
+    (in any order) or an array of them in order.
+
+    Args:
+        coef (numpy array) : Coefficient of each feature.
+        intercept (float) : Intercept.
+        features (list[str]) : Feature names, in order of coef.
+        metadata (dict, Optional) : Details of the model, such as its estimator.
+    """
+
+    def __init__(self,
+                 coef : np.ndarray,
+                 intercept : float,
+                 features : typing.List[str],
+                 metadata : typing.Optional[typing.Dict[str, typing.Any]] = None):
+        self.coef_ = coef
+        self.intercept_ = float(intercept)
+        self.feature_names_in_ = np.array(features, dtype=object)
+        self.n_features_in_ = len(features)
+        self.metadata = dict(metadata or {})
+
+    def predict(self, X : typing.Any) -> np.ndarray:
+        """Returns X @ coef + intercept. See LinearModel."""
+        if hasattr(X, "columns"):
+            X = X[list(self.feature_names_in_)].to_numpy(dtype=np.float64)
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+def is_compact_model(file_path : str) -> bool:
+    """Returns whether file_path starts with the MAGIC bytes of a compact model."""
+    with open(file_path, "rb") as model_handle:
+        return model_handle.read(len(MAGIC)) == MAGIC
+
+def save_model(trained_model : typing.Any,
+               file_path : str,
+               metadata : typing.Optional[typing.Dict[str, typing.Any]] = None) -> None:
+    """
+    Saves a fitted linear model in compact format.
+
+    Args:
+        trained_model (model object) : Fitted sklearn linear model, or LinearModel,
+                                       with coef_, intercept_ and feature_names_in_.
+        file_path (str) : Location to save model.
+        metadata (dict, Optional) : Further details of the model to record, such as
+                                    the response and its transform. Defaults to None.
+
+    Returns:
+        None
+    """
+    try:
+        coef = np.ascontiguousarray(trained_model.coef_, dtype="<f8").ravel()
+        features = [str(feature) for feature in trained_model.feature_names_in_]
+        intercept = float(np.ravel(trained_model.intercept_)[0])
+    except AttributeError as a_err:
+        logger.error("Model must be a fitted linear model with feature names.")
+        raise TypeError("Model must be a fitted linear model with feature names.") from a_err
+    if len(coef) != len(features):
+        logger.error("Model must have one coefficient per feature.")
+        raise ValueError("Model must have one coefficient per feature.")
+
+    model_metadata = {"estimator": type(trained_model).__name__,
+                      "created": datetime.datetime.now().isoformat(timespec="seconds")}
+    model_metadata.update(getattr(trained_model, "metadata", {}))
+    model_metadata.update(metadata or {})
+    header = {"features": features,
+              "intercept": intercept,
+              "dtype": "<f8",
+              "metadata": model_metadata,
+              "sha256": hashlib.sha256(coef.tobytes()).hexdigest()}
+    # Header length is fixed before the offset is known, so the offset is padded to a width
+    header["offset"] = 0
+    header_length = len(json.dumps(header).encode()) + 16
+    offset = -(-(PREAMBLE.size + header_length) // ALIGNMENT) * ALIGNMENT
+    header["offset"] = offset
+    header_bytes = json.dumps(header).encode().ljust(offset - PREAMBLE.size)
+
+    with open(file_path, "wb") as model_handle:
+        model_handle.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        model_handle.write(header_bytes)
+        model_handle.write(coef.tobytes())
+    logger.info("Model saved in compact format to %s.", file_path)
+
+def load_model(file_path : str,
+               mmap : bool = True,
+               verify : bool = True) -> LinearModel:
+    """
+    Imports a model saved in compact format. See save_model.
+
+    Args:
+        file_path (str) : Location of model.
+        mmap (bool) : Whether to memory-map coefficients rather than read them. Defaults to True.
+        verify (bool) : Whether to check coefficients against their checksum. Defaults to True.
+
+    Returns:
+        LinearModel: fitted model
+    """
+    with open(file_path, "rb") as model_handle:
+        magic, version, header_length = PREAMBLE.unpack(model_handle.read(PREAMBLE.size))
+        if magic != MAGIC:
+            logger.error("%s is not a compact model file.", file_path)
+            raise ValueError(f"{file_path} is not a compact model file.")
+        if version > VERSION:
+            logger.error("Model format version %i is newer than supported version %i.", version, VERSION)
+            raise ValueError(f"Model format version {version} is newer than supported version {VERSION}.")
+        header = json.loads(model_handle.read(header_length))
+        if not mmap:
+            coef = np.frombuffer(model_handle.read(len(header["features"]) * 8), dtype=header["dtype"])
+    if mmap:
+        coef = np.memmap(file_path, dtype=header["dtype"], mode="r",
+                         offset=header["offset"], shape=(len(header["features"]),))
+    if verify and hashlib.sha256(np.ascontiguousarray(coef).tobytes()).hexdigest() != header["sha256"]:
+        logger.error("Coefficients of %s do not match their checksum.", file_path)
+        raise ValueError(f"Coefficients of {file_path} do not match their checksum.")
+    return LinearModel(coef, header["intercept"], header["features"], header["metadata"])
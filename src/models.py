@@ -3,6 +3,7 @@ Creates table structure for features, model parameters, and references for PLACE
 """
 
 import logging
+import functools
 
 import sqlalchemy as sql
 import sqlalchemy.exc
@@ -101,14 +102,16 @@ class Parameters(Base):
                 intercept: {self.intercept}>"
 
 class scalerRanges(Base):
-    """Creates a table of min-max values of scaled features."""
+    """Creates a table of min-max values of scaled features, one row per feature and featurize run."""
 
     __tablename__ = "scaler_ranges"
+    __table_args__ = (sql.UniqueConstraint("valuename", "run_id"),)
 
     id = sql.Column(sql.Integer, primary_key=True)
     valuename = sql.Column(sql.String(100), unique=False, nullable=True)
     max_value = sql.Column(sql.Float, unique=False, nullable=True)
     min_value = sql.Column(sql.Float, unique=False, nullable=True)
+    run_id = sql.Column(sql.String(32), unique=False, nullable=True)
 
     def __repr__(self):
         return f"<Column: access2: {self.valuename}, max: {self.max_value}, min: {self.min_value}>"
@@ -128,6 +131,48 @@ class Measures(Base):
         return f"<Measures: category: {self.category}, measureid: {self.measureid},\
                 short_question_text: {self.short_question_text}>"
 
+@functools.lru_cache(maxsize=None)
+def get_engine(engine_string : str) -> sql.engine.base.Engine:
+    """
+    Returns the engine of a database, created once per process so its connection
+    pool is shared by every writer.
+
+    Args:
+        engine_string (str) : SQL Alchemy database URI path.
+
+    Returns:
+        sql.engine.base.Engine: SQL Alchemy engine object
+
+    """
+    return sql.create_engine(engine_string)
+
+@functools.lru_cache(maxsize=None)
+def upgrade_db(engine_string : str) -> None:
+    """
+    Adds tables and columns added to the schema since a database was created, keeping its rows.
+
+    create_all does not alter tables that already exist, so scaler_ranges of a
+    database created before ranges were recorded per run is given its run_id
+    column, and unique index of valuename and run_id, here. Checked once per
+    process for each database.
+
+    Args:
+        engine_string (str) : SQL Alchemy database URI path.
+
+    Returns:
+        None
+
+    """
+    engine = get_engine(engine_string)
+    Base.metadata.create_all(engine) # Only creates missing tables
+    columns = {column["name"] for column in sql.inspect(engine).get_columns(scalerRanges.__tablename__)}
+    if "run_id" not in columns:
+        with engine.begin() as connection:
+            connection.execute(sql.text("ALTER TABLE scaler_ranges ADD COLUMN run_id VARCHAR(32)"))
+            connection.execute(sql.text("CREATE UNIQUE INDEX uq_scaler_ranges_valuename_run_id "
+                                        "ON scaler_ranges (valuename, run_id)"))
+        logger.info("Column run_id added to table scaler_ranges.")
+
 def create_db(engine_string : str) -> None:
     """
     Creates database table schema.
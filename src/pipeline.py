@@ -0,0 +1,493 @@
+"""
+Module runs a range of model pipeline stages in one process, passing the data
+each stage produces to the next in memory.
+
+Stage modules are imported by the functions that use them, so that a run only
+pays for importing the libraries (sklearn, matplotlib, sqlalchemy) of its stages.
+"""
+
+import typing
+import logging
+import itertools
+
+from src import profiling
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+    from src.stage_cache import StageCache
+
+logger = logging.getLogger(__name__)
+
+# Stages in order of execution
+STAGES : typing.List[str] = ["clean", "featurize", "train", "score", "evaluate"]
+
+# Artifacts read and produced by each stage; the first is the stage's --input or --output
+STAGE_INPUTS : typing.Dict[str, typing.List[str]] = {"clean": ["raw"],
+                                                     "featurize": ["clean"],
+                                                     "train": ["featurized"],
+                                                     "score": ["train_test", "model"],
+                                                     "evaluate": ["scores"]}
+STAGE_OUTPUTS : typing.Dict[str, typing.List[str]] = {"clean": ["clean"],
+                                                      "featurize": ["featurized", "transform"],
+                                                      "train": ["train_test", "model"],
+                                                      "score": ["scores"],
+                                                      "evaluate": ["performance"]}
+# Artifacts a stage uses if produced by an earlier stage or given a location
+STAGE_OPTIONAL_INPUTS : typing.Dict[str, typing.List[str]] = {"score": ["transform", "featurized"]}
+
+# Config sections and modules each stage's artifacts depend on, for cache keys
+STAGE_CONFIG_SECTIONS : typing.Dict[str, typing.List[str]] = {"clean": ["clean"],
+                                                              "featurize": ["featurize"],
+                                                              "train": ["train_model", "train_test_split",
+                                                                        "cross_validate"],
+                                                              "score": ["score", "train_model"],
+                                                              "evaluate": ["evaluate"]}
+STAGE_MODULES : typing.Dict[str, typing.List[str]] = {
+    "clean": ["src.pipeline", "src.clean"],
+    "featurize": ["src.pipeline", "src.clean", "src.featurize", "data.reference.state_region_mapping"],
+    "train": ["src.pipeline", "src.clean", "src.train_test_split", "src.run_model"],
+    "score": ["src.pipeline", "src.clean", "src.score"],
+    "evaluate": ["src.pipeline", "src.clean", "src.evaluate"]}
+# Stages whose artifacts are cached; evaluate only saves a plot
+CACHED_STAGES : typing.List[str] = ["clean", "featurize", "train", "score"]
+# Stages writing to the database when passed an engine string; never served from cache then
+DATABASE_STAGES : typing.List[str] = ["featurize", "train"]
+
+def load_artifact(name : str,
+                  file_path : str,
+                  mdl_config : typing.Dict,
+                  file_format : typing.Optional[str] = None,
+                  streamed : bool = False) -> typing.Any:
+    """
+    Imports an artifact consumed by a stage from file.
+
+    Raw data is returned as validated chunks that are only read as the clean
+    stage consumes them, as is featurized data if streamed (see streamed_inputs).
+
+    If a cache is passed, stages of CACHED_STAGES whose inputs, config sections
+    and code match an earlier run return that run's artifacts without importing
+    their inputs. Stages writing to the database always run.
+
+    Args:
+        name (str) : Artifact name. See STAGE_INPUTS.
+        file_path (str) : Location of artifact.
+        mdl_config (dict) : Model pipeline configuration.
+        file_format (str, Optional) : Storage format of data artifacts after raw.
+                                      Defaults to None, inferred from file extension.
+        streamed (bool) : Whether to import data one chunk at a time. Defaults to False.
+
+    Returns:
+        Artifact: dataframe, iterable of dataframes, trained model or feature transform object
+
+    """
+    from src.clean import import_file, import_file_chunks, validate_chunks
+    if name == "raw":
+        clean_config = mdl_config["clean"]
+        return validate_chunks(import_file_chunks(file_path,
+                                                  dtypes=clean_config["validate_df"]["cols"],
+                                                  **clean_config["import_file"]),
+                               **clean_config["validate_df"])
+    if name == "clean":
+        return import_file(file_path, file_format=file_format, **mdl_config["featurize"]["import_file"])
+    if name == "featurized":
+        train_config = mdl_config["train_model"]
+        cv_config = mdl_config.get("cross_validate") or {}
+        group = [cv_config["group"]] if cv_config.get("enabled") and cv_config.get("group") else []
+        if streamed:
+            return import_file_chunks(file_path, train_config["features"] + [train_config["response"]],
+                                      file_format=file_format, chunksize=train_config["streaming"]["chunksize"])
+        return import_file(file_path, train_config["features"] + [train_config["response"]] + group,
+                           file_format=file_format)
+    if name == "model":
+        from src.score import import_model
+        return import_model(file_path)
+    if name == "transform":
+        from src.featurize import FeatureTransform
+        return FeatureTransform.load(file_path)
+    return import_file(file_path, file_format=file_format)
+
+def model_metadata(mdl_config : typing.Optional[typing.Dict]) -> typing.Dict[str, typing.Any]:
+    """Returns the response of the model and the transform of it to undo on predictions."""
+    if not mdl_config:
+        return {}
+    response = mdl_config["train_model"]["response"]
+    make_logit = (mdl_config.get("featurize") or {}).get("reformat_measures", {}).get("make_logit")
+    return {"response": response,
+            "response_transform": "logit" if make_logit == response else None}
+
+def save_artifact(name : str,
+                  artifact : typing.Any,
+                  file_path : str,
+                  file_format : typing.Optional[str] = None,
+                  mdl_config : typing.Optional[typing.Dict] = None) -> None:
+    """
+    Saves an artifact produced by a stage to file.
+
+    Models saved in compact format record the response and its transform from mdl_config.
+
+    Args:
+        name (str) : Artifact name. See STAGE_OUTPUTS.
+        artifact (Artifact) : Dataframe, trained model or feature transform object.
+        file_path (str) : Location to save artifact.
+        file_format (str, Optional) : Storage format of data artifacts.
+                                      Defaults to None, inferred from file extension.
+        mdl_config (dict, Optional) : Model configuration. Defaults to None.
+
+    Returns:
+        None
+
+    """
+    if name == "model":
+        from src.run_model import dump_model
+        dump_model(artifact, file_path, metadata=model_metadata(mdl_config))
+    elif name == "transform":
+        artifact.save(file_path)
+    elif name == "performance": # Saved by evaluate stage
+        return
+    else:
+        from src.retrieve_data import upload_file
+        upload_file(artifact, file_path, file_format=file_format)
+
+def run_clean(artifacts : typing.Dict[str, typing.Any],
+              mdl_config : typing.Dict,
+              **kwargs) -> typing.Dict[str, typing.Any]:
+    """Pivots raw PLACES data to one row per census tract. See prep_data."""
+    from src.clean import prep_data
+    return {"clean": prep_data(artifacts["raw"], **mdl_config["clean"]["prep_data"])}
+
+def run_featurize(artifacts : typing.Dict[str, typing.Any],
+                  mdl_config : typing.Dict,
+                  engine_string : typing.Optional[str] = None,
+                  **kwargs) -> typing.Dict[str, typing.Any]:
+    """Validates clean data and creates features, returning the transform applied. See featurize module."""
+    from src.clean import validate_df
+    from src.featurize import reformat_measures, scale_values, one_hot_encode, FeatureTransform, record_ranges
+    from data.reference.state_region_mapping import states_region_mapping
+    featurize_data = mdl_config["featurize"]
+    places_pivot : pd.DataFrame = artifacts["clean"]
+    if featurize_data["import_file"].get("columns"): # Same columns as imported from file
+        places_pivot = places_pivot[featurize_data["import_file"]["columns"]]
+    validate_df(places_pivot, **featurize_data["validate_df"])
+    transform = FeatureTransform.fit(
+        places_pivot,
+        **featurize_data["reformat_measures"],
+        states_to_regions = states_region_mapping if featurize_data["one_hot_encode"]["states_region"] else None,
+        scale_columns = featurize_data["scale_values"]["columns"])
+    fused = featurize_data.get("fused") or {}
+    if fused.get("enabled"): # All transforms in one pass; places_pivot is not modified
+        places_pivot, allocated = transform.apply(places_pivot, dtype = fused.get("dtype"))
+        if transform.scale_ranges:
+            record_ranges(engine_string, transform)
+        profiling.annotate(allocated_bytes = allocated)
+        return {"featurized": places_pivot, "transform": transform}
+    places_pivot = places_pivot.copy()
+    places_pivot = reformat_measures(places_pivot, **featurize_data["reformat_measures"])
+    if featurize_data["one_hot_encode"]["states_region"]:
+        places_pivot = one_hot_encode(places_pivot, states_to_regions = states_region_mapping)
+    if featurize_data["scale_values"]["columns"]:
+        places_pivot = scale_values(engine_string, places_pivot, **featurize_data["scale_values"])
+    return {"featurized": places_pivot, "transform": transform}
+
+def run_train(artifacts : typing.Dict[str, typing.Any],
+              mdl_config : typing.Dict,
+              engine_string : typing.Optional[str] = None,
+              **kwargs) -> typing.Dict[str, typing.Any]:
+    """
+    Splits featurized data into training and test sets and trains model. See run_model module.
+
+    If enabled in the cross_validate section, the model is also cross-validated on
+    all featurized rows and the results saved to its report location.
+
+    If streaming is enabled in the train_model section, the model is instead fitted
+    one chunk of featurized data at a time (see fit_model_streaming), each chunk
+    split on its own, and only the training mask returned as train_test.
+    """
+    import numpy as np
+    from src.clean import validate_df
+    from src.run_model import fit_model, fit_model_streaming, add_params, cross_validate, dump_cv_results
+    from src.train_test_split import split_data
+    train_model = mdl_config["train_model"]
+    if (train_model.get("streaming") or {}).get("enabled"):
+        return run_train_streaming(artifacts, mdl_config, engine_string)
+    places_df = artifacts["featurized"][train_model["features"] + [train_model["response"]]]
+    validate_df(places_df, **train_model["validate_df"])
+    combined_df = split_data(places_df, **mdl_config["train_test_split"])
+    if mdl_config["train_test_split"].get("mask_only"): # Only the mask is kept; training rows are copied once
+        training_set = places_df.take(np.flatnonzero(combined_df.training.to_numpy()))
+    else: # Training rows come first; selected without a copy
+        training_set = combined_df.iloc[:int(combined_df.training.sum())]
+    params, model = fit_model(training_set,
+                              features = train_model["features"],
+                              response = train_model["response"],
+                              method = train_model["method"],
+                              **train_model["params"])
+    cv_config = mdl_config.get("cross_validate") or {}
+    if cv_config.get("enabled"):
+        groups = artifacts["featurized"][cv_config["group"]].to_numpy() if cv_config.get("group") else None
+        cv_results = cross_validate(places_df,
+                                    features = train_model["features"],
+                                    response = train_model["response"],
+                                    n_splits = cv_config.get("n_splits", 5),
+                                    groups = groups,
+                                    shuffle = cv_config.get("shuffle", True),
+                                    random_state = cv_config.get("random_state"),
+                                    n_jobs = cv_config.get("n_jobs"),
+                                    **train_model["params"])
+        profiling.annotate(cv_rmse_mean = cv_results["rmse_mean"], cv_rmse_std = cv_results["rmse_std"])
+        if cv_config.get("report"):
+            dump_cv_results(cv_results, cv_config["report"])
+    if engine_string is not None: # Don't write to DB if no engine string passed
+        add_params(engine_string, params)
+    else:
+        logger.warning("Model coefficients not recorded in database.")
+    return {"train_test": combined_df, "model": model}
+
+def run_train_streaming(artifacts : typing.Dict[str, typing.Any],
+                        mdl_config : typing.Dict,
+                        engine_string : typing.Optional[str] = None) -> typing.Dict[str, typing.Any]:
+    """Trains model one chunk of featurized data at a time. See run_train."""
+    import numpy as np
+    import pandas as pd
+    from src.clean import validate_df
+    from src.run_model import fit_model_streaming, add_params
+    from src.train_test_split import split_mask
+    train_model = mdl_config["train_model"]
+    streaming = train_model["streaming"]
+    split_config = mdl_config["train_test_split"]
+    columns = train_model["features"] + [train_model["response"]]
+    if (mdl_config.get("cross_validate") or {}).get("enabled"):
+        logger.warning("Cross-validation requires featurized data in memory; skipped while streaming.")
+
+    featurized = artifacts["featurized"]
+    if isinstance(featurized, pd.DataFrame): # Already in memory; fitted in slices
+        chunks = (featurized.iloc[start:start + streaming["chunksize"]]
+                  for start in range(0, len(featurized), streaming["chunksize"]))
+    else:
+        chunks = featurized
+    masks : typing.List[np.ndarray] = []
+
+    def training_chunks() -> typing.Iterator[pd.DataFrame]:
+        for position, chunk in enumerate(chunks):
+            chunk = chunk[columns]
+            validate_df(chunk, **train_model["validate_df"])
+            training = split_mask(len(chunk), split_config["test_size"], split_config["random_state"] + position)
+            masks.append(training)
+            yield chunk.take(np.flatnonzero(training))
+
+    params, model = fit_model_streaming(training_chunks(),
+                                        features = train_model["features"],
+                                        response = train_model["response"],
+                                        method = train_model["method"],
+                                        alpha = streaming.get("alpha") or 0.0,
+                                        fit_intercept = train_model["params"].get("fit_intercept", True))
+    if engine_string is not None: # Don't write to DB if no engine string passed
+        add_params(engine_string, params)
+    else:
+        logger.warning("Model coefficients not recorded in database.")
+    training = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+    return {"train_test": pd.DataFrame({"training": training.astype(np.int8)}), "model": model}
+
+def is_training_mask(train_test : "pd.DataFrame") -> bool:
+    """Returns whether train_test is only a training column (see split_data mask_only), besides an index saved to csv."""
+    return [col for col in train_test.columns if not str(col).startswith("Unnamed: ")] == ["training"]
+
+def run_score(artifacts : typing.Dict[str, typing.Any],
+              mdl_config : typing.Dict,
+              **kwargs) -> typing.Dict[str, typing.Any]:
+    """
+    Predicts responses of test set. See score module.
+
+    If only the training mask was saved by train (see split_data mask_only), test
+    rows are taken from the featurized data, in the same order as the mask, which
+    must be produced by an earlier stage or given a location. Data
+    without model features, such as new clean data, is otherwise featurized by the
+    transform, if one is passed, and scored in full unless it has a training column.
+    """
+    import numpy as np
+    from src.clean import validate_df
+    from src.score import pred_responses
+    combined_df : pd.DataFrame = artifacts["train_test"]
+    transform = artifacts.get("transform")
+    features = mdl_config["train_model"]["features"]
+    featurized = artifacts.get("featurized")
+    if is_training_mask(combined_df):
+        if featurized is None:
+            logger.error("Test rows of a training mask are taken from featurized data, of which no location was given.")
+            raise ValueError("Test rows of a training mask are taken from featurized data, "
+                             "of which no location was given.")
+        if len(featurized) != len(combined_df):
+            logger.error("Training mask and featurized data must have the same rows.")
+            raise ValueError("Training mask and featurized data must have the same rows.")
+        combined_df = featurized.take(np.flatnonzero(combined_df.training.to_numpy() == 0))
+        combined_df["training"] = np.zeros(len(combined_df), dtype=np.int8)
+    elif transform is not None and not set(features).issubset(combined_df.columns):
+        combined_df, _ = transform.apply(combined_df, response = transform.make_logit in combined_df.columns)
+        if "training" not in combined_df.columns:
+            combined_df["training"] = 0
+    validate_df(combined_df, **mdl_config["score"]["validate_df"])
+    test_df = combined_df.take(np.flatnonzero(combined_df.training.to_numpy() == 0)) # Copy of test rows only
+    test_df = pred_responses(artifacts["model"], test_df, features)
+    return {"scores": test_df}
+
+def run_evaluate(artifacts : typing.Dict[str, typing.Any],
+                 mdl_config : typing.Dict,
+                 paths : typing.Optional[typing.Dict[str, str]] = None,
+                 **kwargs) -> typing.Dict[str, typing.Any]:
+    """Plots performance of test set predictions. See evaluate module."""
+    from src.clean import validate_df
+    from src.evaluate import visualize_performance
+    if not paths or not paths.get("performance"):
+        logger.error("A location to save the performance plot must be provided.")
+        raise ValueError("A location to save the performance plot must be provided.")
+    test_df : pd.DataFrame = artifacts["scores"]
+    validate_df(test_df, **mdl_config["evaluate"]["validate_df"])
+    visualize_performance(test_df,
+                          save_file_path = paths["performance"],
+                          **mdl_config["evaluate"]["visualize_performance"])
+    return {"performance": paths["performance"]}
+
+STAGE_FUNCTIONS : typing.Dict[str, typing.Callable[..., typing.Dict[str, typing.Any]]] = {
+    "clean": run_clean,
+    "featurize": run_featurize,
+    "train": run_train,
+    "score": run_score,
+    "evaluate": run_evaluate}
+
+def select_stages(start : str, end : str) -> typing.List[str]:
+    """
+    Returns stages from start to end, inclusive.
+
+    Args:
+        start (str) : First stage to run. See STAGES.
+        end (str) : Last stage to run. See STAGES.
+
+    Returns:
+        list[str]: stages in order of execution
+
+    """
+    if start not in STAGES or end not in STAGES:
+        logger.error("Stages must be one of %s.", ", ".join(STAGES))
+        raise ValueError(f"Stages must be one of {', '.join(STAGES)}.")
+    if STAGES.index(start) > STAGES.index(end):
+        logger.error("Stage %s comes after stage %s.", start, end)
+        raise ValueError(f"Stage {start} comes after stage {end}.")
+    return STAGES[STAGES.index(start):STAGES.index(end) + 1]
+
+def streamed_inputs(stage : str, mdl_config : typing.Dict) -> typing.List[str]:
+    """Returns inputs a stage reads one chunk at a time from file; featurized data if training is streamed."""
+    if stage == "train" and ((mdl_config.get("train_model") or {}).get("streaming") or {}).get("enabled"):
+        return ["featurized"]
+    return []
+
+def produced_by(stages : typing.Iterable[str]) -> typing.Set[str]:
+    """Returns artifacts produced by stages."""
+    return set(itertools.chain.from_iterable(STAGE_OUTPUTS[stage] for stage in stages))
+
+def run_pipeline(mdl_config : typing.Dict,
+                 start : str,
+                 end : str,
+                 paths : typing.Dict[str, str],
+                 save : typing.Optional[typing.Iterable[str]] = None,
+                 engine_string : typing.Optional[str] = None,
+                 file_format : typing.Optional[str] = None,
+                 cache : typing.Optional["StageCache"] = None) -> typing.Dict[str, typing.Any]:
+    """
+    Runs stages from start to end in one process, passing artifacts between them in memory.
+
+    Artifacts consumed by the first stages are imported from paths, as are those,
+    like a trained model, that no stage of the run produces. Optional inputs (see
+    STAGE_OPTIONAL_INPUTS) are only imported if given a location. Artifacts produced
+    are only saved to paths if named in save, and are released once no remaining
+    stage consumes them.
+
+    If a cache is passed, stages of CACHED_STAGES whose inputs, config sections
+    and code match an earlier run return that run's artifacts without importing
+    their inputs. Stages writing to the database always run.
+
+    Args:
+        mdl_config (dict) : Model pipeline configuration.
+        start (str) : First stage to run. See STAGES.
+        end (str) : Last stage to run. See STAGES.
+        paths (dict[str:str]) : Location of artifacts to import or save, by artifact name.
+                                See STAGE_INPUTS and STAGE_OUTPUTS.
+        save (list[str], Optional) : Artifacts to save to paths. Defaults to None.
+        engine_string (str, Optional) : SQL Alchemy database URI path to record scaling
+                                        ranges and model coefficients in. Defaults to None.
+        file_format (str, Optional) : Storage format of data artifacts after raw.
+                                      Defaults to None, inferred from file extension.
+        cache (StageCache, Optional) : Cache of stage artifacts. Defaults to None, no caching.
+
+    Returns:
+        dict: artifacts produced by the last stage
+
+    """
+    stages = select_stages(start, end)
+    save = set(save or [])
+    # Artifacts no stage of the run produces must be imported
+    produced : typing.Set[str] = set()
+    for stage in stages:
+        for name in STAGE_INPUTS[stage]:
+            if name not in produced and not paths.get(name):
+                logger.error("A location of %s is required to run stage %s.", name, stage)
+                raise ValueError(f"A location of {name} is required to run stage {stage}.")
+        produced.update(STAGE_OUTPUTS[stage])
+
+    artifacts : typing.Dict[str, typing.Any] = {}
+    outputs : typing.Dict[str, typing.Any] = {}
+    fingerprints : typing.Dict[str, str] = {} # Of artifacts, by name; see StageCache.key
+    for position, stage in enumerate(stages):
+        key = None
+        inputs = STAGE_INPUTS[stage] + [name for name in STAGE_OPTIONAL_INPUTS.get(stage, [])
+                                        if name in produced_by(stages[:position]) or paths.get(name)]
+        if cache is not None and stage in CACHED_STAGES \
+                and not (engine_string is not None and stage in DATABASE_STAGES):
+            for name in inputs:
+                if name not in fingerprints and name not in produced_by(stages[:position]):
+                    fingerprints[name] = cache.fingerprint_file(paths[name])
+            if all(name in fingerprints for name in inputs):
+                key = cache.key(stage,
+                                {name: fingerprints[name] for name in inputs},
+                                {section: mdl_config.get(section) for section in STAGE_CONFIG_SECTIONS[stage]},
+                                STAGE_MODULES[stage])
+
+        try:
+            with profiling.stage(stage, STAGE_MODULES[stage]) as stage_entry:
+                cached = cache.load(key) if cache is not None and key is not None else None
+                if cached is not None:
+                    logger.info("Stage %s loaded from cache.", stage)
+                    stage_entry["cached"] = True
+                    outputs = cached
+                else:
+                    streamed = [name for name in streamed_inputs(stage, mdl_config) if name not in artifacts]
+                    for name in inputs:
+                        if name not in artifacts:
+                            artifacts[name] = load_artifact(name, paths[name], mdl_config, file_format,
+                                                            streamed = name in streamed)
+                    logger.info("Running stage %s...", stage)
+                    outputs = STAGE_FUNCTIONS[stage](artifacts,
+                                                     mdl_config,
+                                                     engine_string = engine_string,
+                                                     paths = paths)
+                    for name in streamed: # Consumed; imported again if a later stage reads it
+                        del artifacts[name]
+                    if cache is not None and key is not None:
+                        cache.store(key, outputs)
+                if key is not None:
+                    fingerprints.update({name: f"{key}:{name}" for name in outputs})
+                for name, artifact in outputs.items():
+                    if name in save:
+                        save_artifact(name, artifact, paths[name], file_format, mdl_config)
+        except Exception:
+            logger.error("Stage %s did not complete.", stage)
+            raise
+        artifacts.update(outputs)
+
+        # Release artifacts no remaining stage consumes
+        remaining = set(itertools.chain.from_iterable(STAGE_INPUTS[later] + STAGE_OPTIONAL_INPUTS.get(later, [])
+                                                      for later in stages[position + 1:]))
+        for name in list(artifacts):
+            if name not in remaining:
+                del artifacts[name]
+        logger.info("Stage %s complete.", stage)
+
+    return outputs
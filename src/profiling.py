@@ -0,0 +1,219 @@
+"""
+Module instruments model pipeline functions with wall time, CPU time and peak
+memory, and reports them per run.
+
+Functions decorated with profiled are only measured while a Profiler is active,
+and otherwise cost a single check per call.
+"""
+
+import typing
+import logging
+import contextlib
+import datetime
+import functools
+import importlib
+import json
+import os
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Profiler measuring decorated functions, if any
+_ACTIVE : typing.Optional["Profiler"] = None
+
+class Profiler:
+    """
+    Measures pipeline stages and decorated functions while active.
+
+    Peak memory is the most memory allocated through Python (including numpy and
+    pandas buffers) at once during a call, above what was allocated when the call
+    began. It is traced with tracemalloc, which slows allocation-heavy code, so it
+    can be turned off with trace_memory.
+
+    Args:
+        trace_memory (bool) : Whether to measure peak memory. Defaults to True.
+        pstats_path (str, Optional) : Location to dump cProfile stats of the run to.
+                                      Defaults to None, no cProfile.
+    """
+
+    def __init__(self, trace_memory : bool = True, pstats_path : typing.Optional[str] = None):
+        self.trace_memory = trace_memory
+        self.pstats_path = pstats_path
+        self.stages : typing.List[typing.Dict[str, typing.Any]] = []
+        self.functions : typing.Dict[typing.Tuple[typing.Optional[str], str], typing.Dict[str, typing.Any]] = {}
+        self._current_stage : typing.Optional[str] = None
+        self._current_entry : typing.Optional[typing.Dict[str, typing.Any]] = None
+        self._peaks : typing.List[int] = [] # Peak of each measurement in progress, innermost last
+        self._profile = None
+        self._started = None
+
+    def __enter__(self) -> "Profiler":
+        global _ACTIVE
+        self._started = datetime.datetime.now()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.pstats_path is not None:
+            import cProfile # Only required for pstats dumps
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        _ACTIVE = self
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _ACTIVE
+        _ACTIVE = None
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.pstats_path)
+            logger.info("Profile stats saved to %s.", self.pstats_path)
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def measure(self) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """
+        Measures the enclosed block.
+
+        Yields a dict that is filled with wall_s, cpu_s and peak_mb once the block
+        exits, even if it raises. Blocks may be nested; an outer block's peak
+        includes those of the blocks it encloses.
+        """
+        measurement : typing.Dict[str, typing.Any] = {}
+        start_memory = 0
+        if self.trace_memory:
+            start_memory, peak = tracemalloc.get_traced_memory()
+            if self._peaks: # Keep the enclosing block's peak so far before resetting it
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(start_memory)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield measurement
+        finally:
+            measurement["wall_s"] = time.perf_counter() - wall_start
+            measurement["cpu_s"] = time.process_time() - cpu_start
+            if self.trace_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                measurement["peak_mb"] = (peak - start_memory) / 1e6
+
+    @contextlib.contextmanager
+    def stage(self, name : str) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """Measures a pipeline stage; functions called within it are attributed to it."""
+        entry : typing.Dict[str, typing.Any] = {"stage": name}
+        self._current_stage, self._current_entry = name, entry
+        try:
+            with self.measure() as measurement:
+                yield entry
+        finally:
+            self._current_stage, self._current_entry = None, None
+            self.stages.append({**entry, **measurement})
+
+    def call(self, func : typing.Callable, *args, **kwargs) -> typing.Any:
+        """Calls func, adding its measurements to the totals of func in the current stage."""
+        name = f"{func.__module__}.{func.__qualname__}"
+        totals = self.functions.setdefault((self._current_stage, name),
+                                           {"function": name, "stage": self._current_stage,
+                                            "calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+        try:
+            with self.measure() as measurement:
+                return func(*args, **kwargs)
+        finally:
+            totals["calls"] += 1
+            totals["wall_s"] += measurement["wall_s"]
+            totals["cpu_s"] += measurement["cpu_s"]
+            if "peak_mb" in measurement:
+                totals["peak_mb"] = max(totals.get("peak_mb", 0.0), measurement["peak_mb"])
+
+    def report(self, **metadata) -> typing.Dict[str, typing.Any]:
+        """
+        Returns measurements of the run.
+
+        Args:
+            **metadata : Details of the run to include, such as its steps and inputs.
+
+        Returns:
+            dict: started timestamp, one entry per stage in order of execution, and
+                  totals per function and stage sorted by wall time
+        """
+        functions = sorted(self.functions.values(), key=lambda totals: totals["wall_s"], reverse=True)
+        return {"started": self._started.isoformat(timespec="seconds") if self._started else None,
+                **metadata,
+                "trace_memory": self.trace_memory,
+                "stages": [_rounded(entry) for entry in self.stages],
+                "functions": [_rounded(totals) for totals in functions]}
+
+    def write_report(self, file_path : str, **metadata) -> None:
+        """
+        Saves report of the run as json. See report.
+
+        Args:
+            file_path (str) : Location to save report.
+            **metadata : Details of the run to include.
+
+        Returns:
+            None
+        """
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as report_file:
+            json.dump(self.report(**metadata), report_file, indent=2)
+        logger.info("Profile report saved to %s.", file_path)
+
+def _rounded(entry : typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    """Rounds measurements of a report entry."""
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in entry.items()}
+
+def profiled(func : typing.Callable) -> typing.Callable:
+    """
+    Decorates a function to be measured while a Profiler is active.
+
+    Args:
+        func (function) : Function to measure.
+
+    Returns:
+        function: wrapped function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _ACTIVE is None:
+            return func(*args, **kwargs)
+        return _ACTIVE.call(func, *args, **kwargs)
+    return wrapper
+
+@contextlib.contextmanager
+def stage(name : str, modules : typing.Iterable[str] = ()) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    """
+    Measures a pipeline stage if a Profiler is active.
+
+    The modules the stage runs are imported first and their import time reported
+    apart, as import_s, so that it does not hide the time of the stage's work.
+    Yields a dict that extra fields of the stage's report entry, such as whether
+    it was cached, can be added to.
+
+    Args:
+        name (str) : Stage name.
+        modules (list[str]) : Modules the stage runs. Defaults to none.
+    """
+    if _ACTIVE is None:
+        yield {}
+    else:
+        tracing = tracemalloc.is_tracing()
+        if tracing: # Tracing slows imports many times over; stages measure memory from their start
+            tracemalloc.stop()
+        import_start = time.perf_counter()
+        for module in modules:
+            importlib.import_module(module)
+        import_s = time.perf_counter() - import_start
+        if tracing:
+            tracemalloc.start()
+        with _ACTIVE.stage(name) as entry:
+            entry["import_s"] = import_s
+            yield entry
+
+def annotate(**fields) -> None:
+    """Adds fields, such as bytes allocated, to the report entry of the current stage if a Profiler is active."""
+    if _ACTIVE is not None and _ACTIVE._current_entry is not None:
+        _ACTIVE._current_entry.update(fields)
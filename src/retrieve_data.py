@@ -2,23 +2,501 @@
 Module retrieves PLACES data from API, uploads to S3, and imports from S3.
 """
 
+import typing
 import logging
 import time
+import collections
+import concurrent.futures
+import functools
+import itertools
+import json
+import threading
 
 import requests
+import fsspec
+import fsspec.core
 import pandas as pd
-import botocore
-import boto3
+import botocore.exceptions
 from sodapy import Socrata
 
+from src.file_format import infer_file_format
+
 logger = logging.getLogger(__name__)
 
+PLACES_COLUMNS : typing.List[str] = ["StateDesc", "CountyName", "CountyFIPS", "LocationID",
+                                     "TotalPopulation", "Geolocation", "MeasureId", "Data_Value",
+                                     "Category", "Short_Question_Text", "Measure"]
+# Socrata returns every field as text; numeric fields are typed as each page arrives
+PLACES_NUMERIC_COLUMNS : typing.Dict[str, str] = {"CountyFIPS": "int64",
+                                                  "LocationID": "int64",
+                                                  "TotalPopulation": "int64",
+                                                  "Data_Value": "float64"}
+# Throttled or temporarily unavailable responses are retried like connection errors
+RETRY_STATUS_CODES : typing.Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+def build_places_condition(year : str = "2019",
+                           since : typing.Optional[str] = None) -> str:
+    """
+    Builds SoQL where condition selecting PLACES rows.
+
+    Without since, rows of the given release year are selected. With since,
+    only rows added or revised after that timestamp are selected, from the
+    given year onward, so new releases are picked up by incremental ingests.
+
+    Args:
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        since (str, Optional) : Socrata :updated_at timestamp of the last ingest.
+                                Defaults to None.
+
+    Returns:
+        str: SoQL where condition
+
+    """
+    if since is None:
+        return f"""year = "{year}"
+        and data_value is not null"""
+    return f"""year >= "{year}"
+        and data_value is not null
+        and :updated_at > '{since}'"""
+
+def build_places_query(year : str = "2019",
+                       limit : int = 3000000,
+                       offset : typing.Optional[int] = None,
+                       since : typing.Optional[str] = None) -> str:
+    """
+    Builds SoQL query selecting the PLACES columns used by the pipeline.
+
+    When an offset is provided, results are ordered by LocationID and MeasureId
+    so consecutive $limit/$offset pages neither overlap nor skip rows.
+    Incremental queries (see build_places_condition) also select Year so rows
+    of several releases can be told apart.
+
+    Args:
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        limit (int) : Maximum number of rows returned by the query.
+                      Defaults to 3000000.
+        offset (int, Optional) : Number of rows to skip for paginated requests.
+                                 Defaults to None.
+        since (str, Optional) : Socrata :updated_at timestamp of the last ingest.
+                                Defaults to None.
+
+    Returns:
+        str: SoQL query
+
+    """
+    columns = PLACES_COLUMNS if since is None else PLACES_COLUMNS + ["Year"]
+    socrata_query = f"""
+    select
+        {", ".join(columns)}
+    where
+        {build_places_condition(year, since)}
+    """
+    if offset is not None:
+        socrata_query += f"""order by {"LocationID, MeasureId" if since is None else "LocationID, MeasureId, Year"}
+    limit {limit}
+    offset {offset}
+    """
+    else:
+        socrata_query += f"""limit {limit}
+    """
+    return socrata_query
+
+def build_count_query(year : str = "2019",
+                      since : typing.Optional[str] = None) -> str:
+    """
+    Builds SoQL query counting the PLACES rows selected by build_places_query.
+
+    Args:
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        since (str, Optional) : Socrata :updated_at timestamp of the last ingest.
+                                Defaults to None.
+
+    Returns:
+        str: SoQL query
+
+    """
+    return f"""
+    select
+        count(*) as row_count
+    where
+        {build_places_condition(year, since)}
+    """
+
+def build_high_water_mark_query(year : str = "2019",
+                                since : typing.Optional[str] = None) -> str:
+    """
+    Builds SoQL query returning the latest :updated_at timestamp and release year
+    of the PLACES rows selected by build_places_query.
+
+    Args:
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        since (str, Optional) : Socrata :updated_at timestamp of the last ingest.
+                                Defaults to None.
+
+    Returns:
+        str: SoQL query
+
+    """
+    return f"""
+    select
+        max(:updated_at) as max_updated_at,
+        max(year) as max_year
+    where
+        {build_places_condition(year, since)}
+    """
+
+def make_places_client(url : str,
+                       app_token : typing.Optional[str],
+                       socrata_username : typing.Optional[str] = None,
+                       socrata_password : typing.Optional[str] = None,
+                       uri_prefix : str = "https://",
+                       timeout : float = 60) -> Socrata:
+    """
+    Creates Socrata client for the PLACES API.
+
+    Args:
+        url (str) : Website location or IP Address to retrieve data
+        app_token (str, Optional) : API token
+        socrata_username (str, Optional) : Username for PLACES API
+        socrata_password (str, Optional) : Password of PLACES API
+        uri_prefix (str) : Scheme used to reach url, such as "http://" for a local server.
+                           Defaults to "https://".
+        timeout (float) : Seconds to wait for each response.
+                          Defaults to 60.
+
+    Returns:
+        Socrata client object
+
+    """
+    session_adapter = None
+    if uri_prefix != "https://":
+        session_adapter = {"prefix": uri_prefix,
+                           "adapter": requests.adapters.HTTPAdapter()}
+    return Socrata(url,
+                   app_token,
+                   socrata_username,
+                   socrata_password,
+                   session_adapter = session_adapter,
+                   timeout = timeout)
+
+def format_places_page(records : typing.List[typing.Dict],
+                       start : int = 0) -> pd.DataFrame:
+    """
+    Converts one page of Socrata records into a typed dataframe.
+
+    Numeric PLACES fields are converted from text as the page arrives so
+    only compact columnar chunks, not the raw records, are held in memory.
+
+    Args:
+        records (list[dict]) : Records returned by a Socrata get request.
+        start (int) : Row number of the first record within the full query.
+                      Used as the starting index of the page.
+                      Defaults to 0.
+
+    Returns:
+        pandas dataframe: page of PLACES data
+
+    """
+    page_df = pd.DataFrame.from_records(records)
+    for col, dtype in PLACES_NUMERIC_COLUMNS.items():
+        if col in page_df.columns:
+            page_df[col] = pd.to_numeric(page_df[col]).astype(dtype)
+    page_df.index = pd.RangeIndex(start, start + len(page_df))
+    return page_df
+
+def get_places_page(client : Socrata,
+                    dataset_identifier : str,
+                    socrata_query : str,
+                    attempts : int = 4,
+                    backoff : float = 1) -> typing.List[typing.Dict]:
+    """
+    Requests one SoQL query from Socrata, retrying with exponential backoff.
+
+    Connection errors, timeouts and throttled or unavailable responses
+    (HTTP 429 and 5xx) are retried. Other HTTP errors are raised immediately.
+
+    Args:
+        client (Socrata) : Socrata client object.
+        dataset_identifier (str) : Keyword phrase corresponding to PLACES schema.
+        socrata_query (str) : SoQL query to request.
+        attempts (int) : Number of tries to to attempt API request before termination.
+                         Must be at least 1.
+        backoff (float) : Seconds to wait before the first retry (doubles with each retry).
+                          Defaults to 1.
+
+    Returns:
+        list[dict]: records returned by the request
+
+    """
+    if attempts < 1:
+        logger.error("At least one attempt must be made to request data.")
+        raise ValueError("At least one attempt must be made to request data.")
+    wait = backoff
+    for i in range(attempts):
+        try:
+            records : typing.List[typing.Dict] = client.get(dataset_identifier,
+                                                            query = socrata_query,
+                                                            exclude_system_fields = True)
+        except (ConnectionError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as c_err:
+            err : Exception = c_err
+        except requests.exceptions.HTTPError as h_err:
+            if h_err.response is None or h_err.response.status_code not in RETRY_STATUS_CODES:
+                raise
+            err = h_err
+        else:
+            return records
+
+        if i + 1 < attempts:
+            logger.warning("There was a connection error during attempt %i of %i: %s. "
+                           "Waiting %.1f seconds then trying again.",
+                           i + 1, attempts, err, wait)
+            time.sleep(wait)
+            wait = wait * 2
+        else:
+            logger.error(
+                "Exiting. There was a connection error."
+                "The maximum number of attempts (%i) have been made to connect."
+                "Please check your connection then try again.",
+                attempts)
+            raise requests.exceptions.ConnectionError("There was a connection error.") from err
+
+def count_places_rows(client : Socrata,
+                      dataset_identifier : str = "cwsq-ngmh",
+                      year : str = "2019",
+                      attempts : int = 4,
+                      backoff : float = 1,
+                      since : typing.Optional[str] = None) -> int:
+    """
+    Counts the PLACES rows available for the requested year.
+
+    Args:
+        client (Socrata) : Socrata client object.
+        dataset_identifier (str) : Keyword phrase corresponding to PLACES schema.
+                                   Defaults to "cwsq-ngmh".
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        attempts (int) : Number of tries to to attempt API request before termination
+        backoff (float) : Seconds to wait before the first retry (doubles with each retry).
+                          Defaults to 1.
+        since (str, Optional) : Only count rows updated after this Socrata :updated_at timestamp.
+                                Defaults to None.
+
+    Returns:
+        int: number of rows
+
+    """
+    result = get_places_page(client, dataset_identifier, build_count_query(year, since), attempts, backoff)
+    return int(result[0]["row_count"])
+
+def get_high_water_mark(client : Socrata,
+                        dataset_identifier : str = "cwsq-ngmh",
+                        year : str = "2019",
+                        attempts : int = 4,
+                        backoff : float = 1,
+                        since : typing.Optional[str] = None) -> typing.Dict[str, typing.Optional[str]]:
+    """
+    Retrieves the latest :updated_at timestamp and release year of the selected PLACES rows.
+
+    Args:
+        client (Socrata) : Socrata client object.
+        dataset_identifier (str) : Keyword phrase corresponding to PLACES schema.
+                                   Defaults to "cwsq-ngmh".
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        attempts (int) : Number of tries to to attempt API request before termination
+        backoff (float) : Seconds to wait before the first retry (doubles with each retry).
+                          Defaults to 1.
+        since (str, Optional) : Only consider rows updated after this Socrata :updated_at timestamp.
+                                Defaults to None.
+
+    Returns:
+        dict: "updated_at" and "year" of the latest rows; values are None if no rows are selected
+
+    """
+    result = get_places_page(client, dataset_identifier, build_high_water_mark_query(year, since),
+                             attempts, backoff)
+    return {"updated_at": result[0].get("max_updated_at") if result else None,
+            "year": result[0].get("max_year") if result else None}
+
+class PageCheckpoint:
+    """
+    Persists retrieved PLACES pages so an interrupted ingest can resume.
+
+    Pages are saved as csv files named by their row offset within
+    checkpoint_dir, alongside a manifest describing the query they belong to.
+    Local and S3 locations are supported.
+
+    Args:
+        checkpoint_dir (str) : Location to save pages, such as "<output>.checkpoint".
+        query (dict) : Parameters identifying the query (dataset, year, page size).
+                       Pages saved for a different query are never reused.
+        resume (bool) : Whether pages saved by a previous attempt may be reused.
+                        If False, existing pages are removed.
+    """
+
+    def __init__(self,
+                 checkpoint_dir : str,
+                 query : typing.Dict[str, typing.Any],
+                 resume : bool = False):
+        self.fs, _, (self.root,) = fsspec.core.get_fs_token_paths(checkpoint_dir)
+        self.query = query
+        self.resume = resume
+        self.saved_offsets : typing.Set[int] = set()
+
+    def _page_path(self, offset : int) -> str:
+        return f"{self.root}/page_{offset:012d}.csv"
+
+    def start(self, total_rows : int) -> None:
+        """
+        Prepares checkpoint directory for a query returning total_rows rows.
+
+        Saved pages are kept only when resuming the same query over the same
+        number of rows; otherwise the directory is cleared.
+
+        Args:
+            total_rows (int) : Number of rows available for the query.
+
+        Returns:
+            None
+        """
+        manifest = dict(self.query, total_rows=total_rows)
+        manifest_path = f"{self.root}/manifest.json"
+        if self.resume and self.fs.exists(manifest_path):
+            with self.fs.open(manifest_path, "r") as manifest_handle:
+                saved_manifest = json.load(manifest_handle)
+            if saved_manifest == manifest:
+                self.saved_offsets = {int(path.rsplit("_", 1)[-1].split(".")[0])
+                                      for path in self.fs.glob(f"{self.root}/page_*.csv")}
+                logger.info("Resuming ingest; %i page(s) already retrieved.", len(self.saved_offsets))
+                return
+            logger.warning("Saved pages belong to a different query or dataset size; starting over.")
+        self.clear()
+        self.fs.makedirs(self.root, exist_ok=True)
+        with self.fs.open(manifest_path, "w") as manifest_handle:
+            json.dump(manifest, manifest_handle)
+
+    def has(self, offset : int) -> bool:
+        """Whether the page starting at offset has been saved."""
+        return offset in self.saved_offsets
+
+    def load(self, offset : int) -> pd.DataFrame:
+        """Reads the saved page starting at offset."""
+        with self.fs.open(self._page_path(offset), "r") as page_handle:
+            return pd.read_csv(page_handle, index_col=0)
+
+    def save(self, offset : int, page_df : pd.DataFrame) -> None:
+        """Saves the page starting at offset; the page only counts as saved once fully written."""
+        tmp_path = self._page_path(offset) + ".tmp"
+        with self.fs.open(tmp_path, "w") as page_handle:
+            page_df.to_csv(page_handle)
+        self.fs.mv(tmp_path, self._page_path(offset))
+        self.saved_offsets.add(offset)
+
+    def clear(self) -> None:
+        """Removes checkpoint directory and all saved pages."""
+        if self.fs.exists(self.root):
+            self.fs.rm(self.root, recursive=True)
+        self.saved_offsets = set()
+
+def iter_places_pages(client_factory : typing.Callable[[], Socrata],
+                      dataset_identifier : str = "cwsq-ngmh",
+                      page_size : int = 50000,
+                      year : str = "2019",
+                      attempts : int = 4,
+                      backoff : float = 1,
+                      max_workers : int = 1,
+                      checkpoint : typing.Optional[PageCheckpoint] = None,
+                      since : typing.Optional[str] = None) -> typing.Iterator[pd.DataFrame]:
+    """
+    Yields PLACES data one $limit/$offset page at a time, in order.
+
+    The total row count is requested first and up to max_workers pages are
+    then fetched concurrently from a thread pool, each with its own client and
+    retries. At most 2 * max_workers pages are held in memory at once, and
+    each page is converted to a typed dataframe as it arrives.
+
+    If a checkpoint is provided, each retrieved page is saved to it and pages
+    already saved by a previous attempt are read back instead of requested.
+
+    Args:
+        client_factory (callable) : Creates a Socrata client; called once per thread.
+                                    See make_places_client.
+        dataset_identifier (str) : Keyword phrase corresponding to PLACES schema.
+                                   Defaults to "cwsq-ngmh".
+        page_size (int) : Number of rows requested per page.
+                          Defaults to 50000.
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        attempts (int) : Number of tries to to attempt each page request before termination
+        backoff (float) : Seconds to wait before the first retry of a page (doubles with each retry).
+                          Defaults to 1.
+        max_workers (int) : Maximum number of pages requested concurrently.
+                            Defaults to 1.
+        checkpoint (PageCheckpoint, Optional) : Location to save and reuse retrieved pages.
+                                                Defaults to None.
+        since (str, Optional) : Only request rows updated after this Socrata :updated_at timestamp.
+                                See build_places_condition. Defaults to None.
+
+    Yields:
+        pandas dataframe: page of PLACES data
+
+    """
+    thread_clients = threading.local()
+
+    def fetch_page(offset : int) -> pd.DataFrame:
+        if checkpoint is not None and checkpoint.has(offset):
+            return checkpoint.load(offset)
+        if not hasattr(thread_clients, "client"): # requests sessions are not shared across threads
+            thread_clients.client = client_factory()
+        records = get_places_page(thread_clients.client,
+                                  dataset_identifier,
+                                  build_places_query(year, page_size, offset, since),
+                                  attempts,
+                                  backoff)
+        logger.debug("Retrieved rows %i to %i.", offset, offset + len(records))
+        page_df = format_places_page(records, start = offset)
+        if checkpoint is not None:
+            checkpoint.save(offset, page_df)
+        return page_df
+
+    total_rows = count_places_rows(client_factory(), dataset_identifier, year, attempts, backoff, since)
+    if checkpoint is not None:
+        checkpoint.start(total_rows)
+    logger.info("%i rows available; requesting %i pages with %i worker(s).",
+                total_rows, -(-total_rows // page_size), max_workers)
+    offsets = iter(range(0, total_rows, page_size))
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max_workers) as executor:
+        pending : typing.Deque[concurrent.futures.Future] = collections.deque(
+            executor.submit(fetch_page, offset) for offset in itertools.islice(offsets, 2 * max_workers))
+        try:
+            while pending:
+                page_df = pending.popleft().result()
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    pending.append(executor.submit(fetch_page, next_offset))
+                if len(page_df) > 0:
+                    yield page_df
+        finally:
+            for future in pending: # Stop queued requests if a page fails or the consumer stops
+                future.cancel()
+
 def import_places_api(url : str,
                       app_token : str,
                       socrata_username : str,
                       socrata_password : str,
                       dataset_identifier : str = "cwsq-ngmh",
-                      attempts : int = 4) -> pd.DataFrame:
+                      attempts : int = 4,
+                      page_size : typing.Optional[int] = None,
+                      year : str = "2019",
+                      max_workers : int = 1,
+                      backoff : float = 1,
+                      uri_prefix : str = "https://") -> pd.DataFrame:
     """
     Retrieves CDC PLACES data via Socrata API.
 
@@ -28,6 +506,10 @@ def import_places_api(url : str,
     "TotalPopulation", "Geolocation", "MeasureId", "Data_Value",
     "Category", "Short_Question_Text", "Measure".
 
+    If page_size is provided, data is requested in $limit/$offset pages, up to
+    max_workers at once, that are typed as they arrive and concatenated once all
+    pages are retrieved.
+
     Args:
         url (str) : Website location or IP Address to retrieve data
         app_token (str) : API token
@@ -35,85 +517,401 @@ def import_places_api(url : str,
         socrata_password (str) : Password of PLACES API
         socrata_dataset_identifier (str) : Keyword phrase corresponding to PLACES schema.
                                            Defaults to "cwsq-ngmh".
-        attempts (int) : Number of tries to to attempt API request before termination
+        attempts (int) : Number of tries to to attempt each API request before termination
+        page_size (int, Optional) : Number of rows requested per page.
+                                    Defaults to None, a single request for all rows.
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        max_workers (int) : Maximum number of pages requested concurrently.
+                            Defaults to 1.
+        backoff (float) : Seconds to wait before the first retry of a request.
+                          Defaults to 1.
+        uri_prefix (str) : Scheme used to reach url. Defaults to "https://".
 
     Returns:
         pandas dataframe: PLACES data from API
 
     """
     data_df = pd.DataFrame() # empty dataframe to capture api data
-    wait = 5 # seconds to wait between api call (increases exponentially)
-    for i in range(attempts):
-        try:
-            client = Socrata(url,
-                             app_token,
-                             socrata_username,
-                             socrata_password)
-
-            socrata_query : str = """
-            select 
-                StateDesc,
-                CountyName,
-                CountyFIPS,
-                LocationID,
-                TotalPopulation,
-                Geolocation,
-                MeasureId,
-                Data_Value,
-                Category,
-                Short_Question_Text,
-                Measure
-            where
-                year = "2019"
-                and data_value is not null
-            limit 3000000
-            """
-            # API suggestions sourced from https://dev.socrata.com/foundry/chronicdata.cdc.gov/cwsq-ngmh
-            logger.info("Retrieving data...could take a few minutes...")
-            data : list[list[str]] = client.get(dataset_identifier,
-                                                query = socrata_query,
-                                                exclude_system_fields = True)
-            data_df : pd.DataFrame = pd.DataFrame.from_records(data)
-            logger.info("API connection successful. %i rows of SHAPE data imported.", data_df.shape[0])
-
-        except ConnectionError as c_err:
-            if i + 1 < attempts:
-                logger.warning("There was a connection error during attempt %i of %i. "
-                               "Waiting %i seconds then trying again.",
-                               i + 1, attempts, wait)
-                time.sleep(wait)
-                wait = wait * 2
-            else:
-                logger.error(
-                    "Exiting. There was a connection error."
-                    "The maximum number of attempts (%i) have been made to connect."
-                    "Please check your connection then try again.",
-                    attempts)
-                raise requests.exceptions.ConnectionError("There was a connection error.") from c_err
-        except requests.exceptions.HTTPError as h_err:
-            logger.error("An error has occurred with the socrata_dataset_identifier or query."
-                         "Please review the SOCRATA (get) request.")
-            raise requests.exceptions.HTTPError from h_err
-        except Exception as e:
-            logger.error("Exiting due to error: %s", e)
-            raise Exception from e
+    client_factory = functools.partial(make_places_client,
+                                       url,
+                                       app_token,
+                                       socrata_username,
+                                       socrata_password,
+                                       uri_prefix)
+    try:
+        # API suggestions sourced from https://dev.socrata.com/foundry/chronicdata.cdc.gov/cwsq-ngmh
+        logger.info("Retrieving data...could take a few minutes...")
+        if page_size:
+            pages = list(iter_places_pages(client_factory, dataset_identifier, page_size, year,
+                                           attempts, backoff, max_workers))
+            if len(pages) > 0:
+                data_df = pd.concat(pages, axis=0)
         else:
-            break
+            data : typing.List[typing.Dict] = get_places_page(client_factory(),
+                                                              dataset_identifier,
+                                                              build_places_query(year),
+                                                              attempts,
+                                                              backoff)
+            data_df = pd.DataFrame.from_records(data)
+        logger.info("API connection successful. %i rows of SHAPE data imported.", data_df.shape[0])
+    except requests.exceptions.ConnectionError:
+        raise
+    except requests.exceptions.HTTPError as h_err:
+        logger.error("An error has occurred with the socrata_dataset_identifier or query."
+                     "Please review the SOCRATA (get) request.")
+        raise requests.exceptions.HTTPError from h_err
+    except Exception as e:
+        logger.error("Exiting due to error: %s", e)
+        raise Exception from e
 
     return data_df
 
+class PageFileWriter:
+    """
+    Appends pages of PLACES data to an open csv, Parquet or Arrow IPC file.
+
+    For columnar formats the first page determines the file schema, and
+    Geolocation points are stored as text, matching their csv representation.
+
+    Args:
+        file_handle (file object) : Open file to write to; binary for columnar formats.
+        file_format (str) : "csv", "parquet" or "arrow". See infer_file_format.
+        sep (str) : Delimeter character of csv files.
+                    Defaults to ",".
+    """
+
+    def __init__(self,
+                 file_handle : typing.IO,
+                 file_format : str,
+                 sep : str = ","):
+        self.file_handle = file_handle
+        self.file_format = file_format
+        self.sep = sep
+        self.writer : typing.Any = None
+        self.schema : typing.Any = None
+        self.row_count = 0
+
+    def write(self, page_df : pd.DataFrame) -> None:
+        """Appends page_df to the file."""
+        if self.file_format == "csv":
+            page_df.to_csv(self.file_handle, sep=self.sep, header=self.row_count == 0)
+        else:
+            import pyarrow as pa # Only required for columnar formats
+            import pyarrow.parquet
+
+            if "Geolocation" in page_df.columns:
+                page_df = page_df.astype({"Geolocation": str})
+            table = pa.Table.from_pandas(page_df, schema=self.schema, preserve_index=False)
+            if self.writer is None:
+                self.schema = table.schema
+                if self.file_format == "parquet":
+                    self.writer = pyarrow.parquet.ParquetWriter(self.file_handle, self.schema)
+                else:
+                    self.writer = pa.ipc.new_file(self.file_handle, self.schema)
+            self.writer.write_table(table)
+        self.row_count += page_df.shape[0]
+
+    def close(self) -> None:
+        """Finalizes columnar files; the file handle itself is left open."""
+        if self.writer is not None:
+            self.writer.close()
+
+def stream_places_api(save_file_path : str,
+                      url : str,
+                      app_token : str,
+                      socrata_username : str,
+                      socrata_password : str,
+                      dataset_identifier : str = "cwsq-ngmh",
+                      attempts : int = 4,
+                      page_size : typing.Optional[int] = 50000,
+                      year : str = "2019",
+                      max_workers : int = 1,
+                      backoff : float = 1,
+                      uri_prefix : str = "https://",
+                      sep : str = ",",
+                      checkpoint_dir : typing.Optional[str] = None,
+                      resume : bool = False) -> int:
+    """
+    Retrieves CDC PLACES data via Socrata API and streams it to file page by page.
+
+    Up to max_workers $limit/$offset pages are requested at once; each page is
+    typed and appended to save_file_path in order, so peak memory stays flat
+    regardless of dataset size. The resulting csv has the same layout as
+    upload_file of import_places_api.
+
+    If checkpoint_dir is provided, every retrieved page is also saved there until
+    the file is complete. When resume is True, pages saved by a failed attempt
+    are reused so only the missing pages are requested.
+
+    Args:
+        save_file_path (str) : Url to save file, such as s3 bucket address.
+        url (str) : Website location or IP Address to retrieve data
+        app_token (str) : API token
+        socrata_username (str) : Username for PLACES API
+        socrata_password (str) : Password of PLACES API
+        socrata_dataset_identifier (str) : Keyword phrase corresponding to PLACES schema.
+                                           Defaults to "cwsq-ngmh".
+        attempts (int) : Number of tries to to attempt each page request before termination
+        page_size (int, Optional) : Number of rows requested per page.
+                                    Defaults to 50000.
+        year (str) : PLACES release year to select.
+                     Defaults to "2019".
+        max_workers (int) : Maximum number of pages requested concurrently.
+                            Defaults to 1.
+        backoff (float) : Seconds to wait before the first retry of a page.
+                          Defaults to 1.
+        uri_prefix (str) : Scheme used to reach url. Defaults to "https://".
+        sep (str) : Delimeter character.
+                    Defaults to ",".
+        checkpoint_dir (str, Optional) : Location to save retrieved pages.
+                                         Defaults to None, no checkpoints.
+        resume (bool) : Whether to reuse pages saved in checkpoint_dir by a previous attempt.
+                        Defaults to False.
+
+    Returns:
+        int: number of rows written
+
+    """
+    row_count = 0
+    client_factory = functools.partial(make_places_client,
+                                       url,
+                                       app_token,
+                                       socrata_username,
+                                       socrata_password,
+                                       uri_prefix)
+    try:
+        checkpoint = None
+        if checkpoint_dir is not None:
+            checkpoint = PageCheckpoint(checkpoint_dir,
+                                        {"dataset_identifier": dataset_identifier,
+                                         "year": str(year),
+                                         "page_size": page_size or 50000},
+                                        resume)
+        elif resume:
+            logger.warning("No checkpoint location provided; unable to resume.")
+        logger.info("Streaming data to %s...could take a few minutes...", save_file_path)
+        file_format = infer_file_format(save_file_path)
+        with fsspec.open(save_file_path, "w" if file_format == "csv" else "wb") as file_handle:
+            writer = PageFileWriter(file_handle, file_format, sep)
+            for page_df in iter_places_pages(client_factory, dataset_identifier, page_size or 50000, year,
+                                             attempts, backoff, max_workers, checkpoint):
+                writer.write(page_df)
+            writer.close()
+            row_count = writer.row_count
+        if checkpoint is not None: # File complete; saved pages no longer needed
+            checkpoint.clear()
+        logger.info("API connection successful. %i rows of SHAPE data streamed.", row_count)
+    except requests.exceptions.ConnectionError:
+        raise
+    except requests.exceptions.HTTPError as h_err:
+        logger.error("An error has occurred with the socrata_dataset_identifier or query."
+                     "Please review the SOCRATA (get) request.")
+        raise requests.exceptions.HTTPError from h_err
+    except botocore.exceptions.NoCredentialsError:  # type: ignore
+        logger.error(
+            "Please provide credentials AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY env variables."
+            )
+        raise
+    except FileNotFoundError as f_err:
+        logger.error("Please provide a valid file location to persist data.")
+        raise FileNotFoundError("Please provide a valid file location to persist data.") from f_err
+    except Exception as e:
+        logger.error("Exiting due to error: %s", e)
+        raise Exception from e
+
+    return row_count
+
+
+def merge_places_delta(save_file_path : str,
+                       delta_df : pd.DataFrame,
+                       keys : typing.Optional[typing.List[str]] = None,
+                       sep : str = ",",
+                       chunksize : int = 500000) -> int:
+    """
+    Merges new and revised PLACES rows into an existing raw data file.
+
+    Rows of the file whose keys appear in delta_df are replaced by the delta rows;
+    remaining delta rows are appended. If delta_df holds several release years
+    for a key, the latest year is kept. The file is rewritten chunk by chunk so
+    it is never fully loaded into memory.
+
+    Args:
+        save_file_path (str) : Url of the raw data file, such as s3 bucket address.
+        delta_df (pandas dataframe) : New or revised rows. See iter_places_pages with since.
+        keys (list[str], Optional) : Columns identifying a row.
+                                     Defaults to ["LocationID", "MeasureId"].
+        sep (str) : Delimeter character.
+                    Defaults to ",".
+        chunksize (int) : Number of rows of the existing file processed at once.
+                          Defaults to 500000.
+
+    Returns:
+        int: number of rows in merged file
+
+    """
+    if keys is None:
+        keys = ["LocationID", "MeasureId"]
+    if "Year" in delta_df.columns: # Keep latest release per key
+        delta_df = delta_df.sort_values("Year", kind="stable").drop(columns="Year")
+    delta_df = delta_df.drop_duplicates(keys, keep="last")
+    delta_keys = pd.MultiIndex.from_frame(delta_df[keys])
+
+    fs, _, (raw_path,) = fsspec.core.get_fs_token_paths(save_file_path)
+    tmp_path = raw_path + ".tmp"
+    row_count = 0
+    replaced_count = 0
+    columns = delta_df.columns
+    with fs.open(raw_path, "r") as raw_handle, fs.open(tmp_path, "w") as merged_handle:
+        for chunk in pd.read_csv(raw_handle, index_col=0, sep=sep, chunksize=chunksize):
+            columns = chunk.columns
+            replaced = pd.MultiIndex.from_frame(chunk[keys]).isin(delta_keys)
+            chunk = chunk.loc[~replaced]
+            chunk.index = pd.RangeIndex(row_count, row_count + len(chunk))
+            chunk.to_csv(merged_handle, sep=sep, header=row_count == 0)
+            row_count += len(chunk)
+            replaced_count += int(replaced.sum())
+        delta_df = delta_df.reindex(columns=columns)
+        delta_df.index = pd.RangeIndex(row_count, row_count + len(delta_df))
+        delta_df.to_csv(merged_handle, sep=sep, header=row_count == 0)
+        row_count += len(delta_df)
+    fs.mv(tmp_path, raw_path)
+    logger.info("%i rows revised and %i rows added to %s.",
+                replaced_count, len(delta_df) - replaced_count, save_file_path)
+    return row_count
+
+def update_places_api(save_file_path : str,
+                      url : str,
+                      app_token : str,
+                      socrata_username : str,
+                      socrata_password : str,
+                      dataset_identifier : str = "cwsq-ngmh",
+                      attempts : int = 4,
+                      page_size : typing.Optional[int] = 50000,
+                      year : str = "2019",
+                      max_workers : int = 1,
+                      backoff : float = 1,
+                      uri_prefix : str = "https://",
+                      sep : str = ",",
+                      checkpoint_dir : typing.Optional[str] = None,
+                      resume : bool = False,
+                      state_path : typing.Optional[str] = None) -> int:
+    """
+    Incrementally refreshes a raw PLACES data file via Socrata API.
+
+    The latest Socrata :updated_at timestamp and release year ingested (the
+    high-water mark) are recorded in state_path. If no state or file exists,
+    all data is streamed to save_file_path (see stream_places_api). Otherwise
+    only rows added or revised since the high-water mark, including rows of
+    newer release years, are requested and merged into the file keyed on
+    LocationID and MeasureId (see merge_places_delta).
+
+    Args:
+        save_file_path (str) : Url of the raw data file, such as s3 bucket address.
+        url (str) : Website location or IP Address to retrieve data
+        app_token (str) : API token
+        socrata_username (str) : Username for PLACES API
+        socrata_password (str) : Password of PLACES API
+        socrata_dataset_identifier (str) : Keyword phrase corresponding to PLACES schema.
+                                           Defaults to "cwsq-ngmh".
+        attempts (int) : Number of tries to to attempt each page request before termination
+        page_size (int, Optional) : Number of rows requested per page.
+                                    Defaults to 50000.
+        year (str) : PLACES release year of the initial ingest.
+                     Defaults to "2019".
+        max_workers (int) : Maximum number of pages requested concurrently.
+                            Defaults to 1.
+        backoff (float) : Seconds to wait before the first retry of a page.
+                          Defaults to 1.
+        uri_prefix (str) : Scheme used to reach url. Defaults to "https://".
+        sep (str) : Delimeter character.
+                    Defaults to ",".
+        checkpoint_dir (str, Optional) : Location to save retrieved pages of a full ingest.
+                                         Defaults to None, no checkpoints.
+        resume (bool) : Whether to reuse pages saved in checkpoint_dir by a previous attempt.
+                        Defaults to False.
+        state_path (str, Optional) : Location of the high-water mark.
+                                     Defaults to "<save_file_path>.state.json".
+
+    Returns:
+        int: number of rows written or merged
+
+    """
+    if infer_file_format(save_file_path) != "csv":
+        logger.error("Incremental ingest requires a csv file.")
+        raise ValueError("Incremental ingest requires a csv file.")
+    if state_path is None:
+        state_path = save_file_path + ".state.json"
+    client_factory = functools.partial(make_places_client,
+                                       url,
+                                       app_token,
+                                       socrata_username,
+                                       socrata_password,
+                                       uri_prefix)
+    fs, _, (state_root,) = fsspec.core.get_fs_token_paths(state_path)
+    raw_fs, _, (raw_path,) = fsspec.core.get_fs_token_paths(save_file_path)
+    state = None
+    if fs.exists(state_root) and raw_fs.exists(raw_path):
+        with fs.open(state_root, "r") as state_handle:
+            state = json.load(state_handle)
+        if state.get("dataset_identifier") != dataset_identifier or state.get("updated_at") is None:
+            logger.warning("No usable high-water mark recorded; retrieving all data.")
+            state = None
+
+    try:
+        if state is None:
+            # Mark is taken before retrieving so rows revised meanwhile are requested again next time
+            high_water_mark = get_high_water_mark(client_factory(), dataset_identifier, str(year),
+                                                  attempts, backoff)
+            row_count = stream_places_api(save_file_path, url, app_token, socrata_username, socrata_password,
+                                          dataset_identifier, attempts, page_size, year, max_workers,
+                                          backoff, uri_prefix, sep, checkpoint_dir, resume)
+        else:
+            logger.info("Requesting rows updated since %s.", state["updated_at"])
+            high_water_mark = get_high_water_mark(client_factory(), dataset_identifier, state["year"],
+                                                  attempts, backoff, state["updated_at"])
+            if high_water_mark["updated_at"] is None:
+                logger.info("No new or revised rows since %s.", state["updated_at"])
+                return 0
+            pages = list(iter_places_pages(client_factory, dataset_identifier, page_size or 50000,
+                                           state["year"], attempts, backoff, max_workers,
+                                           since=state["updated_at"]))
+            row_count = 0
+            if len(pages) > 0:
+                row_count = merge_places_delta(save_file_path, pd.concat(pages, axis=0), sep=sep)
+            high_water_mark["year"] = max(state["year"], high_water_mark["year"] or state["year"])
+    except requests.exceptions.ConnectionError:
+        raise
+    except requests.exceptions.HTTPError as h_err:
+        logger.error("An error has occurred with the socrata_dataset_identifier or query."
+                     "Please review the SOCRATA (get) request.")
+        raise requests.exceptions.HTTPError from h_err
+
+    with fs.open(state_root, "w") as state_handle:
+        json.dump({"dataset_identifier": dataset_identifier,
+                   "updated_at": high_water_mark["updated_at"],
+                   "year": high_water_mark["year"] or str(year)}, state_handle)
+    logger.info("High-water mark recorded in %s.", state_path)
+    return row_count
 
 def upload_file(input_df : pd.DataFrame,
                 save_file_path : str,
-                sep : str = ",") -> None:
+                sep : str = ",",
+                file_format : typing.Optional[str] = None) -> None:
     """
     Uploads pandas dataframe to file path.
 
+    The storage format is determined by the file extension (see infer_file_format):
+    csv, Parquet (.parquet) or Arrow IPC (.arrow, .feather). Columnar formats keep
+    column data types and do not persist the dataframe index.
+
     Args:
-        input_df (pandas dataframe) : Dataframe to be uploaded as csv.
+        input_df (pandas dataframe) : Dataframe to be uploaded.
         save_file_path (str) : Url to save file, such as s3 bucket address.
-        sep (str) : Delimeter character.
+        sep (str) : Delimeter character of csv files.
                     Defaults to ",".
+        file_format (str, Optional) : "csv", "parquet" or "arrow", regardless of extension.
+                                      Defaults to None.
 
     Returns:
         None; uploads file to location
@@ -121,13 +919,18 @@ def upload_file(input_df : pd.DataFrame,
     """
 
     try:
-        input_df.to_csv(save_file_path, sep=sep)
-    except boto3.exceptions.NoCredentialsError as c_err:  # type: ignore
+        file_format = infer_file_format(save_file_path, file_format)
+        if file_format == "parquet":
+            input_df.to_parquet(save_file_path, index=False)
+        elif file_format == "arrow":
+            input_df.reset_index(drop=True).to_feather(save_file_path)
+        else:
+            input_df.to_csv(save_file_path, sep=sep)
+    except botocore.exceptions.NoCredentialsError:  # type: ignore
         logger.error(
             "Please provide credentials AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY env variables."
             )
-        raise boto3.exceptions.NoCredentialsError(  # type: ignore
-            "Missing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY credentials.") from c_err
+        raise
     except FileNotFoundError as f_err:
         logger.error("Please provide a valid file location to persist data.")
         raise FileNotFoundError("Please provide a valid file location to persist data.") from f_err
@@ -4,22 +4,31 @@ Module conducts predictive model training and provides trained model object.
 
 import typing
 import logging
+import concurrent.futures
+import json
+import os
 import pickle
+import tempfile
 
 import botocore
 import boto3
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.model_selection import GroupKFold, KFold
 import sqlalchemy as sql
 import sqlalchemy.exc
 import sqlalchemy.orm
 from sqlalchemy.ext.declarative import declarative_base
 
+from src.model_artifact import save_model
 from src.models import Parameters
+from src.profiling import profiled
 
 logger = logging.getLogger(__name__)
 
+COMPACT_EXTENSIONS = [".lm"]
+
 
 def create_params(engine : sql.engine.base.Engine,
                   params : typing.Dict):
@@ -76,6 +85,7 @@ def add_params(engine_string : str,
     create_params(engine,
                   params)
 
+@profiled
 def fit_model(places_df: pd.DataFrame,
               features : typing.List[str],
               response : str,
@@ -131,22 +141,173 @@ def fit_model(places_df: pd.DataFrame,
 
     return params, model
 
+class StreamingLinearRegression:
+    """
+    Linear regression fitted one chunk of rows at a time from sufficient statistics.
+
+    Each chunk updates the row count, the means of features and response, and
+    the centered cross-products XᵀX and Xᵀy, which are merged across chunks as
+    in the parallel algorithm of Chan et al. Memory is quadratic in the number
+    of features and independent of the number of rows. The normal equations are
+    solved once all chunks are seen, with an optional ridge penalty; without one,
+    coefficients are those of sklearn.linear_model.LinearRegression.
+
+    Args:
+        features (list[str]) : Column names to be used as feature set.
+        response (str) : Column name to be used as target variable.
+        fit_intercept (bool) : Whether to fit an intercept. Defaults to True.
+        alpha (float) : Ridge penalty on coefficients. Defaults to 0, none.
+    """
+
+    def __init__(self,
+                 features : typing.List[str],
+                 response : str,
+                 fit_intercept : bool = True,
+                 alpha : float = 0.0):
+        self.features = list(features)
+        self.response = response
+        self.fit_intercept = fit_intercept
+        self.alpha = alpha
+        self.n_rows = 0
+        self.mean_x = np.zeros(len(self.features))
+        self.mean_y = 0.0
+        self.xtx = np.zeros((len(self.features), len(self.features))) # Centered on mean_x
+        self.xty = np.zeros(len(self.features)) # Centered on mean_x and mean_y
+
+    def partial_fit(self, places_df : pd.DataFrame) -> "StreamingLinearRegression":
+        """
+        Adds rows of a chunk to the sufficient statistics.
+
+        Args:
+            places_df (dataframe) : Chunk of PLACES features and response.
+
+        Returns:
+            StreamingLinearRegression: self
+        """
+        if len(places_df) == 0:
+            return self
+        X = places_df[self.features].to_numpy(dtype=np.float64)
+        y = places_df[self.response].to_numpy(dtype=np.float64)
+        n_chunk = len(y)
+        mean_x, mean_y = X.mean(axis=0), y.mean()
+        X -= mean_x
+        n_total = self.n_rows + n_chunk
+        delta_x, delta_y = mean_x - self.mean_x, mean_y - self.mean_y
+        weight = self.n_rows * n_chunk / n_total
+        self.xtx += X.T @ X + weight * np.outer(delta_x, delta_x)
+        self.xty += X.T @ (y - mean_y) + weight * delta_x * delta_y
+        self.mean_x += delta_x * n_chunk / n_total
+        self.mean_y += delta_y * n_chunk / n_total
+        self.n_rows = n_total
+        return self
+
+    def solve(self) -> typing.Tuple[np.ndarray, float]:
+        """
+        Solves the normal equations of the rows seen.
+
+        Returns:
+            numpy array: coefficients, in order of features
+            float: intercept, 0 if not fit_intercept
+        """
+        if self.n_rows == 0:
+            logger.error("No rows have been seen to fit the model to.")
+            raise ValueError("No rows have been seen to fit the model to.")
+        xtx, xty = self.xtx, self.xty
+        if not self.fit_intercept: # Uncentered cross-products
+            xtx = xtx + self.n_rows * np.outer(self.mean_x, self.mean_x)
+            xty = xty + self.n_rows * self.mean_x * self.mean_y
+        # Least-squares solution is the minimum-norm one if features are collinear, as in sklearn
+        coef = np.linalg.lstsq(xtx + self.alpha * np.eye(len(self.features)), xty, rcond=None)[0]
+        intercept = float(self.mean_y - self.mean_x @ coef) if self.fit_intercept else 0.0
+        return coef, intercept
+
+    def to_model(self) -> typing.Union[LinearRegression, Ridge]:
+        """Returns sklearn model with the solved coefficients, to be saved and scored as a fitted model."""
+        coef, intercept = self.solve()
+        model = Ridge(alpha=self.alpha, fit_intercept=self.fit_intercept) if self.alpha \
+            else LinearRegression(fit_intercept=self.fit_intercept)
+        model.coef_, model.intercept_ = coef, intercept
+        model.feature_names_in_ = np.array(self.features, dtype=object)
+        model.n_features_in_ = len(self.features)
+        return model
+
+@profiled
+def fit_model_streaming(chunks : typing.Iterable[pd.DataFrame],
+                        features : typing.List[str],
+                        response : str,
+                        method : typing.Optional[str] = None,
+                        alpha : float = 0.0,
+                        fit_intercept : bool = True) -> typing.Tuple[typing.Dict, typing.Union[LinearRegression, Ridge]]:
+    """
+    Trains linear regression on chunks of data and returns coefficients of linear model.
+
+    Only one chunk is held in memory at a time. See StreamingLinearRegression.
+
+    Args:
+        chunks (iterable[dataframe]) : Chunks of PLACES features and response for training.
+        features (list[str]) : Column names in dataframe to be used as feature set.
+        response (str) : Column name in dataframe to be used as target variable.
+        method (str, optional) : Name of model to use in training, for information purposes only.
+        alpha (float) : Ridge penalty on coefficients. Defaults to 0, none.
+        fit_intercept (bool) : Whether to fit an intercept. Defaults to True.
+
+    Returns:
+        Dict of coefficient name : values
+        Trained LinearRegression, or Ridge if alpha, model object
+
+    """
+    logger.info("%s model training on chunks...", method or "")
+    regression = StreamingLinearRegression(features, response, fit_intercept, alpha)
+    try:
+        for chunk in chunks:
+            regression.partial_fit(chunk)
+    except KeyError as k_err:
+        logger.error("Provided column names could not be found.")
+        raise KeyError("Provided column names could not be found.") from k_err
+    model = regression.to_model()
+    logger.info("Model trained on %i rows.", regression.n_rows)
+
+    # package all parameters into dict
+    # parameter table requires all lowercase
+    params = dict(zip([x.lower() for x in features], model.coef_))
+    params["intercept"] = model.intercept_
+    logger.info("Model coefficients successfully captured.")
+    return params, model
+
 def dump_model(trained_model : LinearRegression,
-               save_path_name : str) -> None:
+               save_path_name : str,
+               model_format : typing.Optional[str] = None,
+               metadata : typing.Optional[typing.Dict[str, typing.Any]] = None) -> None:
 
     """
-    Pickles models and saves as trained model object.
+    Saves trained model object, pickled or in compact format.
+
+    The compact format holds only the coefficients, intercept, feature names and
+    metadata of a linear model, and is imported with NumPy alone.
+    See src.model_artifact.
 
     Args:
         instant_model (regressor object) : Trained model to be saved.
         save_path_name (str) : Path and filename to save model object.
+        model_format (str, Optional) : "pickle" or "compact". Defaults to None, "compact"
+                                       for COMPACT_EXTENSIONS and "pickle" otherwise.
+        metadata (dict, Optional) : Details recorded with a compact model, such as
+                                    the response transform. Defaults to None.
     Returns:
         None; saves model to file
     """
 
+    if model_format is None:
+        model_format = "compact" if os.path.splitext(save_path_name)[1] in COMPACT_EXTENSIONS else "pickle"
+    if model_format not in ["pickle", "compact"]:
+        logger.error("Model format must be pickle or compact.")
+        raise ValueError("Model format must be pickle or compact.")
     try:
-        with open(save_path_name, "wb") as model_handle:
-            pickle.dump(trained_model, model_handle)
+        if model_format == "compact":
+            save_model(trained_model, save_path_name, metadata)
+        else:
+            with open(save_path_name, "wb") as model_handle:
+                pickle.dump(trained_model, model_handle)
     except FileNotFoundError as f_err:
         logger.error("Please provide a valid file path.")
         raise FileNotFoundError("Please provide a valid file path.") from f_err
@@ -161,3 +322,171 @@ def dump_model(trained_model : LinearRegression,
         raise e
     else:
         logger.info("Model successfully saved.")
+
+def assign_folds(n_rows : int,
+                 n_splits : int = 5,
+                 groups : typing.Optional[pd.Series] = None,
+                 shuffle : bool = True,
+                 random_state : typing.Optional[int] = 42) -> np.ndarray:
+    """
+    Assigns each row to the fold it is held out in during cross-validation.
+
+    Args:
+        n_rows (int) : Number of rows.
+        n_splits (int) : Number of folds.
+        groups (series, Optional) : Group of each row, such as its state. Rows of a group are
+                                    held out together. Defaults to None, K-fold of rows.
+        shuffle (bool) : Whether to shuffle rows before K-fold. Defaults to True.
+        random_state (int, Optional) : Random seed of shuffle.
+
+    Returns:
+        numpy array: fold of each row, in the smallest integer type that holds n_splits - 1
+    """
+    if groups is not None:
+        splitter = GroupKFold(n_splits=n_splits)
+    else:
+        splitter = KFold(n_splits=n_splits, shuffle=shuffle, random_state=random_state if shuffle else None)
+    folds = np.empty(n_rows, dtype=np.min_scalar_type(max(n_splits - 1, 0)))
+    try:
+        for fold, (_, test_rows) in enumerate(splitter.split(np.empty((n_rows, 0)), groups=groups)):
+            folds[test_rows] = fold
+    except ValueError as v_err:
+        logger.error("Folds could not be assigned: %s", v_err)
+        raise ValueError(f"Folds could not be assigned: {v_err}") from v_err
+    return folds
+
+def memmap_data(places_df : pd.DataFrame,
+                features : typing.List[str],
+                response : str,
+                data_dir : str,
+                **arrays : np.ndarray) -> None:
+    """
+    Writes features, response and other arrays to .npy files that processes can memory-map.
+
+    Features are written one column at a time, so they are never all copied in memory.
+
+    Args:
+        places_df (dataframe) : Dataframe of PLACES features and response.
+        features (list[str]) : Column names written, in order, to X.npy.
+        response (str) : Column name written to y.npy.
+        data_dir (str) : Directory to write files to.
+        arrays (dict) : Further arrays, written to <name>.npy.
+
+    Returns:
+        None
+    """
+    X = np.lib.format.open_memmap(os.path.join(data_dir, "X.npy"), mode="w+",
+                                  dtype=np.float64, shape=(len(places_df), len(features)))
+    for position, col in enumerate(features):
+        X[:, position] = places_df[col].to_numpy()
+    X.flush()
+    del X
+    np.save(os.path.join(data_dir, "y.npy"), places_df[response].to_numpy(dtype=np.float64))
+    for name, array in arrays.items():
+        np.save(os.path.join(data_dir, name + ".npy"), array)
+
+def _fit_fold(data_dir : str,
+              fold : int,
+              features : typing.List[str],
+              **kwargs) -> typing.Dict[str, typing.Any]:
+    """
+    Fits model holding out a fold of the data memory-mapped in data_dir, and measures its error.
+
+    Selecting the training rows copies them from the memory-mapped file, so each
+    process holds a full copy of its training fold while it fits.
+    """
+    X = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    train_rows = np.load(os.path.join(data_dir, "folds.npy"), mmap_mode="r") != fold
+    model = LinearRegression(**kwargs).fit(X[train_rows], y[train_rows])
+    residuals = y[~train_rows] - model.predict(X[~train_rows])
+    return {"fold": fold,
+            "train_rows": int(train_rows.sum()),
+            "test_rows": int((~train_rows).sum()),
+            "rmse": float(np.sqrt(np.mean(residuals ** 2))),
+            "params": {**dict(zip([x.lower() for x in features], model.coef_.tolist())),
+                       "intercept": float(model.intercept_)}}
+
+@profiled
+def cross_validate(places_df : pd.DataFrame,
+                   features : typing.List[str],
+                   response : str,
+                   n_splits : int = 5,
+                   groups : typing.Optional[pd.Series] = None,
+                   shuffle : bool = True,
+                   random_state : typing.Optional[int] = 42,
+                   n_jobs : typing.Optional[int] = None,
+                   **kwargs) -> typing.Dict[str, typing.Any]:
+    """
+    Estimates error and coefficients of the model by K-fold cross-validation.
+
+    Folds are fitted in parallel by a pool of processes. Features and response
+    are written once to memory-mapped files that every process reads, rather
+    than copied to each process with its task. Each process still copies the
+    training rows of the fold it fits, so peak memory is about n_jobs training
+    folds, (n_splits - 1) / n_splits of the features each.
+
+    Args:
+        places_df (dataframe) : Dataframe of PLACES features and response.
+        features (list[str]) : Column names in dataframe to be used as feature set.
+        response (str) : Column name in dataframe to be used as target variable.
+        n_splits (int) : Number of folds.
+        groups (series, Optional) : Group of each row, such as its state. See assign_folds.
+        shuffle (bool) : Whether to shuffle rows before K-fold. Defaults to True.
+        random_state (int, Optional) : Random seed of shuffle.
+        n_jobs (int, Optional) : Number of processes. Defaults to None, one per fold up to
+                                 the number of CPUs. 1 fits folds in this process.
+        kwargs (dict) : Additional parameters of sklearn.linear_model.LinearRegression.
+
+    Returns:
+        dict: RMSE and params of each fold, and their mean and standard deviation
+    """
+    folds = assign_folds(len(places_df), n_splits, groups, shuffle, random_state)
+    n_jobs = n_jobs or min(n_splits, os.cpu_count() or 1)
+    logger.info("Cross-validating %i folds in %i processes...", n_splits, n_jobs)
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            memmap_data(places_df, features, response, data_dir, folds=folds)
+            if n_jobs == 1:
+                results = [_fit_fold(data_dir, fold, features, **kwargs) for fold in range(n_splits)]
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                    futures = [executor.submit(_fit_fold, data_dir, fold, features, **kwargs)
+                               for fold in range(n_splits)]
+                    results = [future.result() for future in futures]
+    except TypeError as t_err:
+        logger.error("Params and columns must be valid for sklearn.linear_model.LinearRegression")
+        raise TypeError("Params and columns must be valid for sklearn.linear_model.LinearRegression") from t_err
+    except KeyError as k_err:
+        logger.error("Provided column names could not be found.")
+        raise KeyError("Provided column names could not be found.") from k_err
+
+    rmse = np.array([result["rmse"] for result in results])
+    params = pd.DataFrame([result["params"] for result in results])
+    logger.info("Cross-validated RMSE is %.4f (standard deviation %.4f).", rmse.mean(), rmse.std(ddof=1))
+    return {"n_splits": n_splits,
+            "grouped": groups is not None,
+            "rmse_mean": float(rmse.mean()),
+            "rmse_std": float(rmse.std(ddof=1)),
+            "params_mean": params.mean().to_dict(),
+            "params_std": params.std().to_dict(),
+            "folds": results}
+
+def dump_cv_results(results : typing.Dict[str, typing.Any],
+                    save_path_name : str) -> None:
+    """
+    Saves cross-validation results as json. See cross_validate.
+
+    Args:
+        results (dict) : Cross-validation results.
+        save_path_name (str) : Path and filename to save results.
+    Returns:
+        None; saves results to file
+    """
+    try:
+        with open(save_path_name, "w") as results_handle:
+            json.dump(results, results_handle, indent=2)
+    except FileNotFoundError as f_err:
+        logger.error("Please provide a valid file path.")
+        raise FileNotFoundError("Please provide a valid file path.") from f_err
+    logger.info("Cross-validation results saved to %s.", save_path_name)
@@ -4,33 +4,54 @@ Module conducts test set predictions using imported trained model object.
 
 import logging
 import typing
+import collections
+import concurrent.futures
+import os
 import pickle
 
 import botocore
 import boto3
+import fsspec
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
+
+from src.clean import import_file_chunks
+from src.file_format import infer_file_format
+from src.model_artifact import is_compact_model, load_model
+from src.profiling import profiled
 
 logger = logging.getLogger(__name__)
 
-def import_model(save_path_name : str) -> LinearRegression:
+MODEL_EXTENSIONS = [".lm", ".sav", ".pkl"]
+
+def import_model(save_path_name : str) -> typing.Any:
 
     """
     Imports trained model object from path.
 
+    The format is detected from the file: a compact model (see src.model_artifact)
+    is imported with NumPy alone, its coefficients memory-mapped, and otherwise
+    the file is unpickled. Only unpickle files from trusted sources.
+
     Args:
         save_path_name (str) : Path and filename of saved model object.
 
     Returns:
-        Trained LinearRegression model object
+        Trained LinearRegression model object, or LinearModel if compact
     """
 
     try:
-        with open(save_path_name, "rb") as model_handle:
-            trained_model : LinearRegression = pickle.load(model_handle)
+        if is_compact_model(save_path_name):
+            trained_model = load_model(save_path_name)
+        else:
+            with open(save_path_name, "rb") as model_handle:
+                trained_model = pickle.load(model_handle)
     except FileNotFoundError as f_err:
         logger.error("A valid file path and name must be provided.")
         raise FileNotFoundError("A valid file path and name must be provided.") from f_err
+    except ValueError as v_err:
+        logger.error("Model file is not a valid model: %s", v_err)
+        raise ValueError("Model file is not a valid model.") from v_err
     except boto3.exceptions.NoCredentialsError as c_err:  # type: ignore
         logger.error(
             "Please provide credentials AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY env variables."
@@ -44,13 +65,17 @@ def import_model(save_path_name : str) -> LinearRegression:
         logger.info("Model object imported into memory.")
         return trained_model
 
-def pred_responses(trained_model : LinearRegression,
+@profiled
+def pred_responses(trained_model : typing.Any,
                    test_df : pd.DataFrame,
                    features : typing.List[str]) -> pd.DataFrame:
 
     """
     Predicts responses of probabilities of X_test.
 
+    Models fitted on a dataframe are given the features they were fitted on,
+    such as a subset of features chosen by a sweep.
+
     Args:
         trained_model (classifier object) : Trained model to be saved.
         test_df (pandas dataframe) : Feature set to be used in predictions.
@@ -64,6 +89,7 @@ def pred_responses(trained_model : LinearRegression,
         logger.error("X_test must be a non-empty 2D dataset.")
         raise ValueError("X_test cannot be of length zero.")
     try:
+        features = list(getattr(trained_model, "feature_names_in_", features))
         test_df["predictions"] = trained_model.predict(test_df[features])
     except ValueError as v_err:
         logger.error("X_test should be 2D of feature values.")
@@ -73,3 +99,258 @@ def pred_responses(trained_model : LinearRegression,
         raise KeyError("The provided columns could not be found in the dataframe,") from k_err
 
     return test_df
+
+def linear_params(trained_model : typing.Any,
+                  features : typing.List[str]) -> typing.Tuple[np.ndarray, float, typing.List[str]]:
+    """
+    Returns coefficients, intercept and feature names of a fitted linear model.
+
+    Args:
+        trained_model (model object) : Fitted linear model, sklearn or LinearModel.
+        features (list[str]) : Columns to be used as model features, if the model has no feature names.
+
+    Returns:
+        numpy array: float64 coefficient of each feature
+        float: intercept
+        list[str]: feature names, in order of coefficients
+    """
+    try:
+        coef = np.asarray(trained_model.coef_, dtype=np.float64).ravel()
+        intercept = float(np.ravel(trained_model.intercept_)[0])
+    except AttributeError as a_err:
+        logger.error("Model must be a fitted linear model.")
+        raise TypeError("Model must be a fitted linear model.") from a_err
+    features = list(getattr(trained_model, "feature_names_in_", features))
+    if len(coef) != len(features):
+        logger.error("Model must have one coefficient per feature.")
+        raise ValueError("Model must have one coefficient per feature.")
+    return coef, intercept, features
+
+def load_models(model_paths : typing.List[str]) -> typing.Dict[str, typing.Any]:
+    """
+    Imports trained models, named by file, from files or directories of them.
+
+    Args:
+        model_paths (list[str]) : Model files, or directories whose MODEL_EXTENSIONS files are imported.
+
+    Returns:
+        dict: Key[str] is file name without extension. Value is trained model object. See import_model.
+    """
+    files = []
+    for model_path in model_paths:
+        if os.path.isdir(model_path):
+            files += sorted(os.path.join(model_path, name) for name in os.listdir(model_path)
+                            if os.path.splitext(name)[1] in MODEL_EXTENSIONS)
+        else:
+            files.append(model_path)
+    names = [os.path.splitext(os.path.basename(file))[0] for file in files]
+    if not files:
+        logger.error("No model files were found in %s.", model_paths)
+        raise FileNotFoundError(f"No model files were found in {model_paths}.")
+    if len(set(names)) != len(names):
+        logger.error("Model file names must be unique: %s.", names)
+        raise ValueError(f"Model file names must be unique: {names}.")
+    return {name: import_model(file) for name, file in zip(names, files)}
+
+def stack_models(trained_models : typing.Dict[str, typing.Any],
+                 features : typing.List[str]) -> typing.Tuple[np.ndarray, np.ndarray, typing.List[str]]:
+    """
+    Stacks coefficients of linear models into one matrix, so that X @ coef predicts with every model.
+
+    Models fitted on different features, such as subsets chosen by a sweep, are
+    given a coefficient of 0 for the features they were not fitted on.
+
+    Args:
+        trained_models (dict) : Key[str] is model name. Value is fitted linear model. See linear_params.
+        features (list[str]) : Columns to be used as model features, if a model has no feature names.
+
+    Returns:
+        numpy array: coefficients, one row per feature and one column per model
+        numpy array: intercept of each model
+        list[str]: feature names, in order of rows of coefficients
+    """
+    params = [linear_params(trained_model, features) for trained_model in trained_models.values()]
+    stacked_features = list(dict.fromkeys(feature for _, _, model_features in params for feature in model_features))
+    positions = {feature: position for position, feature in enumerate(stacked_features)}
+    coef = np.zeros((len(stacked_features), len(params)), dtype=np.float64)
+    for column, (model_coef, _, model_features) in enumerate(params):
+        coef[[positions[feature] for feature in model_features], column] = model_coef
+    return coef, np.array([intercept for _, intercept, _ in params]), stacked_features
+
+def score_chunk(chunk : pd.DataFrame,
+                coef : np.ndarray,
+                intercept : float,
+                features : typing.List[str],
+                keep : typing.Optional[typing.List[str]] = None,
+                logistic : bool = False,
+                test_only : bool = True,
+                names : typing.Optional[typing.List[str]] = None) -> pd.DataFrame:
+    """
+    Predicts responses of a chunk as X @ coef + intercept.
+
+    If coef is a matrix of several models (see stack_models), every model
+    predicts in one matrix product, and each is saved as a column of names.
+
+    Args:
+        chunk (pandas dataframe) : Rows of features, and of a training column if test_only.
+        coef (numpy array) : Coefficient of each feature, or matrix of coefficients of each model.
+        intercept (float or numpy array) : Intercept, or intercept of each model.
+        features (list[str]) : Columns of chunk, in order of coef.
+        keep (list[str], Optional) : Columns of chunk to return with predictions. Defaults to None.
+        logistic (bool) : Whether to return the logistic of predictions, such as proportions
+                          from predicted log-odds. Defaults to False.
+        test_only (bool) : Whether to only predict rows with training of 0. Defaults to True.
+        names (list[str], Optional) : Prediction column of each model, if coef is a matrix.
+                                      Defaults to None, a single predictions column.
+
+    Returns:
+        Pandas dataframe of kept columns and prediction columns, with the index of chunk
+    """
+    if test_only:
+        chunk = chunk.take(np.flatnonzero(chunk["training"].to_numpy() == 0))
+    predictions = chunk[features].to_numpy(dtype=np.float64) @ coef
+    predictions += intercept
+    if logistic:
+        np.negative(predictions, out=predictions)
+        np.exp(predictions, out=predictions)
+        predictions += 1
+        np.reciprocal(predictions, out=predictions)
+    scores = chunk[keep or []].copy()
+    if predictions.ndim == 1:
+        scores["predictions"] = predictions
+    else:
+        for name, model_predictions in zip(names or [], predictions.T):
+            scores[name] = model_predictions
+    return scores
+
+def _score_encoded(chunk : pd.DataFrame,
+                   file_format : str,
+                   **kwargs) -> typing.Union[str, pd.DataFrame]:
+    """Scores a chunk, see score_chunk, and encodes it as csv lines if file_format is csv."""
+    scores = score_chunk(chunk, **kwargs)
+    return scores.to_csv(header=False, index=False) if file_format == "csv" else scores
+
+class _ScoresWriter:
+    """Appends chunks of scores to a csv, Parquet or Arrow IPC file, opened at the first chunk."""
+
+    def __init__(self, file_path : str, file_format : str):
+        self.file_path = file_path
+        self.file_format = file_format
+        self.handle = None
+        self.writer = None
+
+    def write(self, scores : typing.Union[str, pd.DataFrame], columns : typing.List[str]) -> None:
+        """Writes a chunk of scores, encoded as csv lines for csv files."""
+        if self.file_format == "csv":
+            if self.handle is None:
+                self.handle = fsspec.open(self.file_path, "w").open()
+                self.handle.write(",".join(columns) + "\n")
+            self.handle.write(scores)
+            return
+        import pyarrow as pa # Only required for columnar formats
+        table = pa.Table.from_pandas(scores, preserve_index=False)
+        if self.writer is None:
+            self.handle = fsspec.open(self.file_path, "wb").open()
+            if self.file_format == "parquet":
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.handle, table.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.handle, table.schema)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        """Closes the file, if any chunk was written."""
+        if self.writer is not None:
+            self.writer.close()
+        if self.handle is not None:
+            self.handle.close()
+
+@profiled
+def score_batch(input_path : str,
+                output_path : str,
+                trained_model : typing.Any,
+                features : typing.List[str],
+                keep : typing.Optional[typing.List[str]] = None,
+                chunksize : int = 200000,
+                logistic : bool = False,
+                test_only : bool = True,
+                n_jobs : typing.Optional[int] = None,
+                file_format : typing.Optional[str] = None) -> int:
+    """
+    Predicts responses of a file chunk by chunk and streams them to another.
+
+    Only the features, kept columns and training column are read from the input,
+    chunksize rows at a time, and chunks are scored (see score_chunk) in this
+    process or, if n_jobs is more than 1, in a pool of n_jobs processes, to which
+    every chunk is pickled; only worth it when parsing and formatting, rather than
+    the matrix product, dominate. At most two chunks per process are read ahead
+    of the output, which is written in input order, so memory does not grow with
+    the input.
+
+    A dict of models is scored in the same pass, their coefficients stacked (see
+    stack_models), and saved as a predictions_<name> column for each model.
+
+    Args:
+        input_path (str) : Location of features, such as train_test data.
+        output_path (str) : Location to save scores, as csv, Parquet or Arrow IPC by extension.
+        trained_model (model object or dict) : Fitted linear model, see linear_params,
+                                               or dict of them by name, see load_models.
+        features (list[str]) : Columns to be used as model features.
+        keep (list[str], Optional) : Columns of input to save with predictions, such as
+                                     the response. Defaults to None.
+        chunksize (int) : Rows read and scored at a time. Defaults to 200000.
+        logistic (bool) : Whether to save the logistic of predictions. Defaults to False.
+        test_only (bool) : Whether to only score rows with training of 0. Defaults to True.
+        n_jobs (int, Optional) : Processes to score chunks in, if more than 1. Defaults to None,
+                                 scoring in this process.
+        file_format (str, Optional) : Storage format of input and output, regardless of extension.
+                                      Defaults to None, inferred from each file extension.
+
+    Returns:
+        int: number of rows scored
+    """
+    if isinstance(trained_model, dict):
+        coef, intercept, features = stack_models(trained_model, features)
+        names = [f"predictions_{name}" for name in trained_model]
+    else:
+        coef, intercept, features = linear_params(trained_model, features)
+        names = ["predictions"]
+    keep = [col for col in keep or [] if col not in features]
+    columns = features + keep + (["training"] if test_only and "training" not in keep else [])
+    output_format = infer_file_format(output_path, file_format)
+    kwargs = {"coef": coef, "intercept": intercept, "features": features,
+              "keep": keep, "logistic": logistic, "test_only": test_only, "names": names}
+    workers = n_jobs if n_jobs and n_jobs > 1 else 1 # Chunks are pickled to processes, so only if requested
+    chunks = import_file_chunks(input_path, columns, file_format=file_format, chunksize=chunksize)
+    writer = _ScoresWriter(output_path, output_format)
+    n_rows = 0
+
+    def write(scores : typing.Union[str, pd.DataFrame]) -> None:
+        nonlocal n_rows
+        n_rows += scores.count("\n") if isinstance(scores, str) else len(scores)
+        writer.write(scores, keep + names)
+
+    logger.info("Scoring %s in chunks of %i rows in %i processes...", input_path, chunksize, workers)
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                write(_score_encoded(chunk, output_format, **kwargs))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                pending : typing.Deque[concurrent.futures.Future] = collections.deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(_score_encoded, chunk, output_format, **kwargs))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    except KeyError as k_err:
+        logger.error("The provided columns could not be found in the dataframe.")
+        raise KeyError("The provided columns could not be found in the dataframe.") from k_err
+    finally:
+        writer.close()
+    if n_rows == 0:
+        logger.error("No rows were scored.")
+        raise ValueError("No rows were scored.")
+    logger.info("%i rows scored and saved to %s.", n_rows, output_path)
+    return n_rows
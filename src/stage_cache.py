@@ -0,0 +1,179 @@
+"""
+Module caches artifacts produced by model pipeline stages, addressed by a
+fingerprint of everything the stage's result depends on.
+"""
+
+import typing
+import logging
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import fsspec
+
+logger = logging.getLogger(__name__)
+
+def hash_file(file_path : str,
+              memo_path : typing.Optional[str] = None,
+              block_size : int = 1 << 20) -> str:
+    """
+    Computes SHA-256 hash of a file's contents.
+
+    Hashes of local files are memoized in memo_path by size and modification
+    time, so unchanged files are only read once.
+
+    Args:
+        file_path (str) : Url of s3 bucket or location of file.
+        memo_path (str, Optional) : Location of json memo of local file hashes.
+                                    Defaults to None, no memo.
+        block_size (int) : Bytes read at a time. Defaults to 1 MiB.
+
+    Returns:
+        str: hexadecimal hash
+
+    """
+    memo : typing.Dict[str, typing.Dict] = {}
+    stamp = None
+    if os.path.exists(file_path):
+        stat = os.stat(file_path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        if memo_path is not None and os.path.exists(memo_path):
+            with open(memo_path, "r") as memo_handle:
+                memo = json.load(memo_handle)
+            entry = memo.get(os.path.abspath(file_path))
+            if entry is not None and entry["stamp"] == stamp:
+                return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with fsspec.open(file_path, "rb") as file_handle:
+        for block in iter(lambda: file_handle.read(block_size), b""):
+            digest.update(block)
+    file_hash = digest.hexdigest()
+
+    if stamp is not None and memo_path is not None:
+        memo[os.path.abspath(file_path)] = {"stamp": stamp, "sha256": file_hash}
+        with open(memo_path + ".tmp", "w") as memo_handle:
+            json.dump(memo, memo_handle)
+        os.replace(memo_path + ".tmp", memo_path)
+    return file_hash
+
+def hash_modules(module_names : typing.Iterable[str]) -> str:
+    """
+    Computes SHA-256 hash of the source code of modules, without importing them.
+
+    Args:
+        module_names (list[str]) : Dotted names of modules, e.g. "src.clean".
+
+    Returns:
+        str: hexadecimal hash
+
+    """
+    digest = hashlib.sha256()
+    for module_name in sorted(module_names):
+        spec = importlib.util.find_spec(module_name)
+        if spec is None or spec.origin is None:
+            logger.error("Module %s could not be found.", module_name)
+            raise ModuleNotFoundError(f"Module {module_name} could not be found.")
+        with open(spec.origin, "rb") as source:
+            digest.update(module_name.encode() + b"\0" + source.read() + b"\0")
+    return digest.hexdigest()
+
+class StageCache:
+    """
+    Content-addressed store of stage artifacts.
+
+    A stage's key hashes its name, the fingerprints of its input artifacts, the
+    config sections it reads, and the source code of the modules it runs, so a
+    key only matches results the stage would reproduce. Artifacts are pickled
+    under cache_dir/<key>/.
+
+    Args:
+        cache_dir (str) : Local directory of cached artifacts.
+    """
+
+    def __init__(self, cache_dir : str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def fingerprint_file(self, file_path : str) -> str:
+        """Returns fingerprint of an artifact imported from file. See hash_file."""
+        return hash_file(file_path, memo_path=os.path.join(self.cache_dir, "file_hashes.json"))
+
+    @staticmethod
+    def key(stage : str,
+            input_fingerprints : typing.Dict[str, str],
+            config_sections : typing.Dict[str, typing.Any],
+            module_names : typing.Iterable[str]) -> str:
+        """
+        Computes the cache key of a stage run.
+
+        Args:
+            stage (str) : Stage name.
+            input_fingerprints (dict[str:str]) : Fingerprint of each input artifact, by name.
+            config_sections (dict) : Config sections the stage reads, by section name.
+            module_names (list[str]) : Modules whose code the stage runs.
+
+        Returns:
+            str: hexadecimal key
+        """
+        fingerprint = json.dumps({"stage": stage,
+                                  "inputs": input_fingerprints,
+                                  "config": config_sections,
+                                  "code": hash_modules(module_names)},
+                                 sort_keys=True, default=str)
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    def load(self, key : str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """
+        Imports artifacts cached under key.
+
+        Args:
+            key (str) : Cache key. See key.
+
+        Returns:
+            dict: artifacts by name, or None if nothing is cached under key
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry_dir):
+            return None
+        with open(os.path.join(entry_dir, "manifest.json"), "r") as manifest:
+            names = json.load(manifest)["artifacts"]
+        artifacts = {}
+        for name in names:
+            with open(os.path.join(entry_dir, name + ".pkl"), "rb") as artifact_handle:
+                artifacts[name] = pickle.load(artifact_handle)
+        return artifacts
+
+    def store(self, key : str, artifacts : typing.Dict[str, typing.Any]) -> None:
+        """
+        Caches artifacts under key.
+
+        Artifacts are written to a temporary directory that is then renamed, so an
+        interrupted write never leaves a partial entry.
+
+        Args:
+            key (str) : Cache key. See key.
+            artifacts (dict) : Artifacts by name.
+
+        Returns:
+            None
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.isdir(entry_dir):
+            return
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            for name, artifact in artifacts.items():
+                with open(os.path.join(tmp_dir, name + ".pkl"), "wb") as artifact_handle:
+                    pickle.dump(artifact, artifact_handle, protocol=pickle.HIGHEST_PROTOCOL)
+            with open(os.path.join(tmp_dir, "manifest.json"), "w") as manifest:
+                json.dump({"artifacts": list(artifacts)}, manifest)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(entry_dir): # Not stored by a concurrent run
+                raise
@@ -0,0 +1,185 @@
+"""
+Module fits a grid of models, estimators and feature subsets, in parallel and
+ranks them on a leaderboard by their error on the test set.
+"""
+
+import typing
+import logging
+import concurrent.futures
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn.linear_model
+from sklearn.model_selection import ParameterGrid
+
+from src.profiling import profiled
+from src.run_model import memmap_data
+from src.train_test_split import split_mask
+
+logger = logging.getLogger(__name__)
+
+def expand_grid(estimators : typing.Dict[str, typing.Optional[typing.Dict[str, typing.List]]],
+                features : typing.List[str],
+                feature_subsets : typing.Optional[typing.Dict[str, typing.Optional[typing.List[str]]]] = None
+                ) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+    Lists every combination of estimator, parameter values and feature subset.
+
+    Args:
+        estimators (dict) : Key[str] is name of a sklearn.linear_model estimator, such as Ridge.
+                            Value[dict] is list of values of each of its parameters, or None.
+        features (list[str]) : Column names of every feature.
+        feature_subsets (dict, Optional) : Key[str] is subset name. Value[list[str]] is features
+                                           of subset, or None for every feature.
+                                           Defaults to None, every feature.
+
+    Returns:
+        list[dict]: estimator, params, subset and features of each candidate model
+    """
+    feature_subsets = feature_subsets or {"all": None}
+    for subset, subset_features in feature_subsets.items():
+        unknown = set(subset_features or []) - set(features)
+        if unknown:
+            logger.error("Features %s of subset %s are not model features.", sorted(unknown), subset)
+            raise KeyError(f"Features {sorted(unknown)} of subset {subset} are not model features.")
+    for estimator in estimators:
+        if not hasattr(sklearn.linear_model, estimator):
+            logger.error("Estimator %s is not in sklearn.linear_model.", estimator)
+            raise ValueError(f"Estimator {estimator} is not in sklearn.linear_model.")
+    return [{"estimator": estimator,
+             "params": params,
+             "subset": subset,
+             "features": list(subset_features or features)}
+            for estimator, grid in estimators.items()
+            for params in ParameterGrid(grid or {})
+            for subset, subset_features in feature_subsets.items()]
+
+def plan_workers(n_candidates : int,
+                 job_bytes : int,
+                 n_jobs : typing.Optional[int] = None,
+                 memory_per_job_mb : typing.Optional[float] = None) -> int:
+    """
+    Returns the number of processes to fit candidates with, within CPUs and memory.
+
+    Each process is budgeted memory_per_job_mb, or the estimated job_bytes if not
+    given, and no more processes are started than fit in the memory available.
+
+    Args:
+        n_candidates (int) : Number of candidate models.
+        job_bytes (int) : Estimated bytes allocated to fit the largest candidate.
+        n_jobs (int, Optional) : Most processes. Defaults to None, the number of CPUs.
+        memory_per_job_mb (float, Optional) : Memory budget of each process in MB.
+                                              Defaults to None, job_bytes.
+
+    Returns:
+        int: number of processes
+    """
+    workers = min(n_jobs or os.cpu_count() or 1, n_candidates)
+    budget_bytes = memory_per_job_mb * 1e6 if memory_per_job_mb else job_bytes
+    if job_bytes > budget_bytes:
+        logger.warning("Fitting a model is estimated to need %.0f MB, over the %.0f MB budget of each job.",
+                       job_bytes / 1e6, budget_bytes / 1e6)
+    try: # Memory not yet in use; only reported on some platforms
+        available_bytes = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        available_bytes = None
+    if available_bytes is not None and budget_bytes > 0:
+        workers = min(workers, max(1, int(available_bytes // budget_bytes)))
+    return max(1, workers)
+
+def _limit_threads() -> None:
+    """Limits each process to one BLAS thread, so processes rather than threads share the CPUs."""
+    from threadpoolctl import threadpool_limits # Installed with scikit-learn
+    threadpool_limits(1)
+
+def _fit_candidate(data_dir : str,
+                   candidate : typing.Dict[str, typing.Any],
+                   features : typing.List[str]) -> typing.Tuple[typing.Dict[str, typing.Any], typing.Any]:
+    """Fits a candidate to training rows of the data memory-mapped in data_dir and measures its test error."""
+    X = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    training = np.load(os.path.join(data_dir, "training.npy"), mmap_mode="r")
+    columns = [features.index(col) for col in candidate["features"]]
+    start = time.perf_counter()
+    model = getattr(sklearn.linear_model, candidate["estimator"])(**candidate["params"])
+    model.fit(pd.DataFrame(X[training][:, columns], columns=candidate["features"]), y[training])
+    fit_s = time.perf_counter() - start
+    y_test = y[~training]
+    residuals = y_test - model.predict(pd.DataFrame(X[~training][:, columns], columns=candidate["features"]))
+    result = {"estimator": candidate["estimator"],
+              "params": candidate["params"],
+              "subset": candidate["subset"],
+              "n_features": len(columns),
+              "rmse": float(np.sqrt(np.mean(residuals ** 2))),
+              "r2": float(1 - np.sum(residuals ** 2) / np.sum((y_test - y_test.mean()) ** 2)),
+              "fit_s": fit_s}
+    return result, model
+
+@profiled
+def run_sweep(places_df : pd.DataFrame,
+              features : typing.List[str],
+              response : str,
+              estimators : typing.Dict[str, typing.Optional[typing.Dict[str, typing.List]]],
+              feature_subsets : typing.Optional[typing.Dict[str, typing.Optional[typing.List[str]]]] = None,
+              test_size : float = 0.3,
+              random_state : int = 42,
+              n_jobs : typing.Optional[int] = None,
+              memory_per_job_mb : typing.Optional[float] = None) -> typing.Tuple[pd.DataFrame, typing.Any]:
+    """
+    Fits every candidate model of a grid in parallel and ranks them by test set RMSE.
+
+    Candidates are fitted on the training rows of the same split as the train step
+    (see split_data) and scored on its test rows. Features and response are written
+    once to memory-mapped files read by every process, each using one BLAS thread.
+    See expand_grid and plan_workers.
+
+    Args:
+        places_df (dataframe) : Dataframe of PLACES features and response.
+        features (list[str]) : Column names of every feature.
+        response (str) : Column name in dataframe to be used as target variable.
+        estimators (dict) : Grid of estimators and their parameter values. See expand_grid.
+        feature_subsets (dict, Optional) : Feature subsets to fit each estimator on. See expand_grid.
+        test_size (float) : Proportion of data to be used as test set.
+        random_state (int) : Random seed of split.
+        n_jobs (int, Optional) : Most processes. Defaults to None, the number of CPUs.
+        memory_per_job_mb (float, Optional) : Memory budget of each process in MB.
+
+    Returns:
+        pandas dataframe: leaderboard of candidates, best first
+        Trained model object of best candidate
+    """
+    candidates = expand_grid(estimators, features, feature_subsets)
+    training = split_mask(len(places_df), test_size, random_state)
+    # The training rows of the largest subset are copied, and copied again by most estimators
+    job_bytes = int(training.sum()) * max(len(candidate["features"]) for candidate in candidates) * 8 * 2
+    workers = plan_workers(len(candidates), job_bytes, n_jobs, memory_per_job_mb)
+    logger.info("Fitting %i candidate models in %i processes...", len(candidates), workers)
+
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            memmap_data(places_df, features, response, data_dir, training=training)
+            if workers == 1:
+                fitted = [_fit_candidate(data_dir, candidate, features) for candidate in candidates]
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                            initializer=_limit_threads) as executor:
+                    futures = [executor.submit(_fit_candidate, data_dir, candidate, features)
+                               for candidate in candidates]
+                    fitted = [future.result() for future in futures]
+    except TypeError as t_err:
+        logger.error("Params must be valid for their sklearn.linear_model estimator.")
+        raise TypeError("Params must be valid for their sklearn.linear_model estimator.") from t_err
+    except KeyError as k_err:
+        logger.error("Provided column names could not be found.")
+        raise KeyError("Provided column names could not be found.") from k_err
+
+    leaderboard = pd.DataFrame([result for result, _ in fitted]).sort_values("rmse", kind="stable")
+    best_model = fitted[leaderboard.index[0]][1]
+    leaderboard = leaderboard.reset_index(drop=True)
+    leaderboard.insert(0, "rank", leaderboard.index + 1)
+    logger.info("Best model is %s %s on %s features, with test RMSE %.4f.",
+                *leaderboard.loc[0, ["estimator", "params", "subset", "rmse"]])
+    return leaderboard, best_model
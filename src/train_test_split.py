@@ -2,20 +2,92 @@
 Module splits training and testing datasets.
 """
 
+import typing
 import logging
+import math
+import numbers
 
+import numpy as np
 import pandas as pd
-import sklearn.model_selection
+
+from src.profiling import profiled
 
 logger = logging.getLogger(__name__)
 
+def split_indices(n_rows : int,
+                  test_size : float,
+                  random_state : int = 42) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns positions of training rows and of testing rows.
+
+    Rows are drawn as sklearn.model_selection.train_test_split draws them, so a
+    split of the same size and seed selects the same rows, without copying data.
+
+    Args:
+        n_rows (int) : Number of rows to split.
+        test_size (float) : Proportion of data to be used as test set.
+                            Value should be be between [0,1).
+                            If 0 is provided, every row is a training row, in order.
+        random_state (int) : Random seed
+
+    Returns:
+        numpy array: positions of training rows
+        numpy array: positions of testing rows
+    """
+    if isinstance(test_size, bool) or not isinstance(test_size, numbers.Real) \
+            or not isinstance(random_state, numbers.Integral):
+        logger.error("test_size must be a float and random_state an integer.")
+        raise TypeError("test_size must be a float and random_state an integer.")
+    if not 0 <= test_size < 1:
+        logger.error("Value of test_size must be between 0 and 1.")
+        raise ValueError("Value of test_size must be between 0 and 1.")
+    if n_rows < 1:
+        logger.error("At least one row is needed to split data.")
+        raise ValueError("At least one row is needed to split data.")
+    if test_size == 0:
+        return np.arange(n_rows), np.arange(0)
+    n_test = math.ceil(test_size * n_rows)
+    if n_test == n_rows:
+        logger.error("With %i rows, a test_size of %s leaves no training rows.", n_rows, test_size)
+        raise ValueError(f"With {n_rows} rows, a test_size of {test_size} leaves no training rows.")
+    permutation = np.random.RandomState(random_state).permutation(n_rows)
+    return permutation[n_test:], permutation[:n_test]
+
+def split_mask(n_rows : int,
+               test_size : float,
+               random_state : int = 42) -> np.ndarray:
+    """
+    Returns boolean mask of training rows. See split_indices.
+
+    Args:
+        n_rows (int) : Number of rows to split.
+        test_size (float) : Proportion of data to be used as test set.
+        random_state (int) : Random seed
+
+    Returns:
+        numpy array: True for training rows and False for testing rows
+    """
+    train_rows, _ = split_indices(n_rows, test_size, random_state)
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[train_rows] = True
+    return mask
+
+@profiled
 def split_data(places_df: pd.DataFrame,
                test_size : float,
-               random_state : int = 42) -> pd.DataFrame:
+               random_state : int = 42,
+               mask_only : bool = False) -> pd.DataFrame:
     """
     Adds a dummy (1/0) column to datafrme indicating training or testing set.
 
     New column `training` will have value 1 for training rows and 0 for testing rows.
+    Rows are copied once, with training rows first, so the training set is
+    the first rows of the result and can be selected as a view with iloc.
+    places_df is not modified.
+
+    If mask_only, only the `training` column is returned, as int8 in the order of
+    places_df, so that it can be saved, or used to select rows, without copying
+    the features.
 
     Args:
         places_df (dataframe) : Dataframe of features and target.
@@ -24,30 +96,23 @@ def split_data(places_df: pd.DataFrame,
                             Value should be be between [0,1).
                             If 0 is provided, `training` will only contain 1.
         random_state (int) : Random seed
+        mask_only (bool) : Whether to return only the `training` column. Defaults to False.
 
     Returns:
         pandas dataframe
     """
 
-    combined_df = pd.DataFrame()
-    places_df["training"] = 1
-    if test_size == 0:
-        combined_df = places_df.copy()
+    train_rows, test_rows = split_indices(len(places_df), test_size, random_state)
+    if len(test_rows) == 0:
         logger.warning("Test_size of 0 selected. All rows marked for training.")
     else:
-        try:
-            train, test = sklearn.model_selection.train_test_split(places_df,
-                                                                   test_size=test_size,
-                                                                   random_state=random_state)
-            logger.info("Training data has %i rows", len(train))
-            logger.info("Test data has %i rows", len(test))
-            test["training"] = 0
-            combined_df = pd.concat([train, test], axis=0)  # type: ignore
-        except TypeError as t_err:
-            logger.error("test_size must be a float and random_state an integer.")
-            raise TypeError("test_size must be a float and random_state an integer.") from t_err
-        except ValueError as v_err:
-            logger.error("Value of test_size must be between 0 and 1.")
-            raise ValueError("Value of test_size must be between 0 and 1.") from v_err
-
-    return combined_df  # type: ignore
+        logger.info("Training data has %i rows", len(train_rows))
+        logger.info("Test data has %i rows", len(test_rows))
+
+    if mask_only:
+        training = np.zeros(len(places_df), dtype=np.int8)
+        training[train_rows] = 1
+        return pd.DataFrame({"training": training}, index=places_df.index)
+    combined_df = places_df.take(np.concatenate([train_rows, test_rows]))
+    combined_df["training"] = np.repeat([1, 0], [len(train_rows), len(test_rows)])
+    return combined_df
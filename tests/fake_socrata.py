@@ -0,0 +1,142 @@
+"""
+Local stand-in for the Socrata API used to test and benchmark PLACES ingest offline.
+
+The server answers the SoQL queries built by src.retrieve_data (counts, high-water
+marks, and ordered $limit/$offset pages, optionally restricted to rows updated
+after a timestamp) from an in-memory list of records. It can add latency to every
+response and fail the first request for chosen offsets.
+"""
+
+import json
+import re
+import threading
+import time
+import typing
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_places_records(n_rows : int,
+                        year : str = "2019",
+                        updated_at : str = "2022-01-01T00:00:00.000Z",
+                        value_offset : float = 0) -> typing.List[typing.Dict]:
+    """
+    Creates PLACES-shaped records, as text, the way Socrata returns them.
+
+    Records also carry the Year and :updated_at fields used by incremental queries.
+
+    Args:
+        n_rows (int) : Number of records to create.
+        year (str) : Release year of the records.
+        updated_at (str) : Socrata :updated_at timestamp of the records.
+        value_offset (float) : Added to every Data_Value, to mimic revised values.
+
+    Returns:
+        list[dict]: records
+    """
+    measures = ["ACCESS2", "ARTHRITIS", "BINGE", "GHLTH", "MHLTH"]
+    return [{"StateDesc": "Ohio",
+             "CountyName": "Summit",
+             "CountyFIPS": "39153",
+             "LocationID": str(39153500000 + i // len(measures)),
+             "TotalPopulation": str(1000 + i // len(measures)),
+             "Geolocation": {"type": "Point", "coordinates": [-81.49716013, 41.04049422]},
+             "MeasureId": measures[i % len(measures)],
+             "Data_Value": str(round(10 + (i % 7) * 1.5 + value_offset, 1)),
+             "Category": "Health Outcomes",
+             "Short_Question_Text": "Measure",
+             "Measure": "Measure among adults aged >=18 years",
+             "Year": year,
+             ":updated_at": updated_at} for i in range(n_rows)]
+
+
+class FakeSocrataServer:
+    """
+    Serves records through the /resource/<dataset>.json endpoint on a local port.
+
+    Args:
+        records (list[dict]) : Records returned by queries, in query order.
+        latency (float) : Seconds to wait before each response.
+        fail_offsets (set[int]) : Page offsets whose first request responds with HTTP 503.
+    """
+
+    def __init__(self,
+                 records : typing.List[typing.Dict],
+                 latency : float = 0,
+                 fail_offsets : typing.Optional[typing.Set[int]] = None):
+        self.records = records
+        self.latency = latency
+        self.fail_offsets = set(fail_offsets or [])
+        self.requests : typing.List[str] = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Host and port to pass as url with uri_prefix "http://"."""
+        return f"127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "FakeSocrataServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _select(self, query : str) -> typing.List[typing.Dict]:
+        """Returns records matching the where clause of a SoQL query."""
+        selected = self.records
+        year = re.search(r'year\s*(>=|=)\s*"(\d+)"', query)
+        if year:
+            op, value = year.groups()
+            selected = [r for r in selected if (r["Year"] >= value if op == ">=" else r["Year"] == value)]
+        since = re.search(r":updated_at\s*>\s*'([^']+)'", query)
+        if since:
+            selected = [r for r in selected if r[":updated_at"] > since.group(1)]
+        return selected
+
+    def respond(self, query : str) -> typing.Tuple[int, typing.Any]:
+        """Returns status code and body for a SoQL query."""
+        with self.lock:
+            self.requests.append(query)
+        time.sleep(self.latency)
+        selected = self._select(query)
+        if "count(*)" in query:
+            return 200, [{"row_count": str(len(selected))}]
+        if "max(:updated_at)" in query:
+            if not selected:
+                return 200, [{}]
+            return 200, [{"max_updated_at": max(r[":updated_at"] for r in selected),
+                          "max_year": max(r["Year"] for r in selected)}]
+        limit = int(re.search(r"limit\s+(\d+)", query).group(1))  # type: ignore
+        offset_match = re.search(r"offset\s+(\d+)", query)
+        offset = int(offset_match.group(1)) if offset_match else 0
+        with self.lock:
+            if offset in self.fail_offsets:
+                self.fail_offsets.discard(offset)
+                return 503, {"message": "Service unavailable"}
+        columns = [col.strip() for col in re.search(r"select(.*?)where", query, re.S).group(1).split(",")]  # type: ignore
+        return 200, [{col: r[col] for col in columns} for r in selected[offset:offset + limit]]
+
+    def _handler(self) -> typing.Type[BaseHTTPRequestHandler]:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers GET requests with JSON."""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                status, body = fake.respond(params.get("$query", [""])[0])
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -5,7 +5,8 @@ Tests the functions contained in clean module.
 import pytest
 import pandas as pd
 
-from src.clean import validate_df, pivot_measures, drop_null_responses, drop_invalid_measures
+from src.clean import import_file, validate_df, pivot_measures, drop_null_responses, drop_invalid_measures, \
+    prep_data
 
 # Define input dataframe for validate_df
 df_validate_values = [["Massachusetts", "Hampden", 25013, 25013812500, 7665,
@@ -90,6 +91,70 @@ df_drop_inv_columns = ["StateDesc", "CountyName", "CountyFIPS", "LocationID",
 df_drop_inv_in = pd.DataFrame(df_drop_inv_values, index=df_drop_inv_index, columns=df_drop_inv_columns)
 not_a_df = "This is not a dataframe."
 
+# Test import_file function
+@pytest.mark.parametrize("file_name", ["places.parquet", "places.arrow"])
+def test_import_file_columnar(tmp_path, file_name):
+    """
+    Conducts happy path unit test for import_file function with columnar formats.
+
+    Only requested columns are read and data types are kept.
+    """
+
+    # Define expected output
+    df_true = df_validate_in[["LocationID", "MeasureId", "Data_Value"]].reset_index(drop=True)
+
+    # Create test output
+    df_validate_in.to_parquet(tmp_path / "places.parquet", index=False)
+    df_validate_in.reset_index(drop=True).to_feather(tmp_path / "places.arrow")
+    df_test = import_file(str(tmp_path / file_name), columns=["LocationID", "MeasureId", "Data_Value"])
+
+    # Test equality
+    pd.testing.assert_frame_equal(df_true, df_test)
+
+def test_import_file_format_val_err():
+    """
+    Conducts unhappy path unit test for import_file function.
+
+    Checks if ValueError raised for unsupported file format.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        import_file("places.csv", file_format="Not a format")
+
+def test_import_file_chunked(tmp_path):
+    """
+    Conducts happy path unit test for import_file function reading csv in chunks.
+
+    Rows with null Data_Value are dropped per chunk, repeated strings become
+    categoricals and integer columns are downcast, while measure values keep
+    their precision.
+    """
+
+    # Define input file, with a null measure value in the second chunk
+    df_in = df_validate_in.copy()
+    df_in.iloc[1, df_in.columns.get_loc("Data_Value")] = None
+    df_in.to_csv(tmp_path / "places.csv")
+
+    # Define expected output
+    df_true = df_validate_in.drop(index=471561)[["StateDesc", "LocationID", "MeasureId", "Data_Value"]]\
+        .reset_index(drop=True)
+
+    # Create test output
+    df_test = import_file(str(tmp_path / "places.csv"),
+                          columns=["StateDesc", "LocationID", "MeasureId", "Data_Value"],
+                          dtypes={"StateDesc": "object", "LocationID": "int", "Data_Value": "float"},
+                          categoricals=["StateDesc", "MeasureId"],
+                          downcast=True,
+                          chunksize=1)
+
+    # Test equality
+    assert isinstance(df_test.MeasureId.dtype, pd.CategoricalDtype)
+    assert df_test.Data_Value.dtype == "float64"
+    assert df_test.LocationID.dtype == "int64"
+    assert df_test.index.tolist() == [0, 2]
+    pd.testing.assert_frame_equal(df_true, df_test.reset_index(drop=True).astype(df_true.dtypes.to_dict()))
+
 # Test validate_df function
 def test_validate_df():
     """
@@ -110,7 +175,24 @@ def test_validate_df():
                                   "Category":"object",
                                   "Short_Question_Text":"object",
                                   "Measure":"object"}
-                                  ) is None
+                                  ).keys() == {"schema", "nulls", "duplicates"}
+
+def test_validate_df_compacted():
+    """
+    Conducts happy path unit test for validate_df function with categorical
+    and downcast columns, as imported by import_file.
+    """
+
+    # Define input dataframe
+    df_compacted = df_validate_in.astype({"StateDesc": "category",
+                                          "TotalPopulation": "int16",
+                                          "Data_Value": "float32"})
+
+    # Create test output
+    assert validate_df(df_compacted,
+                       cols = {"StateDesc":"object",
+                               "TotalPopulation":"int",
+                               "Data_Value":"float"}).keys() == {"schema", "nulls", "duplicates"}
 
 def test_validate_df_type_err():
     """
@@ -134,6 +216,41 @@ def test_validate_df_type_err():
                                     "Short_Question_Text":"object",
                                     "Measure":"object"})
 
+def test_validate_df_all_violations(caplog):
+    """
+    Conducts unhappy path unit test for validate_df function.
+
+    Checks that every null and duplicate key violation is logged before
+    ValueError is raised.
+    """
+
+    # Define input dataframe, with a duplicate key and a null value
+    df_in = pd.concat([df_validate_in, df_validate_in.iloc[[0]]], axis=0)
+    df_in.iloc[1, df_in.columns.get_loc("Data_Value")] = None
+
+    # Create test output
+    with pytest.raises(ValueError):
+        validate_df(df_in, cols = {"Data_Value":"float"}, keys = ["LocationID", "MeasureId"])
+    assert "Column Data_Value contains 1 null values." in caplog.text
+    assert "The dataframe has 1 duplicate records." in caplog.text
+
+def test_validate_df_sample():
+    """
+    Conducts happy path unit test for validate_df function in sampling mode.
+
+    Only sampled rows are checked, so a null value outside the sample passes.
+    """
+
+    # Define input dataframe, with a null value in the last row
+    df_in = df_validate_in.copy()
+    df_in.iloc[2, df_in.columns.get_loc("Data_Value")] = None
+
+    # Create test output
+    with pytest.raises(ValueError):
+        validate_df(df_in, cols = {"Data_Value":"float"})
+    assert validate_df(df_in, cols = {"Data_Value":"float"},
+                       sample_size = 2, random_state = 3).keys() == {"schema", "nulls", "duplicates"}
+
 # Test pivot_measures function
 def test_pivot_measures():
     """
@@ -172,6 +289,65 @@ def test_pivot_measures_key_err():
     with pytest.raises(KeyError):
         pivot_measures(df_pivot_in.drop(["MeasureId"]))
 
+def test_pivot_measures_chunks():
+    """
+    Conducts happy path unit test for pivot_measures function with chunks of data.
+
+    A location split across chunks becomes one row, and chunks with different
+    categories give the same pivot as the entire dataframe.
+    """
+
+    # Define input chunks, with the Ohio location split across chunks
+    df_in = pd.concat([df_pivot_in, df_pivot_in.iloc[[0]].assign(MeasureId="COPD", Data_Value=12.5)])
+    chunks = [df_in.iloc[:2].astype({"StateDesc": "category", "MeasureId": "category"}),
+              df_in.iloc[2:].astype({"StateDesc": "category", "MeasureId": "category"})]
+
+    # Define expected output
+    df_true = pivot_measures(df_in)
+
+    # Create test output
+    df_test = pivot_measures(iter(chunks))
+
+    # Test equality
+    assert df_true.loc[df_true.LocationID == 39153503300, "COPD"].tolist() == [12.5]
+    pd.testing.assert_frame_equal(df_true, df_test.astype({"StateDesc": "object"}))
+
+def test_pivot_measures_order():
+    """
+    Conducts happy path unit test for pivot_measures function with categorical descriptive columns.
+
+    Rows are ordered by the values of categories, as pandas.pivot orders strings,
+    whatever the order of the categories.
+    """
+
+    # Define input chunks, with categories in reverse order of their values
+    df_in = pd.concat([df_pivot_in.iloc[::-1], df_pivot_in.assign(StateDesc="Alabama", CountyName="Zeta",
+                                                                  LocationID=df_pivot_in.LocationID + 1)])
+    chunks = [df_in.astype({col: pd.CategoricalDtype(sorted(df_in[col].unique(), reverse=True))
+                            for col in ["StateDesc", "CountyName", "MeasureId"]})]
+
+    # Define expected output
+    df_true = df_in.pivot(index=["StateDesc", "CountyName", "CountyFIPS", "LocationID"],
+                          columns="MeasureId", values="Data_Value").reset_index()
+
+    # Create test output
+    df_test = pivot_measures(iter(chunks))
+
+    # Test equality
+    assert df_test.LocationID.tolist() == df_true.LocationID.tolist()
+    assert df_test.StateDesc.astype(str).tolist() == df_true.StateDesc.tolist()
+
+def test_pivot_measures_val_err():
+    """
+    Conducts unhappy path unit test for pivot_measures function.
+
+    Checks if ValueError raised for a measure repeated for a location across chunks.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        pivot_measures([df_pivot_in, df_pivot_in.iloc[[0]]])
+
 
 # Test drop_null_responses function
 
@@ -256,3 +432,37 @@ def test_drop_invalid_measures_att_err():
     # Create test output
     with pytest.raises(AttributeError):
         drop_invalid_measures(not_a_df, ["DENTAL","MHLTH"])
+
+# Test prep_data function
+def test_prep_data():
+    """
+    Conducts happy path unit test for prep_data function.
+
+    Invalid measures are never pivoted and the location without a response is dropped.
+    """
+
+    # Define expected output
+    df_true = pd.DataFrame(
+            [["South Carolina", "Orangeburg", 45075, 45075010200, 5097,
+        "{'type': 'Point', 'coordinates': [-80.38981016, 33.3179319]}",
+        30.5]],
+            index = [0],
+            columns = ["StateDesc", "CountyName", "CountyFIPS", "LocationID",
+                        "TotalPopulation", "Geolocation", "GHLTH"])
+
+    # Create test output
+    df_test = prep_data(df_pivot_in, response="GHLTH", invalid_measures=["COPD", "MHLTH"])
+
+    # Test equality
+    pd.testing.assert_frame_equal(df_true, df_test)
+
+def test_prep_data_key_err():
+    """
+    Conducts unhappy path unit test for prep_data function.
+
+    Checks if KeyError raised for a response that is an invalid measure.
+    """
+
+    # Create test output
+    with pytest.raises(KeyError):
+        prep_data(df_pivot_in, response="GHLTH", invalid_measures=["GHLTH"])
@@ -4,8 +4,13 @@ Tests the functions contained in featurize module.
 
 import pytest
 import pandas as pd
+import sqlalchemy as sql
+import sqlalchemy.exc
 
-from src.featurize import reformat_measures, one_hot_encode
+from src.featurize import reformat_measures, one_hot_encode, add_ranges, scale_values, featurize_places, \
+    FeatureTransform, RegionEncoder
+from src.models import create_db, scalerRanges
+from src.profiling import Profiler
 
 # Define input dataframe for reformat_measures
 df_reformat_values = [["New York", "Onondaga", 36067, 36067013200, 2958, 34.2, 81.3,
@@ -94,6 +99,7 @@ def test_one_hot_encode():
             columns = ["StateDesc", "CountyName", "CountyFIPS", "LocationID",
                        "TotalPopulation", "BPHIGH", "BPMED", "CANCER", "GHLTH",
                        "HIGHCHOL", "region", "Northeast"])
+    df_true = df_true.astype({"region": pd.CategoricalDtype(["Northeast", "West"]), "Northeast": "int8"})
 
     # Create test output
     df_test = one_hot_encode(df_one_hot_in, states_region_mapping)
@@ -101,6 +107,21 @@ def test_one_hot_encode():
     # Test equality
     pd.testing.assert_frame_equal(df_true, df_test)
 
+def test_one_hot_encode_profiled():
+    """
+    Conducts happy path unit test for one_hot_encode function.
+
+    Calls are measured by an active Profiler.
+    """
+
+    # Create test output
+    with Profiler(trace_memory=False) as profiler:
+        one_hot_encode(df_one_hot_in, states_region_mapping)
+    functions = [totals["function"].rsplit(".", 1)[1] for totals in profiler.report()["functions"]]
+
+    # Test equality
+    assert functions == ["one_hot_encode"]
+
 def test_one_hot_encode_key_err():
     """
     Conducts unhappy path unit test for one_hot_encode function.
@@ -111,3 +132,229 @@ def test_one_hot_encode_key_err():
     # Create test output
     with pytest.raises(KeyError):
         one_hot_encode(df_one_hot_in.drop("StateDesc"), states_region_mapping)
+
+# Test add_ranges function
+def test_add_ranges(tmp_path):
+    """
+    Conducts happy path unit test for add_ranges function.
+
+    Ranges of a run are recorded together, and recording a run again replaces them.
+    """
+
+    # Define input database
+    engine_string = f"sqlite:///{tmp_path / 'places.db'}"
+    create_db(engine_string)
+
+    # Create test output
+    run_id = add_ranges(engine_string, {"TotalPopulation": (210, 9025), "BPHIGH": (0.1, 0.6)})
+    add_ranges(engine_string, {"TotalPopulation": (200, 9000)}, run_id)
+    add_ranges(engine_string, {"TotalPopulation": (100, 8000)})
+    with sql.create_engine(engine_string).connect() as connection:
+        rows = connection.execute(sql.select(scalerRanges.__table__.c.valuename,
+                                             scalerRanges.__table__.c.min_value,
+                                             scalerRanges.__table__.c.max_value)
+                                  .where(scalerRanges.__table__.c.run_id == run_id)
+                                  .order_by(scalerRanges.__table__.c.valuename)).fetchall()
+        n_rows = connection.execute(sql.select(sql.func.count()).select_from(scalerRanges.__table__)).scalar()
+
+    # Test equality
+    assert [tuple(row) for row in rows] == [("BPHIGH", 0.1, 0.6), ("TotalPopulation", 200, 9000)]
+    assert n_rows == 3
+
+def test_add_ranges_upgrade(tmp_path):
+    """
+    Conducts happy path unit test for add_ranges function on a database created before run ids.
+
+    The run_id column is added to scaler_ranges, keeping rows already recorded.
+    """
+
+    # Define input database, with scaler_ranges as created before run ids were recorded
+    engine_string = f"sqlite:///{tmp_path / 'places.db'}"
+    with sql.create_engine(engine_string).begin() as connection:
+        connection.execute(sql.text("CREATE TABLE scaler_ranges (id INTEGER PRIMARY KEY, valuename VARCHAR(100), "
+                                    "max_value FLOAT, min_value FLOAT)"))
+        connection.execute(sql.text("INSERT INTO scaler_ranges (valuename, max_value, min_value) "
+                                    "VALUES ('TotalPopulation', 9025, 210)"))
+
+    # Create test output
+    run_id = add_ranges(engine_string, {"TotalPopulation": (200, 9000)})
+    with sql.create_engine(engine_string).connect() as connection:
+        rows = connection.execute(sql.select(scalerRanges.__table__.c.run_id,
+                                             scalerRanges.__table__.c.min_value)
+                                  .order_by(scalerRanges.__table__.c.id)).fetchall()
+
+    # Test equality
+    assert [tuple(row) for row in rows] == [(None, 210), (run_id, 200)]
+
+def test_add_ranges_op_err(tmp_path):
+    """
+    Conducts unhappy path unit test for add_ranges function.
+
+    Checks if OperationalError raised for a database that cannot be opened.
+    """
+
+    # Create test output
+    with pytest.raises(sqlalchemy.exc.OperationalError):
+        add_ranges(f"sqlite:///{tmp_path / 'missing' / 'places.db'}", {"TotalPopulation": (210, 9025)})
+
+# Test scale_values function
+def test_scale_values(tmp_path):
+    """
+    Conducts happy path unit test for scale_values function.
+
+    Columns are scaled to [0,1] and their ranges recorded as min and max.
+    """
+
+    # Define input database
+    engine_string = f"sqlite:///{tmp_path / 'places.db'}"
+    create_db(engine_string)
+
+    # Create test output
+    df_test = scale_values(engine_string, df_reformat_in.copy(), ["TotalPopulation", "BPHIGH"], run_id="run")
+    with sql.create_engine(engine_string).connect() as connection:
+        rows = connection.execute(sql.select(scalerRanges.__table__.c.min_value,
+                                             scalerRanges.__table__.c.max_value)
+                                  .where(scalerRanges.__table__.c.valuename == "TotalPopulation")).fetchall()
+
+    # Test equality
+    assert df_test["scaled_TotalPopulation"].tolist() == pytest.approx([(2958 - 2631) / (6289 - 2631), 1, 0])
+    assert [tuple(row) for row in rows] == [(2631, 6289)]
+
+# Test RegionEncoder class
+def test_region_encoder():
+    """
+    Conducts happy path unit test for RegionEncoder class.
+
+    States as strings or categories give the same int8 codes, and states of no
+    known region get code -1 and no dummy.
+    """
+
+    # Define input
+    encoder = RegionEncoder(states_region_mapping)
+    states = pd.Series(["New York", "California", "Texas", "New York"])
+
+    # Create test output
+    codes = encoder.encode(states)
+    category_codes = encoder.encode(states.astype("category"))
+    dummies = encoder.dummies(codes)
+
+    # Test equality
+    assert isinstance(encoder, RegionEncoder)
+    assert codes.dtype == "int8" and dummies.dtype == "int8"
+    assert codes.tolist() == category_codes.tolist() == [0, 1, -1, 0]
+    assert dummies.tolist() == [[1], [0], [0], [1]]
+
+def test_region_encoder_key_err():
+    """
+    Conducts unhappy path unit test for RegionEncoder class.
+
+    Checks if KeyError raised for a dropped region no state belongs to.
+    """
+
+    # Create test output
+    with pytest.raises(KeyError):
+        RegionEncoder(states_region_mapping, dropped_region="Southwest")
+
+# Test featurize_places function
+def test_featurize_places():
+    """
+    Conducts happy path unit test for featurize_places function.
+
+    Gives the same features as reformat_measures, one_hot_encode and scale_values
+    applied in turn, without modifying its input, and in float32 if requested.
+    """
+
+    # Define input
+    make_floats = ["BPHIGH", "BPMED", "CANCER", "GHLTH", "HIGHCHOL"]
+    df_in = df_one_hot_in.copy()
+
+    # Define expected output
+    df_true = reformat_measures(df_in.copy(), make_floats=make_floats, make_logit="GHLTH")
+    df_true = one_hot_encode(df_true, states_to_regions=states_region_mapping)
+    df_true = scale_values(None, df_true, "TotalPopulation")
+
+    # Create test output
+    df_test, allocated = featurize_places(df_in, make_floats, "GHLTH", states_region_mapping, "TotalPopulation")
+    df_test32, allocated32 = featurize_places(df_in, make_floats, "GHLTH", states_region_mapping,
+                                              "TotalPopulation", dtype="float32")
+
+    # Test equality
+    pd.testing.assert_frame_equal(df_true.drop(columns="region"), df_test[df_true.columns].drop(columns="region"))
+    assert df_test["region"].astype(str).tolist() == df_true["region"].tolist()
+    pd.testing.assert_frame_equal(df_in, df_one_hot_in)
+    assert (df_test32[make_floats].dtypes == "float32").all()
+    assert allocated32["reformat_measures"] * 2 == allocated["reformat_measures"] == 3 * 5 * 8
+
+def test_featurize_places_type_err():
+    """
+    Conducts unhappy path unit test for featurize_places function.
+
+    Checks if TypeError raised for a non-numeric measure.
+    """
+
+    # Create test output
+    with pytest.raises(TypeError):
+        featurize_places(df_one_hot_in, ["BPHIGH", "CountyName"], None)
+
+# Test FeatureTransform class
+def test_feature_transform(tmp_path):
+    """
+    Conducts happy path unit test for FeatureTransform class.
+
+    A saved and loaded transform gives new data, with regions instead of states
+    and no response, the same features as the data it was fitted on.
+    """
+
+    # Define input
+    make_floats = ["BPHIGH", "BPMED", "CANCER", "GHLTH", "HIGHCHOL"]
+    transform = FeatureTransform.fit(df_one_hot_in, make_floats, "GHLTH", states_region_mapping, "TotalPopulation")
+    df_new = df_one_hot_in.drop(columns=["StateDesc", "GHLTH"]).iloc[[2]]
+    df_new["region"] = ["South"]
+
+    # Define expected output
+    df_true, _ = transform.apply(df_one_hot_in)
+
+    # Create test output
+    transform.save(str(tmp_path / "transform.json"))
+    df_test, _ = FeatureTransform.load(str(tmp_path / "transform.json")).apply(df_new, response=False)
+
+    # Test equality
+    columns = [col for col in df_test.columns if col != "region"]
+    pd.testing.assert_frame_equal(df_true.loc[df_new.index, columns], df_test[columns])
+
+def test_feature_transform_key_err():
+    """
+    Conducts unhappy path unit test for FeatureTransform class.
+
+    Checks if KeyError raised for data missing a measure the transform was fitted on.
+    """
+
+    # Define input
+    transform = FeatureTransform.fit(df_one_hot_in, ["BPHIGH", "BPMED"], None)
+
+    # Create test output
+    with pytest.raises(KeyError):
+        transform.apply(df_one_hot_in.drop(columns="BPMED"))
+
+def test_feature_transform_absent_region():
+    """
+    Conducts happy path unit test for FeatureTransform class.
+
+    A region of the mapping with no state in the data still gets a dummy column,
+    as it does from one_hot_encode.
+    """
+
+    # Define input
+    mapping = dict(states_region_mapping, Texas="Southwest")
+    transform = FeatureTransform.fit(df_one_hot_in, ["BPHIGH"], None, mapping)
+
+    # Define expected output
+    df_true = one_hot_encode(df_one_hot_in, mapping)
+
+    # Create test output
+    df_test, _ = transform.apply(df_one_hot_in)
+
+    # Test equality
+    assert transform.regions == ["Northeast", "Southwest", "West"]
+    pd.testing.assert_frame_equal(df_test[["Northeast", "Southwest"]], df_true[["Northeast", "Southwest"]])
+    assert df_test["Southwest"].tolist() == [0, 0, 0]
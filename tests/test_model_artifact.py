@@ -0,0 +1,70 @@
+"""
+Tests the functions contained in model_artifact module.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.model_artifact import save_model, load_model, is_compact_model
+
+# Define input dataframe
+rng = np.random.default_rng(0)
+df_in = pd.DataFrame(rng.random((20, 3)), columns=["ACCESS2", "BINGE", "Midwest"])
+df_in["GHLTH"] = df_in.ACCESS2 - 2 * df_in.BINGE + rng.normal(0, 0.1, 20)
+features = ["ACCESS2", "BINGE", "Midwest"]
+model_in = LinearRegression().fit(df_in[features], df_in["GHLTH"])
+
+# Test save_model and load_model functions
+def test_load_model(tmp_path):
+    """
+    Conducts happy path unit test for save_model and load_model functions.
+
+    Imported model memory-maps its coefficients and predicts as the fitted model,
+    from columns in any order.
+    """
+
+    # Define input
+    model_path = str(tmp_path / "model.lm")
+    save_model(model_in, model_path, {"response_transform": "logit"})
+
+    # Create test output
+    model_out = load_model(model_path)
+
+    # Test equality
+    assert is_compact_model(model_path)
+    assert isinstance(model_out.coef_, np.memmap)
+    assert list(model_out.feature_names_in_) == features
+    assert model_out.metadata["estimator"] == "LinearRegression"
+    assert model_out.metadata["response_transform"] == "logit"
+    np.testing.assert_allclose(model_out.predict(df_in[features[::-1]]), model_in.predict(df_in[features]))
+
+def test_load_model_val_err(tmp_path):
+    """
+    Conducts unhappy path unit test for load_model function.
+
+    Checks if ValueError raised for coefficients that do not match their checksum.
+    """
+
+    # Define input
+    model_path = str(tmp_path / "model.lm")
+    save_model(model_in, model_path)
+    with open(model_path, "r+b") as model_handle:
+        model_handle.seek(-1, 2)
+        model_handle.write(b"\x00")
+
+    # Create test output
+    with pytest.raises(ValueError):
+        load_model(model_path)
+
+def test_save_model_type_err(tmp_path):
+    """
+    Conducts unhappy path unit test for save_model function.
+
+    Checks if TypeError raised for a model that is not fitted.
+    """
+
+    # Create test output
+    with pytest.raises(TypeError):
+        save_model(LinearRegression(), str(tmp_path / "model.lm"))
@@ -0,0 +1,242 @@
+"""
+Tests the functions contained in pipeline module.
+"""
+
+import copy
+import logging
+
+import pytest
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.pipeline import STAGES, run_pipeline, select_stages
+from src.stage_cache import StageCache
+from benchmarks.synthetic_places import make_places_frame
+
+# Define model pipeline configuration
+with open("config/model-config.yaml", "r") as f:
+    mdl_config = yaml.load(f, Loader=yaml.FullLoader)
+
+# Test run_pipeline function
+def test_run_pipeline(tmp_path):
+    """
+    Conducts happy path unit test for run_pipeline function.
+
+    Running stages in one process gives the same predictions as running them
+    one at a time through files, and only requested artifacts are saved.
+    """
+
+    # Define input raw data
+    make_places_frame(n_counties=60, tracts_per_county=4).to_csv(tmp_path / "raw.csv")
+
+    # Define expected output, one stage at a time
+    paths = {"raw": str(tmp_path / "raw.csv"),
+             "clean": str(tmp_path / "clean.csv"),
+             "featurized": str(tmp_path / "featurized.csv"),
+             "train_test": str(tmp_path / "train_test.csv"),
+             "model": str(tmp_path / "model.sav"),
+             "scores": str(tmp_path / "scores.csv")}
+    for stage, outputs in zip(STAGES[:4], [["clean"], ["featurized"], ["train_test", "model"], ["scores"]]):
+        run_pipeline(mdl_config, stage, stage, paths, save=outputs)
+    df_true = pd.read_csv(paths["scores"], index_col=0)
+
+    # Create test output
+    in_memory_dir = tmp_path / "in_memory"
+    in_memory_dir.mkdir()
+    df_test = run_pipeline(mdl_config, "clean", "score",
+                           {"raw": paths["raw"], "scores": str(in_memory_dir / "scores.csv")},
+                           save=["scores"])["scores"]
+
+    # Test equality
+    assert [path.name for path in in_memory_dir.iterdir()] == ["scores.csv"]
+    pd.testing.assert_series_equal(df_true.predictions.reset_index(drop=True),
+                                   df_test.predictions.reset_index(drop=True),
+                                   check_exact=False, rtol=1e-5)
+
+def test_run_pipeline_model(tmp_path):
+    """
+    Conducts happy path unit test for run_pipeline function.
+
+    Training in memory after cleaning and featurizing gives the same model as
+    running the stages one at a time through files. Parquet files keep values
+    exactly, as csv parsing can change the last bit of a float.
+    """
+
+    # Define input raw data
+    make_places_frame(n_counties=60, tracts_per_county=4).to_csv(tmp_path / "raw.csv")
+    paths = {"raw": str(tmp_path / "raw.csv"),
+             "clean": str(tmp_path / "clean.parquet"),
+             "featurized": str(tmp_path / "featurized.parquet"),
+             "train_test": str(tmp_path / "train_test.parquet")}
+
+    # Define expected output, one stage at a time
+    for stage, outputs in zip(STAGES[:2], [["clean"], ["featurized"]]):
+        run_pipeline(mdl_config, stage, stage, paths, save=outputs)
+    model_true = run_pipeline(mdl_config, "train", "train", paths)["model"]
+
+    # Create test output
+    model_test = run_pipeline(mdl_config, "clean", "train", {"raw": paths["raw"]})["model"]
+
+    # Test equality
+    np.testing.assert_array_equal(model_true.coef_, model_test.coef_)
+    assert model_true.intercept_ == model_test.intercept_
+
+def test_run_pipeline_val_err(tmp_path):
+    """
+    Conducts unhappy path unit test for run_pipeline function.
+
+    Checks if ValueError raised for a model that is neither trained nor provided.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        run_pipeline(mdl_config, "score", "evaluate", {"train_test": str(tmp_path / "train_test.csv")})
+
+# Test select_stages function
+def test_select_stages():
+    """
+    Conducts happy path unit test for select_stages function.
+    """
+
+    # Create test output
+    assert select_stages("featurize", "score") == ["featurize", "train", "score"]
+
+def test_select_stages_val_err():
+    """
+    Conducts unhappy path unit test for select_stages function.
+
+    Checks if ValueError raised for stages out of order.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        select_stages("score", "clean")
+
+def test_run_pipeline_cache(tmp_path, caplog):
+    """
+    Conducts happy path unit test for run_pipeline function with a StageCache.
+
+    Re-running a stage with the same input and config returns its cached
+    artifacts, and a changed config section runs it again.
+    """
+
+    # Define input clean data
+    make_places_frame(n_counties=60, tracts_per_county=4).to_csv(tmp_path / "raw.csv")
+    paths = {"raw": str(tmp_path / "raw.csv"), "clean": str(tmp_path / "clean.csv")}
+    run_pipeline(mdl_config, "clean", "clean", paths, save=["clean"])
+    cache = StageCache(str(tmp_path / "cache"))
+
+    # Create test output
+    df_true = run_pipeline(mdl_config, "featurize", "featurize", paths, cache=cache)["featurized"]
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="src.pipeline"):
+        df_test = run_pipeline(mdl_config, "featurize", "featurize", paths, cache=cache)["featurized"]
+    cached_messages = [record.getMessage() for record in caplog.records]
+    changed_config = copy.deepcopy(mdl_config)
+    changed_config["featurize"]["one_hot_encode"]["states_region"] = False
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="src.pipeline"):
+        run_pipeline(changed_config, "featurize", "featurize", paths, cache=cache)
+
+    # Test equality
+    assert "Stage featurize loaded from cache." in cached_messages
+    assert "Running stage featurize..." not in cached_messages
+    assert "Running stage featurize..." in [record.getMessage() for record in caplog.records]
+    pd.testing.assert_frame_equal(df_true, df_test)
+
+def test_run_pipeline_mask_only(tmp_path):
+    """
+    Conducts happy path unit test for run_pipeline function saving only the training mask.
+
+    Scores are the same as when the features are saved with the mask.
+    """
+
+    # Define input raw data
+    make_places_frame(n_counties=60, tracts_per_county=4).to_csv(tmp_path / "raw.csv")
+    paths = {"raw": str(tmp_path / "raw.csv"), "train_test": str(tmp_path / "train_test.csv")}
+    mask_config = copy.deepcopy(mdl_config)
+    mask_config["train_test_split"]["mask_only"] = True
+
+    # Define expected output
+    df_true = run_pipeline(mdl_config, "clean", "score", paths)["scores"]
+
+    # Create test output
+    df_test = run_pipeline(mask_config, "clean", "score", paths, save=["train_test"])["scores"]
+
+    # Test equality
+    assert list(pd.read_csv(paths["train_test"], index_col=0).columns) == ["training"]
+    pd.testing.assert_series_equal(df_true.predictions.sort_index(), df_test.predictions.sort_index())
+
+def test_run_pipeline_mask_only_score(tmp_path):
+    """
+    Conducts happy path unit test for run_pipeline function scoring a saved training mask on its own.
+
+    Test rows of the mask are taken from featurized data given a location, as
+    run.py score --featurized does.
+    """
+
+    # Define input mask and featurized data
+    make_places_frame(n_counties=60, tracts_per_county=4).to_csv(tmp_path / "raw.csv")
+    paths = {"raw": str(tmp_path / "raw.csv"), "featurized": str(tmp_path / "featurized.csv"),
+             "train_test": str(tmp_path / "train_test.csv"), "model": str(tmp_path / "model.sav")}
+    mask_config = copy.deepcopy(mdl_config)
+    mask_config["train_test_split"]["mask_only"] = True
+
+    # Define expected output
+    df_true = run_pipeline(mask_config, "clean", "score", paths,
+                           save=["featurized", "train_test", "model"])["scores"]
+
+    # Create test output
+    df_test = run_pipeline(mask_config, "score", "score", paths)["scores"]
+
+    # Test equality
+    assert len(df_test) == len(df_true)
+    np.testing.assert_allclose(df_test.predictions.to_numpy(), df_true.predictions.to_numpy(), atol=1e-6) # Read from csv
+
+def test_run_pipeline_mask_only_val_err(tmp_path):
+    """
+    Conducts unhappy path unit test for run_pipeline function scoring a saved training mask on its own.
+
+    Checks if ValueError raised when no featurized data is given to take test rows from.
+    """
+
+    # Define input mask
+    make_places_frame(n_counties=60, tracts_per_county=4).to_csv(tmp_path / "raw.csv")
+    paths = {"raw": str(tmp_path / "raw.csv"), "train_test": str(tmp_path / "train_test.csv"),
+             "model": str(tmp_path / "model.sav")}
+    mask_config = copy.deepcopy(mdl_config)
+    mask_config["train_test_split"]["mask_only"] = True
+    run_pipeline(mask_config, "clean", "train", paths, save=["train_test", "model"])
+
+    # Create test output
+    with pytest.raises(ValueError, match="featurized"):
+        run_pipeline(mask_config, "score", "score", paths)
+
+def test_run_pipeline_streaming(tmp_path):
+    """
+    Conducts happy path unit test for run_pipeline function training one chunk at a time.
+
+    Featurized data read from file in one chunk gives the split and scores of
+    training in memory, and only the training mask is returned as train_test.
+    """
+
+    # Define input featurized data
+    make_places_frame(n_counties=60, tracts_per_county=4).to_csv(tmp_path / "raw.csv")
+    paths = {"raw": str(tmp_path / "raw.csv"), "featurized": str(tmp_path / "featurized.csv"),
+             "model": str(tmp_path / "model.sav")}
+    run_pipeline(mdl_config, "clean", "featurize", paths, save=["featurized"])
+    streaming_config = copy.deepcopy(mdl_config)
+    streaming_config["train_model"]["streaming"].update(enabled=True, chunksize=100000)
+
+    # Define expected output
+    df_true = run_pipeline(mdl_config, "train", "score", paths)["scores"]
+
+    # Create test output
+    outputs = run_pipeline(streaming_config, "train", "train", paths)
+    df_test = run_pipeline(streaming_config, "train", "score", paths)["scores"]
+
+    # Test equality
+    assert list(outputs["train_test"].columns) == ["training"]
+    pd.testing.assert_series_equal(df_true.predictions.sort_index(), df_test.predictions.sort_index(),
+                                   check_exact=False, rtol=1e-9)
@@ -0,0 +1,79 @@
+"""
+Tests the functions contained in profiling module.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src import profiling
+from src.profiling import Profiler, profiled
+
+@profiled
+def allocate(n_bytes : int) -> int:
+    """Allocates and frees an array of n_bytes, returning its size."""
+    return np.ones(n_bytes, dtype=np.int8).nbytes
+
+@profiled
+def allocate_twice(n_bytes : int) -> int:
+    """Allocates n_bytes while holding an array of n_bytes."""
+    held = np.ones(n_bytes, dtype=np.int8)
+    return held.nbytes + allocate(n_bytes)
+
+# Test Profiler class
+def test_profiler(tmp_path):
+    """
+    Conducts happy path unit test for Profiler class.
+
+    Calls of decorated functions are totalled per stage, and an outer call's peak
+    memory includes that of the calls it makes.
+    """
+
+    # Create test output
+    with Profiler() as profiler:
+        with profiling.stage("clean") as entry:
+            entry["cached"] = False
+            allocate_twice(10_000_000)
+            allocate(10_000_000)
+    profiler.write_report(str(tmp_path / "profile.json"), step="clean")
+    with open(tmp_path / "profile.json", "r") as f:
+        report = json.load(f)
+    functions = {totals["function"].rsplit(".", 1)[1]: totals for totals in report["functions"]}
+
+    # Test equality
+    assert report["step"] == "clean"
+    assert [(entry["stage"], entry["cached"]) for entry in report["stages"]] == [("clean", False)]
+    assert functions["allocate"]["calls"] == 2 and functions["allocate"]["stage"] == "clean"
+    assert functions["allocate"]["peak_mb"] == pytest.approx(10, abs=0.5)
+    assert functions["allocate_twice"]["peak_mb"] == pytest.approx(20, abs=0.5)
+    assert report["stages"][0]["peak_mb"] >= functions["allocate_twice"]["peak_mb"]
+
+def test_profiled_inactive():
+    """
+    Conducts happy path unit test for profiled function when no Profiler is active.
+    """
+
+    # Create test output
+    with Profiler() as profiler:
+        pass
+    n_bytes = allocate(1000)
+
+    # Test equality
+    assert n_bytes == 1000
+    assert profiler.report()["functions"] == []
+
+def test_profiled_err():
+    """
+    Conducts unhappy path unit test for profiled function.
+
+    Checks if errors of a measured call are raised, and the call still reported.
+    """
+
+    # Create test output
+    with Profiler(trace_memory=False) as profiler:
+        with pytest.raises(ValueError):
+            allocate(-1)
+
+    # Test equality
+    assert [totals["calls"] for totals in profiler.report()["functions"]] == [1]
@@ -0,0 +1,202 @@
+"""
+Tests the functions contained in retrieve_data module.
+"""
+
+import functools
+
+import pytest
+import pandas as pd
+import requests
+
+from src.retrieve_data import format_places_page, iter_places_pages, make_places_client, stream_places_api, \
+    update_places_api, get_places_page
+from fake_socrata import FakeSocrataServer, make_places_records
+
+# Define input records as returned by Socrata
+records_in = [{"StateDesc": "Ohio", "CountyName": "Summit", "CountyFIPS": "39153",
+               "LocationID": "39153503300", "TotalPopulation": "5606",
+               "MeasureId": "MHLTH", "Data_Value": "21.7"},
+              {"StateDesc": "Michigan", "CountyName": "Wayne", "CountyFIPS": "26163",
+               "LocationID": "26163543900", "TotalPopulation": "901",
+               "MeasureId": "COPD", "Data_Value": "14.2"},
+              {"StateDesc": "South Carolina", "CountyName": "Orangeburg", "CountyFIPS": "45075",
+               "LocationID": "45075010200", "TotalPopulation": "5097",
+               "MeasureId": "GHLTH", "Data_Value": "30.5"}]
+
+# Define records served by the fake Socrata server
+server_records = make_places_records(23)
+
+def client_factory(server : FakeSocrataServer):
+    """Creates Socrata clients pointed at the fake server."""
+    return functools.partial(make_places_client, server.url, None, uri_prefix="http://")
+
+# Test format_places_page function
+def test_format_places_page():
+    """
+    Conducts happy path unit test for format_places_page function.
+    """
+
+    # Define expected output
+    df_true = pd.DataFrame(
+            [["Ohio", "Summit", 39153, 39153503300, 5606, "MHLTH", 21.7],
+             ["Michigan", "Wayne", 26163, 26163543900, 901, "COPD", 14.2],
+             ["South Carolina", "Orangeburg", 45075, 45075010200, 5097, "GHLTH", 30.5]],
+            index = pd.RangeIndex(10, 13),
+            columns = ["StateDesc", "CountyName", "CountyFIPS", "LocationID",
+                       "TotalPopulation", "MeasureId", "Data_Value"])
+
+    # Create test output
+    df_test = format_places_page(records_in, start=10)
+
+    # Test equality
+    pd.testing.assert_frame_equal(df_true, df_test)
+
+def test_format_places_page_val_err():
+    """
+    Conducts unhappy path unit test for format_places_page function.
+
+    Checks if ValueError raised for non-numeric measure value.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        format_places_page([{"LocationID": "39153503300", "Data_Value": "Not a number"}])
+
+# Test get_places_page function
+def test_get_places_page():
+    """
+    Conducts happy path unit test for get_places_page function.
+
+    A failed request is retried.
+    """
+
+    # Create test output
+    with FakeSocrataServer(server_records, fail_offsets={0}) as server:
+        records = get_places_page(client_factory(server)(), "cwsq-ngmh",
+                                  'select LocationID, Data_Value where year = "2019" limit 5 offset 0', backoff=0)
+
+    # Test equality
+    assert [record["LocationID"] for record in records] == [record["LocationID"] for record in server_records[:5]]
+
+def test_get_places_page_val_err():
+    """
+    Conducts unhappy path unit test for get_places_page function.
+
+    Checks if ValueError raised for fewer than one attempt, rather than an empty page returned.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        get_places_page(None, "cwsq-ngmh", "SELECT *", attempts=0)
+
+# Test iter_places_pages function
+def test_iter_places_pages():
+    """
+    Conducts happy path unit test for iter_places_pages function.
+
+    Pages are fetched concurrently and a failed page request is retried.
+    """
+
+    # Create test output
+    with FakeSocrataServer(server_records, fail_offsets={10}) as server:
+        pages = list(iter_places_pages(client_factory(server),
+                                       page_size=5,
+                                       backoff=0,
+                                       max_workers=3))
+    df_test = pd.concat(pages, axis=0)
+
+    # Test equality
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    pd.testing.assert_frame_equal(format_places_page(server_records).drop(columns=["Year", ":updated_at"]),
+                                  df_test)
+
+def test_iter_places_pages_conn_err():
+    """
+    Conducts unhappy path unit test for iter_places_pages function.
+
+    Checks if ConnectionError raised once a page exhausts its attempts.
+    """
+
+    # Create test output
+    with FakeSocrataServer(server_records, fail_offsets={5}) as server:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            list(iter_places_pages(client_factory(server),
+                                   page_size=5,
+                                   attempts=1,
+                                   max_workers=2))
+
+# Test stream_places_api function
+def test_stream_places_api(tmp_path):
+    """
+    Conducts happy path unit test for stream_places_api function.
+    """
+
+    # Create test output
+    save_file_path = str(tmp_path / "raw.csv")
+    with FakeSocrataServer(server_records) as server:
+        row_count = stream_places_api(save_file_path, server.url, None, None, None,
+                                      page_size=4, max_workers=4, backoff=0, uri_prefix="http://")
+    df_test = pd.read_csv(save_file_path, index_col=0)
+
+    # Test equality
+    assert row_count == len(server_records)
+    assert df_test.index.tolist() == list(range(len(server_records)))
+    assert df_test.LocationID.tolist() == [int(r["LocationID"]) for r in server_records]
+
+def test_stream_places_api_resume(tmp_path):
+    """
+    Conducts happy path unit test for resuming stream_places_api from checkpoints.
+
+    Only pages missing from the failed attempt are requested again.
+    """
+
+    # Create test output
+    save_file_path = str(tmp_path / "raw.csv")
+    checkpoint_dir = save_file_path + ".checkpoint"
+    with FakeSocrataServer(server_records, fail_offsets={12}) as server:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            stream_places_api(save_file_path, server.url, None, None, None, page_size=4,
+                              attempts=1, uri_prefix="http://", checkpoint_dir=checkpoint_dir)
+        server.requests.clear()
+        stream_places_api(save_file_path, server.url, None, None, None, page_size=4,
+                          attempts=1, uri_prefix="http://", checkpoint_dir=checkpoint_dir, resume=True)
+    df_test = pd.read_csv(save_file_path, index_col=0)
+    offsets_requested = {int(query.split("offset")[1].split()[0])
+                         for query in server.requests if "offset" in query}
+
+    # Test equality
+    assert {0, 4, 8}.isdisjoint(offsets_requested) # saved before the failure
+    assert {12, 20} <= offsets_requested
+    assert df_test.index.tolist() == list(range(len(server_records)))
+    assert not (tmp_path / "raw.csv.checkpoint").exists()
+
+# Test update_places_api function
+def test_update_places_api(tmp_path):
+    """
+    Conducts happy path unit test for update_places_api function.
+
+    The second call only requests rows revised or added after the first call
+    and merges them into the raw file keyed on LocationID and MeasureId.
+    """
+
+    # Define records before and after a refresh
+    initial_records = make_places_records(10)
+    revised_records = make_places_records(15, updated_at="2022-06-01T00:00:00.000Z", value_offset=1)
+    refreshed_records = initial_records[:7] + revised_records[7:]
+
+    # Create test output
+    save_file_path = str(tmp_path / "raw.csv")
+    with FakeSocrataServer(initial_records) as server:
+        update_places_api(save_file_path, server.url, None, None, None, page_size=4, uri_prefix="http://")
+    with FakeSocrataServer(refreshed_records) as server:
+        row_count = update_places_api(save_file_path, server.url, None, None, None,
+                                      page_size=4, uri_prefix="http://")
+        rows_requested = sum(len(server.respond(query)[1]) for query in list(server.requests)
+                             if "offset" in query)
+    df_test = pd.read_csv(save_file_path, index_col=0).sort_values(["LocationID", "MeasureId"])
+    df_true = format_places_page(refreshed_records).sort_values(["LocationID", "MeasureId"])
+
+    # Test equality
+    assert row_count == 15
+    assert rows_requested == 8
+    assert df_test.Data_Value.tolist() == df_true.Data_Value.tolist()
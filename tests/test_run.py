@@ -0,0 +1,45 @@
+"""
+Tests the startup of run.py steps. See benchmarks/bench_startup.py.
+"""
+
+import pytest
+
+from benchmarks.bench_startup import FORBIDDEN, empty_config, parse_importtime, time_imports
+
+# Test modules imported by run.py steps
+@pytest.mark.parametrize("step", ["--help", "create_db", "clean", "pipeline"])
+def test_step_imports(tmp_path, step):
+    """
+    Conducts happy path unit test for run.py step imports.
+
+    Steps only import the libraries of the stages they run, once they run them.
+    """
+
+    # Define input config, with every section empty so that steps exit before working
+    config = str(tmp_path / "empty-config.yaml")
+    empty_config("config/model-config.yaml", config)
+
+    # Create test output
+    argv = ["run.py", step] if step == "--help" else ["run.py", step, "--config", config]
+    imported = {module["module"].split(".")[0] for module in time_imports(argv)[1]}
+
+    # Test equality
+    assert "src" in imported or step == "--help"
+    assert not imported & set(FORBIDDEN)
+
+def test_parse_importtime():
+    """
+    Conducts happy path unit test for parse_importtime function.
+    """
+
+    # Define input
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   pandas._libs\n"
+              "import time:       300 |        420 | pandas\n")
+
+    # Create test output
+    modules = parse_importtime(stderr)
+
+    # Test equality
+    assert [(module["module"], module["depth"], module["self_us"]) for module in modules] == \
+        [("pandas._libs", 1, 120), ("pandas", 0, 300)]
@@ -3,9 +3,11 @@ Tests the functions contained in run_model module.
 """
 
 import pytest
+import numpy as np
 import pandas as pd
 
-from src.run_model import fit_model
+from src.run_model import fit_model, assign_folds, cross_validate, fit_model_streaming, dump_model
+from src.score import import_model
 
 # Define input dataframe
 df_in_values = [[ 0.283     ,  0.2       , -1.11467689],
@@ -56,4 +58,146 @@ def test_fit_model_key_err():
                   response = "Not a column",
                   method = "linearregression",
                   fit_intercept=True)
-                  
\ No newline at end of file
+                  
+
+# Test assign_folds function
+def test_assign_folds():
+    """
+    Conducts happy path unit test for assign_folds function.
+
+    Rows are split evenly, rows of a group are held out in the same fold, and
+    more than 127 folds are numbered without overflow.
+    """
+
+    # Define input
+    groups = np.array(["New York", "Texas", "New York", "Ohio", "Texas", "Ohio"])
+
+    # Create test output
+    folds = assign_folds(6, n_splits=3)
+    group_folds = assign_folds(6, n_splits=3, groups=groups)
+    many_folds = assign_folds(300, n_splits=200)
+
+    # Test equality
+    assert np.bincount(folds).tolist() == [2, 2, 2]
+    assert all(len(set(group_folds[groups == group])) == 1 for group in set(groups))
+    assert sorted(set(many_folds.tolist())) == list(range(200))
+
+def test_assign_folds_val_err():
+    """
+    Conducts unhappy path unit test for assign_folds function.
+
+    Checks if ValueError raised for fewer groups than folds.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        assign_folds(4, n_splits=3, groups=np.array(["Ohio", "Ohio", "Texas", "Texas"]))
+
+# Test cross_validate function
+def test_cross_validate():
+    """
+    Conducts happy path unit test for cross_validate function.
+
+    Folds fitted in a process pool give the same results as fitted in turn,
+    and each fold's RMSE is that of a model fitted without the fold.
+    """
+
+    # Define input
+    rng = np.random.default_rng(0)
+    df_cv = pd.DataFrame(rng.random((40, 2)), columns=["ACCESS2", "BINGE"])
+    df_cv["GHLTH"] = df_cv.ACCESS2 - 2 * df_cv.BINGE + rng.normal(0, 0.1, 40)
+
+    # Define expected output
+    folds = assign_folds(40, n_splits=4)
+    _, model = fit_model(df_cv.loc[folds != 0], ["ACCESS2", "BINGE"], "GHLTH")
+    held_out = df_cv.loc[folds == 0]
+    rmse_true = np.sqrt(np.mean((held_out.GHLTH - model.predict(held_out[["ACCESS2", "BINGE"]])) ** 2))
+
+    # Create test output
+    results = cross_validate(df_cv, ["ACCESS2", "BINGE"], "GHLTH", n_splits=4, n_jobs=1)
+    results_parallel = cross_validate(df_cv, ["ACCESS2", "BINGE"], "GHLTH", n_splits=4, n_jobs=2)
+
+    # Test equality
+    assert results == results_parallel
+    assert results["folds"][0]["rmse"] == pytest.approx(rmse_true)
+    assert sorted(results["params_mean"]) == ["access2", "binge", "intercept"]
+
+def test_cross_validate_key_err():
+    """
+    Conducts unhappy path unit test for cross_validate function.
+
+    Checks if KeyError raised for missing column.
+    """
+
+    # Create test output
+    with pytest.raises(KeyError):
+        cross_validate(df_in, ["ACCESS2", "BINGE"], "Not a column", n_splits=2, n_jobs=1)
+
+# Test fit_model_streaming function
+def test_fit_model_streaming():
+    """
+    Conducts happy path unit test for fit_model_streaming function.
+
+    Coefficients fitted one chunk at a time are those fitted on all rows at once,
+    and the model predicts as a fitted model.
+    """
+
+    # Define expected output
+    params_true, model_true = fit_model(df_in, ["ACCESS2", "BINGE"], "GHLTH", fit_intercept=True)
+
+    # Create test output
+    params_test, model_test = fit_model_streaming([df_in.iloc[:1], df_in.iloc[1:3], df_in.iloc[3:]],
+                                                  ["ACCESS2", "BINGE"], "GHLTH")
+
+    # Test equality
+    assert params_test == pytest.approx(params_true)
+    assert model_test.predict(df_in[["ACCESS2", "BINGE"]]) == pytest.approx(model_true.predict(df_in[["ACCESS2", "BINGE"]]))
+
+def test_fit_model_streaming_val_err():
+    """
+    Conducts unhappy path unit test for fit_model_streaming function.
+
+    Checks if ValueError raised for no rows.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        fit_model_streaming([df_in.iloc[:0]], ["ACCESS2", "BINGE"], "GHLTH")
+
+# Test dump_model function
+def test_dump_model(tmp_path):
+    """
+    Conducts happy path unit test for dump_model function.
+
+    Format follows the file extension and import_model detects it from the file.
+    """
+
+    # Define input
+    _, model_in = fit_model(df_in, features=["ACCESS2", "BINGE"], response="GHLTH",
+                            method="linearregression")
+
+    # Create test output
+    dump_model(model_in, str(tmp_path / "model.sav"))
+    dump_model(model_in, str(tmp_path / "model.lm"))
+    pickled = import_model(str(tmp_path / "model.sav"))
+    compact = import_model(str(tmp_path / "model.lm"))
+
+    # Test equality
+    assert isinstance(pickled, type(model_in))
+    np.testing.assert_allclose(compact.predict(df_in[["ACCESS2", "BINGE"]]),
+                               pickled.predict(df_in[["ACCESS2", "BINGE"]]))
+
+def test_dump_model_val_err(tmp_path):
+    """
+    Conducts unhappy path unit test for dump_model function.
+
+    Checks if ValueError raised for an unknown model format.
+    """
+
+    # Define input
+    _, model_in = fit_model(df_in, features=["ACCESS2", "BINGE"], response="GHLTH",
+                            method="linearregression")
+
+    # Create test output
+    with pytest.raises(ValueError):
+        dump_model(model_in, str(tmp_path / "model.sav"), model_format="onnx")
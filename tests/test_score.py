@@ -0,0 +1,166 @@
+"""
+Tests the functions contained in score module.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.run_model import dump_model
+from src.score import score_chunk, score_batch, pred_responses, stack_models, load_models
+
+# Define input dataframe
+rng = np.random.default_rng(0)
+features = ["ACCESS2", "BINGE", "Midwest"]
+df_in = pd.DataFrame(rng.random((40, 3)), columns=features)
+df_in["GHLTH"] = df_in.ACCESS2 - 2 * df_in.BINGE + rng.normal(0, 0.1, 40)
+df_in["training"] = np.tile([1, 0], 20)
+model_in = LinearRegression().fit(df_in[features], df_in["GHLTH"])
+
+# Test score_chunk function
+def test_score_chunk():
+    """
+    Conducts happy path unit test for score_chunk function.
+
+    Only test rows are scored, as pred_responses scores them, and the logistic
+    of predictions is taken if requested.
+    """
+
+    # Define expected output
+    df_true = pred_responses(model_in, df_in[df_in.training == 0].copy(), features)
+
+    # Create test output
+    df_test = score_chunk(df_in, model_in.coef_, model_in.intercept_, features, keep=["GHLTH"])
+    df_logistic = score_chunk(df_in, model_in.coef_, model_in.intercept_, features, logistic=True)
+
+    # Test equality
+    assert list(df_test.columns) == ["GHLTH", "predictions"]
+    pd.testing.assert_frame_equal(df_test, df_true[["GHLTH", "predictions"]])
+    np.testing.assert_allclose(df_logistic.predictions, 1 / (1 + np.exp(-df_true.predictions)))
+
+def test_score_chunk_key_err():
+    """
+    Conducts unhappy path unit test for score_chunk function.
+
+    Checks if KeyError raised for a missing feature.
+    """
+
+    # Create test output
+    with pytest.raises(KeyError):
+        score_chunk(df_in.drop(columns="BINGE"), model_in.coef_, model_in.intercept_, features)
+
+# Test score_batch function
+def test_score_batch(tmp_path):
+    """
+    Conducts happy path unit test for score_batch function.
+
+    Chunks scored in several processes are saved in input order.
+    """
+
+    # Define input
+    df_in.to_csv(tmp_path / "train_test.csv")
+
+    # Define expected output
+    df_true = pred_responses(model_in, df_in[df_in.training == 0].copy(), features)
+
+    # Create test output
+    n_rows = score_batch(str(tmp_path / "train_test.csv"), str(tmp_path / "scores.csv"), model_in, features,
+                         keep=["GHLTH"], chunksize=7, n_jobs=2)
+    df_test = pd.read_csv(tmp_path / "scores.csv")
+
+    # Test equality
+    assert n_rows == 20
+    np.testing.assert_allclose(df_test.predictions, df_true.predictions)
+    np.testing.assert_allclose(df_test.GHLTH, df_true.GHLTH)
+
+def test_score_batch_val_err(tmp_path):
+    """
+    Conducts unhappy path unit test for score_batch function.
+
+    Checks if ValueError raised for a kept column missing from the csv input.
+    """
+
+    # Define input
+    df_in.to_csv(tmp_path / "train_test.csv")
+
+    # Create test output
+    with pytest.raises(ValueError):
+        score_batch(str(tmp_path / "train_test.csv"), str(tmp_path / "scores.csv"), model_in, features,
+                    keep=["StateDesc"], n_jobs=1)
+
+# Test stack_models function
+def test_stack_models():
+    """
+    Conducts happy path unit test for stack_models function.
+
+    Models fitted on different features predict in one matrix product as each
+    predicts on its own.
+    """
+
+    # Define input
+    models_in = {"all": model_in,
+                 "measures": LinearRegression().fit(df_in[["BINGE", "ACCESS2"]], df_in["GHLTH"])}
+
+    # Create test output
+    coef, intercept, stacked_features = stack_models(models_in, features)
+    predictions = df_in[stacked_features].to_numpy() @ coef + intercept
+
+    # Test equality
+    assert stacked_features == features
+    assert coef[2, 1] == 0
+    np.testing.assert_allclose(predictions[:, 0], model_in.predict(df_in[features]))
+    np.testing.assert_allclose(predictions[:, 1], models_in["measures"].predict(df_in[["BINGE", "ACCESS2"]]))
+
+def test_stack_models_type_err():
+    """
+    Conducts unhappy path unit test for stack_models function.
+
+    Checks if TypeError raised for a model without coefficients.
+    """
+
+    # Create test output
+    with pytest.raises(TypeError):
+        stack_models({"all": model_in, "unfitted": LinearRegression()}, features)
+
+# Test load_models function
+def test_load_models(tmp_path):
+    """
+    Conducts happy path unit test for load_models function.
+
+    Models of a directory, pickled or compact, are named by file and scored in
+    one pass, one prediction column each.
+    """
+
+    # Define input
+    df_in.to_csv(tmp_path / "train_test.csv")
+    (tmp_path / "models").mkdir()
+    dump_model(model_in, str(tmp_path / "models" / "v1.sav"))
+    dump_model(model_in, str(tmp_path / "models" / "v2.lm"))
+
+    # Create test output
+    models_test = load_models([str(tmp_path / "models")])
+    score_batch(str(tmp_path / "train_test.csv"), str(tmp_path / "scores.csv"), models_test, features,
+                keep=["GHLTH"], n_jobs=1)
+    df_test = pd.read_csv(tmp_path / "scores.csv")
+
+    # Test equality
+    assert list(models_test) == ["v1", "v2"]
+    assert list(df_test.columns) == ["GHLTH", "predictions_v1", "predictions_v2"]
+    np.testing.assert_allclose(df_test.predictions_v1, df_test.predictions_v2)
+
+def test_load_models_val_err(tmp_path):
+    """
+    Conducts unhappy path unit test for load_models function.
+
+    Checks if ValueError raised for models of the same name.
+    """
+
+    # Define input
+    for version in ["v1", "v2"]:
+        (tmp_path / version).mkdir()
+        dump_model(model_in, str(tmp_path / version / "model.sav"))
+
+    # Create test output
+    with pytest.raises(ValueError):
+        load_models([str(tmp_path / "v1" / "model.sav"), str(tmp_path / "v2" / "model.sav")])
@@ -0,0 +1,101 @@
+"""
+Tests the functions contained in stage_cache module.
+"""
+
+import pytest
+import pandas as pd
+
+from src.stage_cache import StageCache, hash_file, hash_modules
+
+# Test hash_file function
+def test_hash_file(tmp_path):
+    """
+    Conducts happy path unit test for hash_file function.
+
+    Identical contents give identical hashes, and a memoized hash is replaced
+    once the file changes.
+    """
+
+    # Define input files
+    first, second = tmp_path / "first.csv", tmp_path / "second.csv"
+    first.write_text("a,b\n1,2\n")
+    second.write_text("a,b\n1,2\n")
+    memo_path = str(tmp_path / "memo.json")
+
+    # Create test output
+    first_hash = hash_file(str(first), memo_path)
+    first.write_text("a,b\n1,3\n")
+
+    # Test equality
+    assert first_hash == hash_file(str(second))
+    assert hash_file(str(first), memo_path) != first_hash
+
+def test_hash_file_not_found(tmp_path):
+    """
+    Conducts unhappy path unit test for hash_file function.
+
+    Checks if FileNotFoundError raised for a missing file.
+    """
+
+    # Create test output
+    with pytest.raises(FileNotFoundError):
+        hash_file(str(tmp_path / "missing.csv"))
+
+# Test hash_modules function
+def test_hash_modules():
+    """
+    Conducts happy path unit test for hash_modules function.
+    """
+
+    # Test equality
+    assert hash_modules(["src.clean", "src.featurize"]) == hash_modules(["src.featurize", "src.clean"])
+    assert hash_modules(["src.clean"]) != hash_modules(["src.featurize"])
+
+def test_hash_modules_not_found():
+    """
+    Conducts unhappy path unit test for hash_modules function.
+
+    Checks if ModuleNotFoundError raised for a missing module.
+    """
+
+    # Create test output
+    with pytest.raises(ModuleNotFoundError):
+        hash_modules(["src.missing_module"])
+
+# Test StageCache class
+def test_stage_cache_key():
+    """
+    Conducts happy path unit test for StageCache.key method.
+
+    Keys change with the stage's inputs and config sections.
+    """
+
+    # Define input
+    inputs, config = {"clean": "abc"}, {"featurize": {"scale_values": {"columns": ["GHLTH"]}}}
+
+    # Create test output
+    key = StageCache.key("featurize", inputs, config, ["src.featurize"])
+
+    # Test equality
+    assert key == StageCache.key("featurize", dict(inputs), dict(config), ["src.featurize"])
+    assert key != StageCache.key("featurize", {"clean": "abd"}, config, ["src.featurize"])
+    assert key != StageCache.key("featurize", inputs, {"featurize": {"scale_values": {"columns": []}}},
+                                 ["src.featurize"])
+
+def test_stage_cache_load_store(tmp_path):
+    """
+    Conducts happy path unit test for StageCache.load and StageCache.store methods.
+    """
+
+    # Define input
+    cache = StageCache(str(tmp_path / "cache"))
+    df_in = pd.DataFrame({"LocationID": [1, 2], "GHLTH": [10.5, 12.25]})
+
+    # Create test output
+    missing = cache.load("key")
+    cache.store("key", {"featurized": df_in})
+    df_test = cache.load("key")["featurized"]
+
+    # Test equality
+    assert missing is None
+    pd.testing.assert_frame_equal(df_in, df_test)
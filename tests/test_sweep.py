@@ -0,0 +1,88 @@
+"""
+Tests the functions contained in sweep module.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.sweep import expand_grid, plan_workers, run_sweep
+
+# Define input dataframe
+rng = np.random.default_rng(0)
+df_in = pd.DataFrame(rng.random((60, 3)), columns=["ACCESS2", "BINGE", "Midwest"])
+df_in["GHLTH"] = df_in.ACCESS2 - 2 * df_in.BINGE + rng.normal(0, 0.1, 60)
+features = ["ACCESS2", "BINGE", "Midwest"]
+estimators = {"LinearRegression": None, "Ridge": {"alpha": [0.1, 10.0]}}
+
+# Test expand_grid function
+def test_expand_grid():
+    """
+    Conducts happy path unit test for expand_grid function.
+    """
+
+    # Create test output
+    candidates = expand_grid(estimators, features, {"all": None, "measures": ["ACCESS2", "BINGE"]})
+
+    # Test equality
+    assert [(candidate["estimator"], candidate["params"], candidate["subset"]) for candidate in candidates] == [
+        ("LinearRegression", {}, "all"), ("LinearRegression", {}, "measures"),
+        ("Ridge", {"alpha": 0.1}, "all"), ("Ridge", {"alpha": 0.1}, "measures"),
+        ("Ridge", {"alpha": 10.0}, "all"), ("Ridge", {"alpha": 10.0}, "measures")]
+    assert candidates[1]["features"] == ["ACCESS2", "BINGE"]
+
+def test_expand_grid_val_err():
+    """
+    Conducts unhappy path unit test for expand_grid function.
+
+    Checks if ValueError raised for an estimator not in sklearn.linear_model.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        expand_grid({"RandomForestRegressor": None}, features)
+
+# Test plan_workers function
+def test_plan_workers():
+    """
+    Conducts happy path unit test for plan_workers function.
+
+    Processes are limited by candidates and by the memory budget of each.
+    """
+
+    # Create test output
+    assert plan_workers(3, job_bytes=1, n_jobs=8) == 3
+    assert plan_workers(8, job_bytes=1, n_jobs=8, memory_per_job_mb=1e12) == 1
+
+# Test run_sweep function
+def test_run_sweep():
+    """
+    Conducts happy path unit test for run_sweep function.
+
+    Candidates fitted in a process pool are ranked as when fitted in turn, and the
+    best model has the lowest test set RMSE.
+    """
+
+    # Create test output
+    leaderboard, best_model = run_sweep(df_in, features, "GHLTH", estimators,
+                                        {"all": None, "measures": ["ACCESS2", "BINGE"]}, n_jobs=1)
+    leaderboard_parallel, _ = run_sweep(df_in, features, "GHLTH", estimators,
+                                        {"all": None, "measures": ["ACCESS2", "BINGE"]}, n_jobs=2)
+
+    # Test equality
+    columns = ["rank", "estimator", "subset", "rmse", "r2"]
+    pd.testing.assert_frame_equal(leaderboard[columns], leaderboard_parallel[columns])
+    assert leaderboard.rmse.is_monotonic_increasing
+    assert list(best_model.feature_names_in_) == (features if leaderboard.subset[0] == "all"
+                                                  else ["ACCESS2", "BINGE"])
+
+def test_run_sweep_type_err():
+    """
+    Conducts unhappy path unit test for run_sweep function.
+
+    Checks if TypeError raised for a parameter the estimator does not have.
+    """
+
+    # Create test output
+    with pytest.raises(TypeError):
+        run_sweep(df_in, features, "GHLTH", {"Ridge": {"not_a_param": [1]}}, n_jobs=1)
@@ -3,9 +3,10 @@ Tests the functions contained in train_test_split module.
 """
 
 import pytest
+import numpy as np
 import pandas as pd
 
-from src.train_test_split import split_data
+from src.train_test_split import split_data, split_mask, split_indices
 
 # Define input dataframe
 df_in_values = [[ 0.272     ,  0.254     ,  0.182     ,  0.386     ,  0.737     ,
@@ -87,3 +88,61 @@ def test_split_data_val_err():
         split_data(df_in,
                    test_size=2.0, # test_size must be float between 0 and 1
                    random_state=42)
+
+def test_split_data_mask_only():
+    """
+    Conducts happy path unit test for split_data function returning only the mask.
+
+    The int8 mask marks the same rows as the full split, in the order of the input,
+    and the input is not modified.
+    """
+
+    # Define expected output
+    training_true = split_data(df_in, test_size=0.25, random_state=42)["training"]
+
+    # Create test output
+    df_test = split_data(df_in, test_size=0.25, random_state=42, mask_only=True)
+
+    # Test equality
+    assert list(df_test.columns) == ["training"] and df_test.training.dtype == "int8"
+    assert df_test.training.tolist() == training_true.loc[df_in.index].tolist()
+    assert "training" not in df_in.columns
+
+# Test split_mask function
+def test_split_mask():
+    """
+    Conducts happy path unit test for split_mask function.
+    """
+
+    # Create test output
+    mask = split_mask(10, test_size=0.3, random_state=42)
+
+    # Test equality
+    assert mask.dtype == bool
+    assert mask.tolist() == [True, False, True, True, True, False, True, True, False, True]
+
+def test_split_mask_type_err():
+    """
+    Conducts unhappy path unit test for split_mask function.
+
+    Checks if TypeError raised for a non-numeric test_size.
+    """
+
+    # Create test output
+    with pytest.raises(TypeError):
+        split_mask(10, test_size="0.3")
+
+# Test split_indices function
+def test_split_indices_val_err():
+    """
+    Conducts unhappy path unit test for split_indices function.
+
+    Checks if ValueError raised, as by sklearn, for no rows or a test_size
+    that leaves no training rows.
+    """
+
+    # Create test output
+    with pytest.raises(ValueError):
+        split_indices(0, test_size=0.3)
+    with pytest.raises(ValueError):
+        split_indices(1, test_size=0.3)